@@ -0,0 +1,463 @@
+# ============================================================
+# STORTINGSVOTERING - AGGREGATKUBE
+# ============================================================
+# Dette scriptet lagrer ferdige tellinger for alle vanlige
+# utsnitt av dataene, så analysene slipper å telle stemmer
+# på nytt hver gang.
+#
+# Tellingene er gruppert etter:
+#   - enhet:        parti ("A") eller partipar ("A-H")
+#   - granularitet: votering, dag, maaned, sesjon, stortingsperiode
+#   - sakstype:     f.eks. "budsjett", "lovsak"
+#
+# Et oppslag (f.eks. enighet A-H i 2023-2024 for budsjettsaker)
+# blir da et oppslag pluss en enkel sum, ikke en ny gjennomgang
+# av alle stemmene. Kuben oppdateres inkrementelt av
+# oppdater_aggregatkube (regelen aggregatkube i orkestrering.py):
+# voteringer med samme sjekksum som sist (se sjekksummer.py)
+# hoppes over, endrede voteringer trekkes fra og legges til på
+# nytt, og sesjoner med uendret sesjonssum leses ikke i det hele
+# tatt. Sesjoner uten sjekksummer sammenlignes bare på
+# votering_id, og leses bare når voteringsfilen er endret.
+# ============================================================
+
+import json
+import os
+from collections import defaultdict
+
+from analyser_data_v2 import finn_sesjoner, finn_voteringsfil, les_api_dato, normaliser_votering, strom_voteringer
+from sjekksummer import les_sjekksummer
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+KUBE_FIL = "aggregatkube.json"
+KUBE_VERSJON = 2
+
+GRANULARITETER = ["votering", "dag", "maaned", "sesjon", "stortingsperiode"]
+
+# Tellinger per parti og per partipar (i denne rekkefølgen)
+PARTI_MAAL = ["for", "mot", "ikke_tilstede", "avstar", "ikke_avgitt", "standpunkt_for", "standpunkt_mot"]
+PAR_MAAL = ["enige", "uenige"]
+
+# Indekser for de individuelle stemmekodene i PARTI_MAAL
+STEMME_INDEKS = {kode: i for i, kode in enumerate(PARTI_MAAL[:5])}
+STANDPUNKT_FOR = PARTI_MAAL.index("standpunkt_for")
+STANDPUNKT_MOT = PARTI_MAAL.index("standpunkt_mot")
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def stortingsperiode(sesjon_id):
+    """
+    Finner stortingsperioden en sesjon hører til.
+    
+    Periodene er fireårige og starter ved valget (2009, 2013, 2017, ...).
+    Eksempel: "2023-2024" → "2021-2025".
+    """
+    start = int(sesjon_id.split("-")[0])
+    periode_start = 2009 + 4 * ((start - 2009) // 4)
+    return f"{periode_start}-{periode_start + 4}"
+
+
+def ny_kube():
+    """
+    Tom kube.
+    
+    "sesjoner" holder rede på hva som er med:
+        {sesjon_id: {"sjekksum": sesjonssum,
+                     "voteringer": {votering_id: [sjekksum, dag]}}}
+    """
+    return {
+        "versjon": KUBE_VERSJON,
+        "sesjoner": {},
+        "celler": {g: {} for g in GRANULARITETER}
+    }
+
+
+def _legg_til(celler, periode, sakstype, enhet, verdier):
+    """Legger verdier til i én celle (negative verdier trekker fra)."""
+    celle = celler.setdefault(periode, {}).setdefault(sakstype, {})
+    eksisterende = celle.get(enhet)
+    
+    if eksisterende is None:
+        celle[enhet] = list(verdier)
+    else:
+        for i, verdi in enumerate(verdier):
+            eksisterende[i] += verdi
+        
+        # Fjern celler som er tømt, så kuben blir lik en som er bygd på nytt
+        if not any(eksisterende):
+            del celle[enhet]
+            if not celle:
+                del celler[periode][sakstype]
+                if not celler[periode]:
+                    del celler[periode]
+
+
+def _nokler(dag, sesjon_id):
+    """Periodenøklene en votering telles under (utenom voteringsnivået)."""
+    return {
+        "dag": dag,
+        "maaned": dag[:7] if dag != "ukjent" else "ukjent",
+        "sesjon": sesjon_id,
+        "stortingsperiode": stortingsperiode(sesjon_id)
+    }
+
+
+def _partipar(standpunkt):
+    """Partipar-tellingene {"A-H": [enige, uenige]} for én votering."""
+    par = {}
+    sorterte = sorted(standpunkt)
+    for i, parti_a in enumerate(sorterte):
+        for parti_b in sorterte[i+1:]:
+            enige = standpunkt[parti_a] == standpunkt[parti_b]
+            par[f"{parti_a}-{parti_b}"] = [1, 0] if enige else [0, 1]
+    return par
+
+
+def tell_votering(votering):
+    """
+    Teller én votering per parti og per partipar.
+    
+    Returnerer (partitellinger, partipartellinger):
+        partitellinger: {parti_id: [verdier i PARTI_MAAL-rekkefølge]}
+        partipartellinger: {"A-H": [enige, uenige]}
+    """
+    partier = defaultdict(lambda: [0] * len(PARTI_MAAL))
+    
+    for stemme in votering.get("stemmer") or []:
+        parti_id = ((stemme.get("representant") or {}).get("parti") or {}).get("id")
+        indeks = STEMME_INDEKS.get(normaliser_votering(stemme.get("votering")))
+        if parti_id and indeks is not None:
+            partier[parti_id][indeks] += 1
+    
+    # Standpunktet følger av for/mot-tellingen, som i standpunkt_fra_telling
+    standpunkt = {}
+    for parti_id, verdier in partier.items():
+        if verdier[0] > verdier[1]:
+            verdier[STANDPUNKT_FOR] += 1
+            standpunkt[parti_id] = "for"
+        elif verdier[1] > verdier[0]:
+            verdier[STANDPUNKT_MOT] += 1
+            standpunkt[parti_id] = "mot"
+    
+    return dict(partier), _partipar(standpunkt)
+
+
+def _summer(enheter, verdier_per_enhet):
+    """Legger {enhet: verdier} til i enheter (uten opprydding, bare positive verdier)."""
+    for enhet, verdier in verdier_per_enhet.items():
+        eksisterende = enheter.get(enhet)
+        if eksisterende is None:
+            enheter[enhet] = list(verdier)
+        else:
+            for i, verdi in enumerate(verdier):
+                eksisterende[i] += verdi
+
+
+# ============================================================
+# BYGGING OG OPPDATERING
+# ============================================================
+
+def oppdater_kube(kube, voteringer, sesjon_id, sjekksummer=None):
+    """
+    Oppdaterer kuben med voteringene i en sesjon.
+    
+    voteringer er alle voteringene i sesjonen (liste eller generator).
+    Voteringer med samme sjekksum som sist hoppes over, så samme fil
+    trygt kan leses flere ganger. Voteringer som er endret trekkes fra
+    og legges til på nytt, og voteringer som er borte trekkes fra.
+    
+    På voteringsnivå lagres bare partitellingene: partipar-tellingen for
+    én votering følger direkte av partienes standpunkt og regnes ut ved
+    oppslag (se hent_aggregat). Det holder kuben liten.
+    
+    Parametre:
+        sjekksummer: Sjekksum-indeksen for sesjonen (se sjekksummer.py).
+                     Uten den sammenlignes voteringene bare på
+                     votering_id: nye legges til og borte trekkes fra,
+                     men endret innhold oppdages ikke.
+    
+    Returnerer antall voteringer som ble lagt til (nye eller endrede).
+    """
+    sesjon = kube["sesjoner"].setdefault(sesjon_id, {"sjekksum": None, "voteringer": {}})
+    
+    if sjekksummer is not None:
+        if sesjon["sjekksum"] == sjekksummer["sesjon"]:
+            return 0
+        
+        summer = {
+            votering_id: sjekksum
+            for sak in sjekksummer["saker"].values()
+            for votering_id, sjekksum in sak["voteringer"].items()
+        }
+        
+        # Trekk fra voteringer som er endret eller borte
+        for votering_id in list(sesjon["voteringer"]):
+            if summer.get(votering_id) != sesjon["voteringer"][votering_id][0]:
+                _trekk_fra(kube, sesjon_id, votering_id)
+    else:
+        summer = {}
+    
+    celler = kube["celler"]
+    sett = set()
+    antall = 0
+    
+    # Tellingene samles per dag og sakstype først, og legges inn i
+    # de grovere periodene én gang per dag i stedet for per votering
+    per_dag = defaultdict(dict)
+    
+    for votering in voteringer:
+        votering_id = str(votering.get("votering_id"))
+        sett.add(votering_id)
+        if not votering.get("stemmer") or votering_id in sesjon["voteringer"]:
+            continue
+        
+        dato = les_api_dato(votering.get("dato", ""))
+        dag = dato.strftime("%Y-%m-%d") if dato else "ukjent"
+        sakstype = votering.get("sakstype") or "ukjent"
+        sesjon["voteringer"][votering_id] = [summer.get(votering_id), dag]
+        antall += 1
+        
+        partier, par = tell_votering(votering)
+        
+        for parti_id, verdier in partier.items():
+            _legg_til(celler["votering"], votering_id, sakstype, parti_id, verdier)
+        
+        enheter = per_dag[(dag, sakstype)]
+        _summer(enheter, partier)
+        _summer(enheter, par)
+    
+    for (dag, sakstype), enheter in per_dag.items():
+        for granularitet, nokkel in _nokler(dag, sesjon_id).items():
+            _summer(celler[granularitet].setdefault(nokkel, {}).setdefault(sakstype, {}), enheter)
+    
+    if sjekksummer is None:
+        # Voteringer som ikke lenger er med trekkes fra til slutt
+        for votering_id in list(sesjon["voteringer"]):
+            if votering_id not in sett:
+                _trekk_fra(kube, sesjon_id, votering_id)
+    
+    sesjon["sjekksum"] = sjekksummer["sesjon"] if sjekksummer is not None else None
+    return antall
+
+
+def _trekk_fra(kube, sesjon_id, votering_id):
+    """Fjerner én votering fra alle cellene den er telt i."""
+    _, dag = kube["sesjoner"][sesjon_id]["voteringer"].pop(votering_id)
+    celler = kube["celler"]
+    
+    for sakstype, partier in celler["votering"].pop(votering_id, {}).items():
+        standpunkt = {parti_id: _standpunkt(verdier) for parti_id, verdier in partier.items()}
+        par = _partipar({parti_id: sp for parti_id, sp in standpunkt.items() if sp})
+        
+        for granularitet, nokkel in _nokler(dag, sesjon_id).items():
+            for enhet, verdier in list(partier.items()) + list(par.items()):
+                _legg_til(celler[granularitet], nokkel, sakstype, enhet, [-v for v in verdier])
+
+
+def les_kube(data_mappe="../data"):
+    """Leser kuben fra fil, eller lager en tom kube (også hvis filen er ødelagt)."""
+    try:
+        with open(os.path.join(data_mappe, KUBE_FIL), "r", encoding="utf-8") as f:
+            kube = json.load(f)
+    except FileNotFoundError:
+        return ny_kube()
+    except json.JSONDecodeError:
+        print(f"   ⚠️  {KUBE_FIL} kunne ikke leses, bygges på nytt")
+        return ny_kube()
+    
+    if kube.get("versjon") != KUBE_VERSJON:
+        return ny_kube()
+    
+    return kube
+
+
+def lagre_kube(kube, data_mappe="../data"):
+    """
+    Lagrer kuben kompakt (uten innrykk).
+    
+    Skrives til en midlertidig fil som så erstatter den gamle, så en
+    leser aldri ser en halvskrevet kube.
+    """
+    filsti = os.path.join(data_mappe, KUBE_FIL)
+    midlertidig = filsti + ".tmp"
+    with open(midlertidig, "w", encoding="utf-8") as f:
+        json.dump(kube, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(midlertidig, filsti)
+    return filsti
+
+
+# ============================================================
+# OPPSLAG
+# ============================================================
+
+def hent_aggregat(kube, enhet, granularitet, periode, sakstyper=None):
+    """
+    Henter tellingen for én enhet i én periode.
+    
+    Parametre:
+        enhet: parti ("A") eller partipar ("A-H", alfabetisk sortert)
+        granularitet: "votering", "dag", "maaned", "sesjon" eller "stortingsperiode"
+        periode: nøkkelen i granulariteten (f.eks. "2023-10" for maaned)
+        sakstyper: liste med sakstyper som skal tas med (None = alle)
+    
+    Returnerer listen med tellinger (PARTI_MAAL eller PAR_MAAL), eller
+    nuller hvis enheten ikke har data.
+    """
+    er_par = "-" in enhet
+    summert = [0] * (len(PAR_MAAL) if er_par else len(PARTI_MAAL))
+    celler = kube["celler"][granularitet].get(str(periode), {})
+    
+    for sakstype, enheter in celler.items():
+        if sakstyper is not None and sakstype not in sakstyper:
+            continue
+        
+        if er_par and granularitet == "votering":
+            # Partipar på voteringsnivå regnes ut fra partienes standpunkt
+            parti_a, parti_b = enhet.split("-")
+            standpunkt_a = _standpunkt(enheter.get(parti_a))
+            standpunkt_b = _standpunkt(enheter.get(parti_b))
+            if standpunkt_a and standpunkt_b:
+                summert[0 if standpunkt_a == standpunkt_b else 1] += 1
+            continue
+        
+        verdier = enheter.get(enhet)
+        if verdier:
+            for i, verdi in enumerate(verdier):
+                summert[i] += verdi
+    
+    return summert
+
+
+def _standpunkt(partiverdier):
+    """Standpunktet ("for"/"mot") fra en partitelling på voteringsnivå."""
+    if not partiverdier:
+        return None
+    if partiverdier[PARTI_MAAL.index("standpunkt_for")]:
+        return "for"
+    if partiverdier[PARTI_MAAL.index("standpunkt_mot")]:
+        return "mot"
+    return None
+
+
+def perioder(kube, granularitet):
+    """Alle periodenøkler som finnes for en granularitet, sortert."""
+    return sorted(kube["celler"][granularitet])
+
+
+def partipar_tellinger(kube, granularitet, periode, sakstyper=None):
+    """
+    Henter tellingene for alle partipar i ett utsnitt av kuben.
+    
+    Returnerer dict: {"A-H": [enige, uenige], ...} (bare par som har
+    voteringer sammen)
+    """
+    celler = kube["celler"][granularitet].get(str(periode), {})
+    
+    alle_par = set()
+    for sakstype, enheter in celler.items():
+        if sakstyper is not None and sakstype not in sakstyper:
+            continue
+        if granularitet == "votering":
+            partier = sorted(p for p in enheter if _standpunkt(enheter[p]))
+            alle_par.update(f"{a}-{b}" for i, a in enumerate(partier) for b in partier[i+1:])
+        else:
+            alle_par.update(e for e in enheter if "-" in e)
+    
+    tellinger = {}
+    for partipar in sorted(alle_par):
+        enige, uenige = hent_aggregat(kube, partipar, granularitet, periode, sakstyper)
+        if enige + uenige > 0:
+            tellinger[partipar] = [enige, uenige]
+    
+    return tellinger
+
+
+def enighetsmatrise_fra_kube(kube, granularitet, periode, sakstyper=None):
+    """
+    Lager en enighetsmatrise for ett utsnitt av kuben.
+    
+    Gir samme tall som beregn_enighetsmatrise for tilsvarende voteringer.
+    
+    Returnerer dict: {parti_a: {parti_b: prosent, ...}, ...}
+    """
+    matrise = defaultdict(dict)
+    
+    for partipar, (enige, uenige) in partipar_tellinger(kube, granularitet, periode, sakstyper).items():
+        parti_a, parti_b = partipar.split("-")
+        prosent = round((enige / (enige + uenige)) * 100, 1)
+        matrise[parti_a][parti_b] = prosent
+        matrise[parti_b][parti_a] = prosent
+    
+    return dict(matrise)
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def oppdater_aggregatkube(data_mappe="../data", sesjoner=None):
+    """
+    Legger alle nye og endrede voteringer fra voteringsfilene til i
+    kuben og lagrer den.
+    
+    Sesjoner med samme sesjonssum i sjekksum-indeksen som i kuben
+    leses ikke (uten sjekksum-indeks: samme størrelse og endringstid
+    på voteringsfilen). Uten sesjoner tas alle voteringsfilene med, og
+    sesjoner som ikke lenger har voteringsfil fjernes fra kuben.
+    """
+    print("=" * 60)
+    print("🧊 OPPDATERER AGGREGATKUBE")
+    print("=" * 60)
+    
+    kube = les_kube(data_mappe)
+    totalt_nye = 0
+    
+    if sesjoner is None:
+        sesjoner = finn_sesjoner(data_mappe)
+        borte = sorted(set(kube["sesjoner"]) - set(sesjoner))
+    else:
+        borte = []
+    
+    for sesjon_id in borte:
+        for votering_id in list(kube["sesjoner"][sesjon_id]["voteringer"]):
+            _trekk_fra(kube, sesjon_id, votering_id)
+        del kube["sesjoner"][sesjon_id]
+        print(f"   {sesjon_id}: fjernet")
+    
+    for sesjon_id in sesjoner:
+        sjekksummer = les_sjekksummer(sesjon_id, data_mappe)
+        if sjekksummer is not None:
+            nokkel = sjekksummer["sesjon"]
+        else:
+            # Uten sjekksummer leses filen bare når den er endret
+            info = os.stat(finn_voteringsfil(sesjon_id, data_mappe))
+            nokkel = f"fil:{info.st_size}:{info.st_mtime_ns}"
+        
+        if kube["sesjoner"].get(sesjon_id, {}).get("sjekksum") == nokkel:
+            print(f"   {sesjon_id}: uendret")
+            continue
+        
+        nye = oppdater_kube(kube, strom_voteringer(sesjon_id, data_mappe), sesjon_id, sjekksummer)
+        kube["sesjoner"][sesjon_id]["sjekksum"] = nokkel
+        totalt_nye += nye
+        print(f"   {sesjon_id}: {nye} nye eller endrede voteringer")
+    
+    filsti = lagre_kube(kube, data_mappe)
+    
+    print(f"\n   ✓ {totalt_nye} nye voteringer lagt til")
+    print(f"   💾 Lagret til {filsti}")
+    
+    return kube
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    oppdater_aggregatkube()
@@ -14,7 +14,11 @@
 
 import json
 import os
-from collections import defaultdict
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from lagringsformat import er_kompakt, les_representanttabell, utvid_votering, utvid_voteringer
+from profilering import Kjoring, json_med_metadata
 
 # ============================================================
 # VOTERING-KODER
@@ -28,13 +32,16 @@ VOTERING_KODER = {
     5: "ikke_avgitt"
 }
 
+# Datoformatet fra API-et, f.eks. "/Date(1700000000000+0100)/"
+API_DATO = re.compile(r"/Date\((-?\d+)(?:([+-])(\d{2})(\d{2}))?\)/")
+
 # ============================================================
 # HJELPEFUNKSJONER
 # ============================================================
 
-def les_voteringer(sesjon_id, data_mappe="../data"):
+def finn_voteringsfil(sesjon_id, data_mappe="../data"):
     """
-    Leser voteringsdata fra JSON-fil.
+    Finner stien til voteringer_{sesjon_id}.json.
     """
     filsti = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
     
@@ -45,45 +52,205 @@ def les_voteringer(sesjon_id, data_mappe="../data"):
     if not os.path.exists(filsti):
         filsti = f"voteringer_{sesjon_id}.json"
     
+    return filsti
+
+
+def finn_sesjoner(data_mappe="../data"):
+    """Finner alle sesjoner som har en voteringer_*.json-fil, sortert."""
+    return sorted(
+        f[len("voteringer_"):-len(".json")]
+        for f in os.listdir(data_mappe)
+        if f.startswith("voteringer_") and f.endswith(".json")
+    )
+
+
+def les_voteringer(sesjon_id, data_mappe="../data"):
+    """
+    Leser voteringsdata fra JSON-fil.
+    
+    Kompakt lagrede stemmer (se lagringsformat.py) gjøres om til
+    vanlig form.
+    """
+    filsti = finn_voteringsfil(sesjon_id, data_mappe)
+    
     with open(filsti, "r", encoding="utf-8") as f:
-        return json.load(f)
+        data = json.load(f)
+    
+    voteringer = data.get("voteringer", []) if isinstance(data, dict) else data
+    utvid_voteringer(voteringer, filsti)
+    return data
 
 
-def beregn_partistandpunkt(stemmer):
+def strom_voteringer(sesjon_id, data_mappe="../data", blokkstorrelse=1 << 20):
     """
-    Beregner hvert partis standpunkt basert på individuelle stemmer.
+    Leser voteringer én og én fra voteringer_{sesjon_id}.json.
     
-    Returnerer dict: {parti_id: "for" eller "mot"}
+    Filen leses i blokker, så hele sesjonen trenger aldri ligge i minnet
+    samtidig. Nyttig for analyser som bare trenger ett pass over dataene.
+    Filer som ikke er en ren liste (f.eks. {"voteringer": [...]}) leses
+    på vanlig måte. Kompakte stemmer gjøres om til vanlig form etter
+    hvert som voteringene leses.
+    """
+    filsti = finn_voteringsfil(sesjon_id, data_mappe)
+    dekoder = json.JSONDecoder()
+    representanter = None
+    
+    with open(filsti, "r", encoding="utf-8") as f:
+        buffer = f.read(blokkstorrelse).lstrip()
+        
+        if not buffer.startswith("["):
+            data = json.loads(buffer + f.read())
+            voteringer = data.get("voteringer", []) if isinstance(data, dict) else data
+            yield from utvid_voteringer(voteringer, filsti)
+            return
+        
+        pos = 1
+        les_mer = blokkstorrelse
+        
+        while True:
+            # Hopp over mellomrom og komma mellom elementene
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            
+            if pos >= len(buffer):
+                mer = f.read(les_mer)
+                if not mer:
+                    return
+                buffer, pos = mer, 0
+                continue
+            
+            if buffer[pos] == "]":
+                return
+            
+            try:
+                votering, slutt = dekoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Elementet er ikke ferdig lest - hent mer og prøv igjen
+                mer = f.read(les_mer)
+                if not mer:
+                    raise
+                buffer, pos = buffer[pos:] + mer, 0
+                les_mer *= 2
+                continue
+            
+            if er_kompakt(votering):
+                if representanter is None:
+                    representanter = les_representanttabell(filsti)
+                utvid_votering(votering, representanter)
+            
+            yield votering
+            pos = slutt
+            les_mer = blokkstorrelse
+
+
+def normaliser_votering(votering):
+    """
+    Gjør om en stemme til tekstkode ("for", "mot", "ikke_tilstede", ...).
+    
+    API-et bruker tall (1-5), mens eldre filer kan ha tekst.
+    """
+    if isinstance(votering, int):
+        return VOTERING_KODER.get(votering, "ukjent")
+    if votering in VOTERING_KODER.values():
+        return votering
+    return "ukjent"
+
+
+def les_api_dato(verdi):
+    """
+    Gjør om en dato fra API-et til et datetime-objekt.
+    
+    Støtter både API-formatet "/Date(1700000000000+0100)/" og ISO-datoer.
+    Returnerer None hvis datoen mangler eller ikke kan tolkes.
+    """
+    if not verdi:
+        return None
+    
+    treff = API_DATO.match(verdi)
+    if treff:
+        # Tidspunktet er i UTC; legg til tidssonen API-et oppgir (lokal tid)
+        tidspunkt = datetime.fromtimestamp(int(treff.group(1)) / 1000, tz=timezone.utc)
+        if treff.group(2):
+            fortegn = 1 if treff.group(2) == "+" else -1
+            tidspunkt += fortegn * timedelta(hours=int(treff.group(3)), minutes=int(treff.group(4)))
+        return tidspunkt.replace(tzinfo=None)
+    
+    try:
+        return datetime.fromisoformat(verdi)
+    except ValueError:
+        return None
+
+
+def tell_partistemmer(stemmer):
+    """
+    Teller for/mot-stemmer per parti i én votering.
+    
+    Returnerer dict: {parti_id: {"for": antall, "mot": antall}}
+    Representanter uten parti-ID telles under nøkkelen None, slik at
+    totalene stemmer med salen, men de gir aldri et partistandpunkt.
     """
-    # Tell stemmer per parti
     partitelling = defaultdict(lambda: {"for": 0, "mot": 0})
     
     for stemme in stemmer:
         # Hent representantinfo
         rep = stemme.get("representant", {})
         parti_info = rep.get("parti", {})
-        parti_id = parti_info.get("id")
-        
-        if not parti_id:
-            continue
+        parti_id = parti_info.get("id") or None
         
         # Hent votering (kan være tall eller tekst)
-        votering = stemme.get("votering")
-        
-        # Konverter tall til tekst hvis nødvendig
-        if isinstance(votering, int):
-            votering = VOTERING_KODER.get(votering, "ukjent")
+        votering = normaliser_votering(stemme.get("votering"))
         
         # Tell for/mot
-        if votering == "for" or votering == 1:
+        if votering == "for":
             partitelling[parti_id]["for"] += 1
-        elif votering == "mot" or votering == 2:
+        elif votering == "mot":
             partitelling[parti_id]["mot"] += 1
     
-    # Bestem standpunkt for hvert parti
+    return partitelling
+
+
+def finn_avvikere(stemmer, partitelling):
+    """
+    Finner representantene som stemte mot sitt eget partis standpunkt.
+    
+    Stemmene gås bare gjennom hvis et parti faktisk delte seg, og da
+    bare for de delte partiene. Med vanlig partipisking er det sjelden.
+    
+    Returnerer liste med (parti_id, stemte, partiets_standpunkt, representant).
+    """
+    delte = {
+        parti_id: "for" if telling["for"] > telling["mot"] else "mot"
+        for parti_id, telling in partitelling.items()
+        if parti_id and telling["for"] and telling["mot"] and telling["for"] != telling["mot"]
+    }
+    if not delte:
+        return []
+    
+    avvikere = []
+    for stemme in stemmer:
+        rep = stemme.get("representant", {})
+        standpunkt = delte.get(rep.get("parti", {}).get("id"))
+        if standpunkt is None:
+            continue
+        
+        votering = normaliser_votering(stemme.get("votering"))
+        if votering in ("for", "mot") and votering != standpunkt:
+            avvikere.append((rep["parti"]["id"], votering, standpunkt, rep))
+    
+    return avvikere
+
+
+def standpunkt_fra_telling(partitelling):
+    """
+    Bestemmer partienes standpunkt ut fra en telling fra tell_partistemmer.
+    
+    Returnerer dict: {parti_id: "for" eller "mot"}
+    """
     partistandpunkt = {}
     
     for parti_id, telling in partitelling.items():
+        if not parti_id:
+            continue
         if telling["for"] > telling["mot"]:
             partistandpunkt[parti_id] = "for"
         elif telling["mot"] > telling["for"]:
@@ -93,7 +260,57 @@ def beregn_partistandpunkt(stemmer):
     return partistandpunkt
 
 
-def beregn_enighetsmatrise(voteringer):
+def beregn_partistandpunkt(stemmer):
+    """
+    Beregner hvert partis standpunkt basert på individuelle stemmer.
+    
+    Returnerer dict: {parti_id: "for" eller "mot"}
+    """
+    return standpunkt_fra_telling(tell_partistemmer(stemmer))
+
+
+def tell_alle_voteringer(voteringer, avvikere=None):
+    """
+    Teller partistemmer for alle voteringer i ett pass.
+    
+    Parametre:
+        avvikere: Valgfri liste som får avvikerne i hver votering (se
+                  finn_avvikere), funnet mens stemmene fortsatt er ferske
+    
+    Returnerer en liste med én partitelling per votering (i samme
+    rekkefølge), som kan gis videre til beregningsfunksjonene under slik
+    at stemmene bare gås gjennom én gang per analyse.
+    """
+    if avvikere is None:
+        return [tell_partistemmer(v.get("stemmer") or []) for v in voteringer]
+    
+    partitellinger = []
+    for votering in voteringer:
+        stemmer = votering.get("stemmer") or []
+        telling = tell_partistemmer(stemmer)
+        partitellinger.append(telling)
+        avvikere.append(finn_avvikere(stemmer, telling))
+    return partitellinger
+
+
+def _med_partitelling(voteringer, partitellinger=None):
+    """
+    Går gjennom voteringer med stemmedata sammen med partitellingen.
+    
+    Hvis partitellinger er gitt (fra tell_alle_voteringer), gjenbrukes de
+    i stedet for å telle stemmene på nytt.
+    """
+    for i, votering in enumerate(voteringer):
+        if not votering.get("stemmer"):
+            continue
+        
+        if partitellinger is not None:
+            yield votering, partitellinger[i]
+        else:
+            yield votering, tell_partistemmer(votering["stemmer"])
+
+
+def beregn_enighetsmatrise(voteringer, partitellinger=None):
     """
     Beregner enighetsmatrise mellom alle partier.
     
@@ -105,26 +322,18 @@ def beregn_enighetsmatrise(voteringer):
     partipar_telling = defaultdict(lambda: {"enige": 0, "uenige": 0})
     alle_partier = set()
     
-    for votering in voteringer:
-        stemmer = votering.get("stemmer", [])
-        
-        if not stemmer:
-            continue
-        
+    for votering, telling in _med_partitelling(voteringer, partitellinger):
         # Beregn partistandpunkt for denne voteringen
-        standpunkt = beregn_partistandpunkt(stemmer)
+        standpunkt = standpunkt_fra_telling(telling)
         
         # Legg til partier vi fant
         alle_partier.update(standpunkt.keys())
         
-        # Sammenlign alle partipar
-        partier = list(standpunkt.keys())
+        # Sammenlign alle partipar (sortert alfabetisk for konsistent nøkkel,
+        # så parti_a < parti_b uten å bytte om variablene i løkken)
+        partier = sorted(standpunkt.keys())
         for i, parti_a in enumerate(partier):
             for parti_b in partier[i+1:]:
-                # Sorter alfabetisk for konsistent nøkkel
-                if parti_a > parti_b:
-                    parti_a, parti_b = parti_b, parti_a
-                
                 nøkkel = (parti_a, parti_b)
                 
                 if standpunkt[parti_a] == standpunkt[parti_b]:
@@ -157,7 +366,7 @@ def beregn_enighetsmatrise(voteringer):
     return dict(matrise), partipar_liste
 
 
-def beregn_partistatistikk(voteringer):
+def beregn_partistatistikk(voteringer, partitellinger=None):
     """
     Beregner statistikk for hvert parti.
     """
@@ -168,12 +377,8 @@ def beregn_partistatistikk(voteringer):
         "pa_vinnersiden": 0
     })
     
-    for votering in voteringer:
-        stemmer = votering.get("stemmer", [])
-        if not stemmer:
-            continue
-        
-        standpunkt = beregn_partistandpunkt(stemmer)
+    for votering, telling in _med_partitelling(voteringer, partitellinger):
+        standpunkt = standpunkt_fra_telling(telling)
         
         # Finn flertallsstandpunkt
         antall_for = votering.get("antall_for", 0)
@@ -206,6 +411,195 @@ def beregn_partistatistikk(voteringer):
     return resultat
 
 
+def beregn_pivotanalyse(voteringer, partitellinger=None, antall_naermeste=10):
+    """
+    Finner hvilke partier som avgjorde utfallet av hver votering.
+    
+    Et parti er AVGJØRENDE (pivot) i en votering hvis utfallet hadde
+    snudd dersom partiets representanter på vinnersiden i stedet hadde
+    stemt med taperne. Er partiet det ENESTE avgjørende partiet, regnes
+    det som "tungen på vektskålen" (kingmaker).
+    
+    Utfallet regnes som i beregn_partistatistikk: vedtatt hvis det var
+    flere for-stemmer enn mot-stemmer, men basert på de individuelle
+    stemmene slik at det hypotetiske utfallet kan regnes ut per parti.
+    
+    Returnerer dictionary med:
+        - partier: {parti_id: {antall_voteringer, antall_avgjorende, ...}}
+        - naermeste_voteringer: de jevneste voteringene med avgjørende partier
+    """
+    partistat = defaultdict(lambda: {
+        "antall_voteringer": 0,
+        "antall_avgjorende": 0,
+        "antall_kingmaker": 0
+    })
+    avgjorte = []
+    
+    for votering, telling in _med_partitelling(voteringer, partitellinger):
+        standpunkt = standpunkt_fra_telling(telling)
+        
+        # Totalt antall for/mot i salen (inkludert representanter uten parti)
+        totalt_for = sum(t["for"] for t in telling.values())
+        totalt_mot = sum(t["mot"] for t in telling.values())
+        vinner = "for" if totalt_for > totalt_mot else "mot"
+        margin = abs(totalt_for - totalt_mot)
+        
+        # Et vedtak (for) snur når for ikke lenger er flest, mens et
+        # forkastet forslag (mot, inkludert likt) snur først når for blir flest.
+        avgjorende = []
+        for parti_id in standpunkt:
+            pa_vinnersiden = telling[parti_id][vinner]
+            if vinner == "for":
+                snur = 2 * pa_vinnersiden >= margin
+            else:
+                snur = 2 * pa_vinnersiden > margin
+            
+            partistat[parti_id]["antall_voteringer"] += 1
+            if snur:
+                partistat[parti_id]["antall_avgjorende"] += 1
+                avgjorende.append(parti_id)
+        
+        if len(avgjorende) == 1:
+            partistat[avgjorende[0]]["antall_kingmaker"] += 1
+        
+        if avgjorende:
+            avgjorte.append({
+                "votering_id": votering.get("votering_id"),
+                "votering_tema": votering.get("votering_tema", ""),
+                "dato": votering.get("dato", ""),
+                "utfall": vinner,
+                "margin": margin,
+                "avgjorende_partier": sorted(avgjorende)
+            })
+    
+    # Beregn prosenter
+    partier = {}
+    for parti_id, stat in partistat.items():
+        totalt = stat["antall_voteringer"]
+        partier[parti_id] = {
+            "antall_voteringer": totalt,
+            "antall_avgjorende": stat["antall_avgjorende"],
+            "antall_kingmaker": stat["antall_kingmaker"],
+            "avgjorende_prosent": round((stat["antall_avgjorende"] / totalt) * 100, 1) if totalt > 0 else 0,
+            "kingmaker_prosent": round((stat["antall_kingmaker"] / totalt) * 100, 1) if totalt > 0 else 0
+        }
+    
+    # De jevneste voteringene først
+    avgjorte.sort(key=lambda x: x["margin"])
+    
+    return {
+        "partier": partier,
+        "naermeste_voteringer": avgjorte[:antall_naermeste]
+    }
+
+
+def _navn(rep):
+    return f"{rep.get('fornavn', '')} {rep.get('etternavn', '')}".strip()
+
+
+def beregn_partisamhold(voteringer, partitellinger=None, avvikere=None, antall_mest_avvik=10):
+    """
+    Måler hvor samlet partiene stemte, og hvem som brøt med partiet.
+    
+    Rice-indeksen for et parti i én votering er |for - mot| / (for + mot):
+    1 når alle stemte likt, 0 når partiet delte seg på midten.
+    En representant er AVVIKER når partiet har et standpunkt (se
+    standpunkt_fra_telling) og representanten stemte motsatt.
+    
+    Bruker tellingene og avvikerne fra tell_alle_voteringer(voteringer,
+    avvikere), så stemmene ikke gås gjennom på nytt. Mangler de, telles
+    det her.
+    
+    Returnerer (sammendrag, detaljer):
+        sammendrag: {"partier": {parti_id: {rice_snitt, avvik_prosent, ...}},
+                     "antall_avvik", "mest_avvik": [...]}
+        detaljer: {"voteringer": [{votering_id, rice: {parti_id: indeks}}],
+                   "avvik": [én rad per avvikende stemme]}
+    """
+    if partitellinger is None or avvikere is None:
+        avvikere = []
+        partitellinger = tell_alle_voteringer(voteringer, avvikere)
+    
+    partistat = defaultdict(lambda: {
+        "rice_sum": 0.0,
+        "antall_voteringer": 0,
+        "antall_enstemmige": 0,
+        "antall_stemmer": 0,
+        "antall_avvik": 0
+    })
+    avvik_per_rep = Counter()
+    representanter = {}
+    per_votering = []
+    avvikslogg = []
+    
+    for i, votering in enumerate(voteringer):
+        if not votering.get("stemmer"):
+            continue
+        
+        rice = {}
+        for parti_id, telling in partitellinger[i].items():
+            antall_for, antall_mot = telling["for"], telling["mot"]
+            if not parti_id or antall_for + antall_mot == 0:
+                continue
+            
+            indeks = abs(antall_for - antall_mot) / (antall_for + antall_mot)
+            rice[parti_id] = round(indeks, 3)
+            
+            stat = partistat[parti_id]
+            stat["rice_sum"] += indeks
+            stat["antall_voteringer"] += 1
+            stat["antall_stemmer"] += antall_for + antall_mot
+            if indeks == 1:
+                stat["antall_enstemmige"] += 1
+        
+        for parti_id, stemte, standpunkt, rep in avvikere[i]:
+            rep_id = rep.get("id")
+            partistat[parti_id]["antall_avvik"] += 1
+            avvik_per_rep[rep_id] += 1
+            representanter[rep_id] = (rep, parti_id)
+            avvikslogg.append({
+                "votering_id": votering.get("votering_id"),
+                "sak_id": votering.get("sak_id"),
+                "dato": votering.get("dato", ""),
+                "representant_id": rep_id,
+                "navn": _navn(rep),
+                "parti_id": parti_id,
+                "stemte": stemte,
+                "partiets_standpunkt": standpunkt
+            })
+        
+        per_votering.append({"votering_id": votering.get("votering_id"), "rice": rice})
+    
+    partier = {}
+    for parti_id in sorted(partistat):
+        stat = partistat[parti_id]
+        partier[parti_id] = {
+            "rice_snitt": round(stat["rice_sum"] / stat["antall_voteringer"], 3),
+            "enstemmig_prosent": round(stat["antall_enstemmige"] / stat["antall_voteringer"] * 100, 1),
+            "antall_voteringer": stat["antall_voteringer"],
+            "antall_stemmer": stat["antall_stemmer"],
+            "antall_avvik": stat["antall_avvik"],
+            "avvik_prosent": round(stat["antall_avvik"] / stat["antall_stemmer"] * 100, 2)
+        }
+    
+    mest_avvik = []
+    for rep_id, antall in sorted(avvik_per_rep.items(), key=lambda x: (-x[1], str(x[0])))[:antall_mest_avvik]:
+        rep, parti_id = representanter[rep_id]
+        mest_avvik.append({
+            "representant_id": rep_id,
+            "navn": _navn(rep),
+            "parti_id": parti_id,
+            "antall_avvik": antall
+        })
+    
+    sammendrag = {
+        "partier": partier,
+        "antall_avvik": len(avvikslogg),
+        "mest_avvik": mest_avvik
+    }
+    return sammendrag, {"voteringer": per_votering, "avvik": avvikslogg}
+
+
 # ============================================================
 # HOVEDFUNKSJON
 # ============================================================
@@ -219,14 +613,23 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
         - mest_enige (topp 10)
         - minst_enige (bunn 10)
         - partistatistikk
+        - pivotanalyse (hvilke partier som avgjorde voteringene)
+        - partisamhold (Rice-indeks og avvikere, detaljer i samhold_{sesjon}.json)
+        - run_metadata (tid, antall og minne per steg, se profilering.py)
     """
+    with Kjoring(f"analyse_{sesjon_id}", data_mappe=data_mappe) as kjoring:
+        return _analyser_sesjon(sesjon_id, data_mappe, kjoring)
+
+
+def _analyser_sesjon(sesjon_id, data_mappe, kjoring):
     print("=" * 60)
     print(f"📊 ANALYSERER SESJON {sesjon_id}")
     print("=" * 60)
     
     # Les data
     try:
-        data = les_voteringer(sesjon_id, data_mappe)
+        with kjoring.steg("lesing"):
+            data = les_voteringer(sesjon_id, data_mappe)
     except FileNotFoundError:
         print(f"❌ Fant ikke voteringer_{sesjon_id}.json")
         return None
@@ -239,6 +642,7 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
         voteringer = data
     
     print(f"   📂 Lastet {len(voteringer)} voteringer")
+    kjoring.tell("voteringer", len(voteringer))
     
     # Filtrer ut voteringer uten stemmer
     voteringer_med_stemmer = [v for v in voteringer if v.get("stemmer")]
@@ -248,9 +652,19 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
         print("   ❌ Ingen voteringer med stemmedata!")
         return None
     
+    # Tell partistemmer én gang og gjenbruk tellingen i alle beregningene
+    # (avvikerne fra partilinjen finnes i samme pass)
+    antall = len(voteringer_med_stemmer)
+    kjoring.tell("voteringer_med_stemmer", antall)
+    avvikere = []
+    with kjoring.steg("standpunkt", antall):
+        partitellinger = tell_alle_voteringer(voteringer_med_stemmer, avvikere)
+    kjoring.tell("stemmer", sum(len(v["stemmer"]) for v in voteringer_med_stemmer))
+    
     # Beregn enighetsmatrise
     print("   🔍 Beregner partienighet...")
-    matrise, partipar_liste = beregn_enighetsmatrise(voteringer_med_stemmer)
+    with kjoring.steg("matrise", antall):
+        matrise, partipar_liste = beregn_enighetsmatrise(voteringer_med_stemmer, partitellinger)
     
     # Sorter partipar
     partipar_liste.sort(key=lambda x: x["enighet_prosent"], reverse=True)
@@ -260,7 +674,19 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
     
     # Beregn partistatistikk
     print("   📈 Beregner partistatistikk...")
-    partistatistikk = beregn_partistatistikk(voteringer_med_stemmer)
+    with kjoring.steg("statistikk", antall):
+        partistatistikk = beregn_partistatistikk(voteringer_med_stemmer, partitellinger)
+    
+    # Beregn hvilke partier som avgjorde voteringene
+    print("   ⚖️  Beregner avgjørende partier...")
+    with kjoring.steg("pivot", antall):
+        pivotanalyse = beregn_pivotanalyse(voteringer_med_stemmer, partitellinger)
+    
+    # Beregn partisamhold og avvikere
+    print("   🧲 Beregner partisamhold...")
+    with kjoring.steg("samhold", antall):
+        partisamhold, samhold_detaljer = beregn_partisamhold(voteringer_med_stemmer, partitellinger, avvikere)
+    kjoring.tell("avvik", partisamhold["antall_avvik"])
     
     # Lag resultat
     resultat = {
@@ -271,6 +697,8 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
         "mest_enige": mest_enige,
         "minst_enige": minst_enige,
         "partistatistikk": partistatistikk,
+        "pivotanalyse": pivotanalyse,
+        "partisamhold": partisamhold,
         "alle_partipar": partipar_liste
     }
     
@@ -281,11 +709,20 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
     
     output_fil = os.path.join(output_mappe, f"analyse_{sesjon_id}.json")
     
+    # run_metadata legges til under lagringen (og tar med den)
+    tekst = json_med_metadata(resultat, kjoring, ensure_ascii=False, indent=2)
     with open(output_fil, "w", encoding="utf-8") as f:
-        json.dump(resultat, f, ensure_ascii=False, indent=2)
+        f.write(tekst)
     
     print(f"   💾 Lagret til {output_fil}")
     
+    # Samhold per votering og alle avvik (for stort for analysefilen)
+    samhold_fil = os.path.join(output_mappe, f"samhold_{sesjon_id}.json")
+    with kjoring.steg("lagring"):
+        with open(samhold_fil, "w", encoding="utf-8") as f:
+            json.dump({"sesjon_id": sesjon_id, **samhold_detaljer}, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"   💾 Lagret til {samhold_fil}")
+    
     # Vis sammendrag
     print("\n" + "=" * 60)
     print("📋 SAMMENDRAG")
@@ -303,6 +740,21 @@ def analyser_sesjon(sesjon_id, data_mappe="../data"):
         for par in minst_enige[:5]:
             print(f"   {par['parti_a']}-{par['parti_b']}: {par['enighet_prosent']}% ({par['antall_totalt']} voteringer)")
     
+    kingmakere = sorted(
+        pivotanalyse["partier"].items(),
+        key=lambda x: x[1]["antall_kingmaker"],
+        reverse=True
+    )
+    if kingmakere and kingmakere[0][1]["antall_kingmaker"] > 0:
+        print(f"\n⚖️  TUNGEN PÅ VEKTSKÅLEN:")
+        for parti_id, stat in kingmakere[:3]:
+            print(f"   {parti_id}: {stat['antall_kingmaker']} voteringer ({stat['kingmaker_prosent']}%)")
+    
+    if partisamhold["partier"]:
+        print(f"\n🧲 PARTISAMHOLD (Rice-indeks, {partisamhold['antall_avvik']} avvikende stemmer):")
+        for parti_id, stat in sorted(partisamhold["partier"].items(), key=lambda x: x[1]["rice_snitt"])[:5]:
+            print(f"   {parti_id}: {stat['rice_snitt']:.3f} ({stat['antall_avvik']} avvik, {stat['avvik_prosent']}%)")
+    
     print("\n" + "=" * 60)
     print("✅ ANALYSE FULLFØRT!")
     print("=" * 60)
@@ -0,0 +1,250 @@
+# ============================================================
+# STORTINGSVOTERING - DELTAKELSE OG FRAVÆR
+# ============================================================
+# Dette scriptet måler hvor ofte representantene faktisk
+# stemmer. Partistandpunktet bygger bare på for/mot-stemmer,
+# så høyt fravær kan gi skjev statistikk (se METODIKK.md).
+# Her tallfester vi fraværet.
+#
+# Måles per representant, per parti, per måned og per sesjon:
+#   - oppmøte:      andel voteringer representanten var til stede
+#   - fravær:       kode 3 (ikke tilstede)
+#   - avstår:       kode 4
+#   - ikke avgitt:  kode 5 (til stede, men stemte ikke)
+# ============================================================
+
+import json
+import os
+from collections import defaultdict
+
+from analyser_data_v2 import les_api_dato, normaliser_votering, strom_voteringer
+from representantregister import lag_partiindeks, les_representantregister, parti_ved_dato
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+# Rekkefølgen på tellingene i den kompakte utdatafilen
+STEMMEKOLONNER = ["for", "mot", "ikke_tilstede", "avstar", "ikke_avgitt"]
+KOLONNE_INDEKS = {kode: i for i, kode in enumerate(STEMMEKOLONNER)}
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def ny_telling():
+    """Tom telling med én plass per stemmekode."""
+    return [0] * len(STEMMEKOLONNER)
+
+
+def beregn_rater(telling):
+    """
+    Regner om en telling til prosenter.
+    
+    Oppmøte er alle stemmer unntatt "ikke tilstede". Stemmer med
+    ukjent kode er ikke med i tellingen.
+    """
+    totalt = sum(telling)
+    if totalt == 0:
+        return {
+            "antall_voteringer": 0,
+            "oppmote_prosent": 0,
+            "fravaer_prosent": 0,
+            "avstar_prosent": 0,
+            "ikke_avgitt_prosent": 0
+        }
+    
+    def prosent(antall):
+        return round((antall / totalt) * 100, 1)
+    
+    fravaer = telling[KOLONNE_INDEKS["ikke_tilstede"]]
+    
+    return {
+        "antall_voteringer": totalt,
+        "oppmote_prosent": prosent(totalt - fravaer),
+        "fravaer_prosent": prosent(fravaer),
+        "avstar_prosent": prosent(telling[KOLONNE_INDEKS["avstar"]]),
+        "ikke_avgitt_prosent": prosent(telling[KOLONNE_INDEKS["ikke_avgitt"]])
+    }
+
+
+# ============================================================
+# BEREGNING
+# ============================================================
+
+def beregn_deltakelse(voteringer, partiindeks=None):
+    """
+    Teller stemmekoder per representant, parti og måned i ett pass.
+    
+    voteringer kan være en liste eller en generator (f.eks. fra
+    strom_voteringer), slik at hele sesjonen ikke må ligge i minnet.
+    
+    Hver stemme telles på partiet representanten hadde i den
+    voteringen, også for representanter som bytter parti i løpet av
+    sesjonen.
+    
+    Parametre:
+        partiindeks: Oppslag fra representantregisteret (lag_partiindeks),
+                     brukt for stemmer som mangler parti
+    
+    Returnerer dictionary med:
+        - representanter: {rep_id: {navn, fylke, partier: {parti_id: telling}}}
+        - partier: {parti_id: telling}
+        - maaneder: {"ÅÅÅÅ-MM": {parti_id: telling}}
+        - sesjon: telling for hele sesjonen
+        - antall_voteringer
+    """
+    representanter = {}
+    partier = defaultdict(ny_telling)
+    maaneder = defaultdict(lambda: defaultdict(ny_telling))
+    sesjon = ny_telling()
+    antall_voteringer = 0
+    
+    for votering in voteringer:
+        stemmer = votering.get("stemmer")
+        if not stemmer:
+            continue
+        
+        antall_voteringer += 1
+        dato = les_api_dato(votering.get("dato", ""))
+        maaned = dato.strftime("%Y-%m") if dato else "ukjent"
+        dag = dato.strftime("%Y-%m-%d") if dato else None
+        
+        for stemme in stemmer:
+            indeks = KOLONNE_INDEKS.get(normaliser_votering(stemme.get("votering")))
+            if indeks is None:
+                continue
+            
+            rep = stemme.get("representant", {})
+            rep_id = rep.get("id")
+            parti_id = rep.get("parti", {}).get("id")
+            if not parti_id and partiindeks and rep_id and dag:
+                parti_id = parti_ved_dato(partiindeks, rep_id, dag)
+            parti_id = parti_id or "Ukjent"
+            
+            if rep_id:
+                info = representanter.get(rep_id)
+                if info is None:
+                    info = representanter[rep_id] = {
+                        "navn": f"{rep.get('fornavn', '')} {rep.get('etternavn', '')}".strip(),
+                        "fylke": rep.get("fylke", {}).get("id"),
+                        "partier": {}
+                    }
+                if parti_id not in info["partier"]:
+                    info["partier"][parti_id] = ny_telling()
+                info["partier"][parti_id][indeks] += 1
+            
+            partier[parti_id][indeks] += 1
+            maaneder[maaned][parti_id][indeks] += 1
+            sesjon[indeks] += 1
+    
+    return {
+        "representanter": representanter,
+        "partier": dict(partier),
+        "maaneder": {m: dict(p) for m, p in maaneder.items()},
+        "sesjon": sesjon,
+        "antall_voteringer": antall_voteringer
+    }
+
+
+def lag_kompakt_resultat(sesjon_id, deltakelse):
+    """
+    Gjør tellingene om til et kompakt format for frontend.
+    
+    Representantene lagres som rader (lister) med felles kolonnenavn i
+    stedet for én dictionary per representant. En representant som har
+    byttet parti får én rad per parti (i den rekkefølgen partiene ble
+    brukt), så radene kan summeres per parti.
+    """
+    rep_kolonner = ["id", "navn", "parti", "fylke"] + STEMMEKOLONNER + ["oppmote_prosent"]
+    rader = []
+    
+    for rep_id, info in sorted(deltakelse["representanter"].items()):
+        for parti_id, telling in info["partier"].items():
+            rader.append(
+                [rep_id, info["navn"], parti_id, info["fylke"]]
+                + telling
+                + [beregn_rater(telling)["oppmote_prosent"]]
+            )
+    
+    return {
+        "sesjon_id": sesjon_id,
+        "antall_voteringer": deltakelse["antall_voteringer"],
+        "kolonner": STEMMEKOLONNER,
+        "sesjon": dict(beregn_rater(deltakelse["sesjon"]), telling=deltakelse["sesjon"]),
+        "partier": {
+            parti_id: dict(beregn_rater(telling), telling=telling)
+            for parti_id, telling in sorted(deltakelse["partier"].items())
+        },
+        "maaneder": {
+            maaned: {
+                parti_id: dict(beregn_rater(telling), telling=telling)
+                for parti_id, telling in sorted(partier.items())
+            }
+            for maaned, partier in sorted(deltakelse["maaneder"].items())
+        },
+        "representanter": {
+            "kolonner": rep_kolonner,
+            "rader": rader
+        }
+    }
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def analyser_deltakelse(sesjon_id, data_mappe="../data"):
+    """
+    Beregner oppmøte, avståelser og ikke-avgitte stemmer for en sesjon.
+    
+    Leser voteringsfilen fortløpende og lagrer resultatet kompakt
+    (uten innrykk) til deltakelse_{sesjon_id}.json. Stemmer uten parti
+    slås opp i representantregisteret hvis det finnes.
+    """
+    print("=" * 60)
+    print(f"🙋 ANALYSERER DELTAKELSE FOR SESJON {sesjon_id}")
+    print("=" * 60)
+    
+    try:
+        partiindeks = lag_partiindeks(les_representantregister(data_mappe))
+    except FileNotFoundError:
+        partiindeks = None
+    
+    try:
+        deltakelse = beregn_deltakelse(strom_voteringer(sesjon_id, data_mappe), partiindeks)
+    except FileNotFoundError:
+        print(f"❌ Fant ikke voteringer_{sesjon_id}.json")
+        return None
+    
+    if deltakelse["antall_voteringer"] == 0:
+        print("   ❌ Ingen voteringer med stemmedata!")
+        return None
+    
+    resultat = lag_kompakt_resultat(sesjon_id, deltakelse)
+    
+    output_fil = os.path.join(data_mappe, f"deltakelse_{sesjon_id}.json")
+    with open(output_fil, "w", encoding="utf-8") as f:
+        json.dump(resultat, f, ensure_ascii=False, separators=(",", ":"))
+    
+    print(f"   ✓ {resultat['antall_voteringer']} voteringer, {len(deltakelse['representanter'])} representanter")
+    print(f"   💾 Lagret til {output_fil}")
+    
+    # Vis sammendrag
+    print(f"\n📋 Oppmøte per parti:")
+    for parti_id, rater in sorted(resultat["partier"].items(), key=lambda x: x[1]["oppmote_prosent"]):
+        print(f"   {parti_id:<8} {rater['oppmote_prosent']:>5}% oppmøte, "
+              f"{rater['avstar_prosent']}% avstår, {rater['ikke_avgitt_prosent']}% ikke avgitt")
+    
+    return resultat
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    sesjon = sys.argv[1] if len(sys.argv) > 1 else "2023-2024"
+    analyser_deltakelse(sesjon)
@@ -10,74 +10,271 @@
 # - Trender i norsk politikk
 # ============================================================
 
+import hashlib
 import json
 import os
 from collections import defaultdict
-from analyser_data import analyser_sesjon
+from datetime import datetime
+from aggregatkube import les_kube, partipar_tellinger
+from analyser_data_v2 import analyser_sesjon
+from eksporter_frontend import eksporter_frontend
+from profilering import Kjoring, json_med_metadata
+from sjekksummer import les_sjekksummer
 
 # ============================================================
-# HOVEDFUNKSJON
+# KONFIGURASJON
+# ============================================================
+
+# Lager med ferdige delresultater per sesjon, slik at bare sesjoner
+# med endrede voteringsfiler må analyseres på nytt
+DELRESULTAT_FIL = "tidsserie_delresultater.json"
+DELRESULTAT_VERSJON = 2
+
+# Endres koden som lager delresultatene, lages de på nytt
+DELRESULTAT_KODE = ["analyser_data_v2.py", "analyser_tidsserie.py"]
+
+# ============================================================
+# DELRESULTATER PER SESJON
 # ============================================================
 
-def analyser_alle_sesjoner(data_mappe="../data"):
+def finn_voteringsfiler(data_mappe="../data"):
     """
-    Analyserer alle sesjoner og lager en tidsserie.
+    Finner alle votering-filer.
     
-    Forventer at du allerede har hentet data med hent_alle_sesjoner.py
+    Returnerer dict: {sesjon_id: filsti}, sortert på sesjon.
+    """
+    filer = sorted(
+        f for f in os.listdir(data_mappe)
+        if f.startswith("voteringer_") and f.endswith(".json")
+    )
     
-    Returnerer:
-        Dictionary med:
-        - tidsserie: Enighet per partipar per sesjon
-        - gjennomsnitt: Gjennomsnittlig enighet per partipar
+    # Hent sesjon-ID fra filnavnet (f.eks. "voteringer_2023-2024.json")
+    return {
+        f.replace("voteringer_", "").replace(".json", ""): os.path.join(data_mappe, f)
+        for f in filer
+    }
+
+
+def _sha256(filsti):
+    """sha256 av en fil, eller None hvis den ikke finnes."""
+    try:
+        with open(filsti, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def kodeavtrykk():
+    """En samlet hash av koden som lager delresultatene (DELRESULTAT_KODE)."""
+    mappe = os.path.dirname(os.path.abspath(__file__))
+    return hashlib.sha256(
+        "".join(_sha256(os.path.join(mappe, modul)) or "" for modul in DELRESULTAT_KODE).encode("utf-8")
+    ).hexdigest()
+
+
+def fingeravtrykk(filsti, analyse_fil=None, kode=None):
     """
-    print("="*60)
-    print("📈 ANALYSERER PARTIENIGHET OVER TID")
-    print("="*60)
+    Et billig fingeravtrykk av en fil (størrelse og endringstid).
     
-    # Finn alle votering-filer
-    filer = sorted([
-        f for f in os.listdir(data_mappe) 
-        if f.startswith("voteringer_") and f.endswith(".json")
-    ])
+    Endres fingeravtrykket, analyseres sesjonen på nytt.
     
-    if not filer:
-        print("❌ Fant ingen votering-filer!")
-        print(f"   Kjør først: python hent_alle_sesjoner.py")
+    Parametre:
+        analyse_fil: Ta med sha256 av analyse_{sesjon}.json (når
+                     delresultatet lages fra den ferdige analysen)
+        kode: Hash av analysekoden (se kodeavtrykk)
+    """
+    status = os.stat(filsti)
+    avtrykk = {"storrelse": status.st_size, "endret_ns": status.st_mtime_ns, "kode": kode}
+    if analyse_fil is not None:
+        avtrykk["analyse"] = _sha256(analyse_fil)
+    return avtrykk
+
+
+def lag_delresultat(analyse, avtrykk):
+    """
+    Trekker ut det tidsserien trenger fra en sesjonsanalyse.
+    
+    Partiparene lagres som rå tellinger [enige, uenige], slik at
+    prosentene kan regnes ut på nytt (og slås sammen) uten å lese
+    voteringsfilen igjen. Partisamholdet lagres som
+    [rice_snitt, antall_voteringer, antall_avvik, antall_stemmer].
+    """
+    return {
+        "fingeravtrykk": avtrykk,
+        "antall_voteringer": analyse["antall_voteringer"],
+        "partipar": {
+            f"{par['parti_a']}-{par['parti_b']}": [par["antall_enige"], par["antall_uenige"]]
+            for par in analyse.get("alle_partipar", [])
+        },
+        "mest_enige": analyse.get("mest_enige", [])[:3],
+        "minst_enige": analyse.get("minst_enige", [])[:3],
+        "pivotanalyse": analyse.get("pivotanalyse", {}).get("partier", {}),
+        "samhold": {
+            parti_id: [stat["rice_snitt"], stat["antall_voteringer"], stat["antall_avvik"], stat["antall_stemmer"]]
+            for parti_id, stat in analyse.get("partisamhold", {}).get("partier", {}).items()
+        }
+    }
+
+
+def les_delresultater(data_mappe="../data"):
+    """Leser lagrede delresultater. Returnerer {} hvis lageret mangler eller er utdatert."""
+    filsti = os.path.join(data_mappe, DELRESULTAT_FIL)
+    
+    try:
+        with open(filsti, "r", encoding="utf-8") as f:
+            lager = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    
+    if lager.get("versjon") != DELRESULTAT_VERSJON:
+        return {}
+    
+    return lager.get("sesjoner", {})
+
+
+def lagre_delresultater(delresultater, data_mappe="../data"):
+    """Lagrer delresultatene kompakt."""
+    filsti = os.path.join(data_mappe, DELRESULTAT_FIL)
+    
+    with open(filsti, "w", encoding="utf-8") as f:
+        json.dump(
+            {"versjon": DELRESULTAT_VERSJON, "sesjoner": delresultater},
+            f, ensure_ascii=False, separators=(",", ":")
+        )
+
+
+def _les_analyse(sesjon_id, data_mappe):
+    try:
+        with open(os.path.join(data_mappe, f"analyse_{sesjon_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
         return None
+
+
+def oppdater_delresultater(data_mappe="../data", tving=False, les_analyser=False):
+    """
+    Analyserer bare sesjonene som er nye eller har endret seg.
+    
+    Parametre:
+        tving: Analyser alle sesjoner på nytt uansett
+        les_analyser: Bruk analyse_{sesjon}.json hvis den finnes, i stedet
+                      for å analysere på nytt (orkestrering.py sørger
+                      for at filene er oppdatert)
     
-    print(f"\n📂 Fant {len(filer)} sesjoner å analysere")
+    Returnerer:
+        (delresultater, liste med sesjoner som ble analysert på nytt)
+    """
+    filer = finn_voteringsfiler(data_mappe)
+    delresultater = {} if tving else les_delresultater(data_mappe)
     
-    # Analyser hver sesjon
-    alle_analyser = {}
+    # Fjern sesjoner der voteringsfilen er borte
+    for sesjon_id in list(delresultater):
+        if sesjon_id not in filer:
+            del delresultater[sesjon_id]
     
-    for fil in filer:
-        # Hent sesjon-ID fra filnavnet (f.eks. "voteringer_2023-2024.json")
-        sesjon_id = fil.replace("voteringer_", "").replace(".json", "")
+    oppdaterte = []
+    kode = kodeavtrykk()
+    
+    for sesjon_id, filsti in filer.items():
+        analyse_fil = os.path.join(data_mappe, f"analyse_{sesjon_id}.json") if les_analyser else None
+        avtrykk = fingeravtrykk(filsti, analyse_fil, kode)
+        
+        if delresultater.get(sesjon_id, {}).get("fingeravtrykk") == avtrykk:
+            continue
         
-        print(f"\n   Analyserer {sesjon_id}...")
+        analyse = _les_analyse(sesjon_id, data_mappe) if les_analyser else None
         
         try:
-            analyse = analyser_sesjon(sesjon_id, data_mappe=data_mappe)
-            alle_analyser[sesjon_id] = analyse
-            print(f"   ✓ {analyse['antall_voteringer']} voteringer")
+            if analyse is None:
+                print(f"\n   Analyserer {sesjon_id}...")
+                analyse = analyser_sesjon(sesjon_id, data_mappe=data_mappe)
         except Exception as e:
             print(f"   ⚠️  Feil: {e}")
+            delresultater.pop(sesjon_id, None)
+            continue
+        
+        if not analyse:
+            delresultater.pop(sesjon_id, None)
+            continue
+        
+        if les_analyser:
+            # analyser_sesjon kan ha skrevet analysefilen på nytt
+            avtrykk = fingeravtrykk(filsti, analyse_fil, kode)
+        delresultater[sesjon_id] = lag_delresultat(analyse, avtrykk)
+        oppdaterte.append(sesjon_id)
+        print(f"   ✓ {analyse['antall_voteringer']} voteringer")
     
-    # Bygg tidsserie for hvert partipar
-    print("\n📊 Bygger tidsserie...")
+    lagre_delresultater(delresultater, data_mappe)
+    
+    return delresultater, oppdaterte
+
+
+def partipar_fra_kube(delresultater, data_mappe="../data"):
+    """
+    Slår opp partiparene per sesjon i aggregatkuben (se aggregatkube.py).
+    
+    Brukes for sesjonene der kuben er oppdatert (samme sesjonssum som
+    i sjekksum-indeksen). De andre beholder tellingene fra analysen.
+    
+    Returnerer listen med sesjoner som ble slått opp i kuben.
+    """
+    kube = les_kube(data_mappe)
+    slatt_opp = []
+    
+    for sesjon_id, delresultat in delresultater.items():
+        sjekksummer = les_sjekksummer(sesjon_id, data_mappe)
+        i_kuben = kube["sesjoner"].get(sesjon_id)
+        if sjekksummer is None or i_kuben is None or i_kuben["sjekksum"] != sjekksummer["sesjon"]:
+            continue
+        
+        delresultat["partipar"] = partipar_tellinger(kube, "sesjon", sesjon_id)
+        slatt_opp.append(sesjon_id)
+    
+    return slatt_opp
+
+
+def kombiner_delresultater(delresultater):
+    """
+    Bygger tidsserien fra delresultatene for alle sesjoner.
     
+    Returnerer samme struktur som lagres i analyse_tidsserie.json.
+    """
     tidsserie = defaultdict(dict)
-    alle_partipar = set()
+    samlet_telling = defaultdict(lambda: [0, 0])
+    pivottidsserie = defaultdict(dict)
+    samholdtidsserie = defaultdict(dict)
+    samlet_samhold = defaultdict(lambda: [0.0, 0, 0, 0])
     
-    for sesjon_id, analyse in alle_analyser.items():
-        enighetsmatrise = analyse.get("enighetsmatrise", {})
+    for sesjon_id in sorted(delresultater):
+        delresultat = delresultater[sesjon_id]
+        
+        for partipar, (enige, uenige) in delresultat["partipar"].items():
+            totalt = enige + uenige
+            if totalt > 0:
+                tidsserie[partipar][sesjon_id] = round((enige / totalt) * 100, 1)
+            samlet_telling[partipar][0] += enige
+            samlet_telling[partipar][1] += uenige
         
-        for parti_a, partnere in enighetsmatrise.items():
-            for parti_b, prosent in partnere.items():
-                if parti_a < parti_b:  # Unngå duplikater
-                    partipar = f"{parti_a}-{parti_b}"
-                    tidsserie[partipar][sesjon_id] = prosent
-                    alle_partipar.add(partipar)
+        # Tidsserie for avgjørende partier (pivotanalyse)
+        for parti_id, stat in delresultat["pivotanalyse"].items():
+            pivottidsserie[parti_id][sesjon_id] = {
+                "avgjorende_prosent": stat["avgjorende_prosent"],
+                "kingmaker_prosent": stat["kingmaker_prosent"],
+                "antall_voteringer": stat["antall_voteringer"]
+            }
+        
+        # Tidsserie for partisamhold (Rice-indeks og avvik)
+        for parti_id, (rice, antall, avvik, stemmer) in delresultat.get("samhold", {}).items():
+            samholdtidsserie[parti_id][sesjon_id] = {
+                "rice_snitt": rice,
+                "avvik_prosent": round(avvik / stemmer * 100, 2) if stemmer else 0,
+                "antall_voteringer": antall
+            }
+            samlet = samlet_samhold[parti_id]
+            samlet[0] += rice * antall
+            samlet[1] += antall
+            samlet[2] += avvik
+            samlet[3] += stemmer
     
     # Beregn gjennomsnitt per partipar
     gjennomsnitt = {}
@@ -85,7 +282,42 @@ def analyser_alle_sesjoner(data_mappe="../data"):
         verdier = list(sesjoner.values())
         gjennomsnitt[partipar] = round(sum(verdier) / len(verdier), 1)
     
-    # Finn interessante trender
+    # Samlet enighet over alle voteringer (vektet etter antall voteringer)
+    samlet_enighet = {
+        partipar: round((enige / (enige + uenige)) * 100, 1)
+        for partipar, (enige, uenige) in samlet_telling.items()
+        if enige + uenige > 0
+    }
+    
+    return {
+        "analysert_dato": datetime.now().isoformat(),
+        "antall_sesjoner": len(delresultater),
+        "tidsserie": dict(tidsserie),
+        "gjennomsnitt": gjennomsnitt,
+        "samlet_enighet": samlet_enighet,
+        "pivottidsserie": dict(pivottidsserie),
+        "samholdtidsserie": dict(samholdtidsserie),
+        "samlet_samhold": {
+            parti_id: {
+                "rice_snitt": round(rice_sum / antall, 3),
+                "avvik_prosent": round(avvik / stemmer * 100, 2) if stemmer else 0
+            }
+            for parti_id, (rice_sum, antall, avvik, stemmer) in sorted(samlet_samhold.items())
+            if antall
+        },
+        "sesjonsanalyser": {
+            sesjon: {
+                "antall_voteringer": d["antall_voteringer"],
+                "mest_enige": d["mest_enige"],
+                "minst_enige": d["minst_enige"]
+            }
+            for sesjon, d in sorted(delresultater.items())
+        }
+    }
+
+
+def vis_trender(tidsserie, gjennomsnitt):
+    """Skriver ut de mest interessante trendene i tidsserien."""
     print("\n🔍 Interessante funn:")
     print("-" * 50)
     
@@ -122,48 +354,101 @@ def analyser_alle_sesjoner(data_mappe="../data"):
     print("\n   🎯 Mest stabile samarbeid:")
     for partipar, var, snitt in stabile[:3]:
         print(f"      {partipar}: {snitt:.0f}% (±{var/2:.0f}%)")
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def analyser_alle_sesjoner(data_mappe="../data", tving=False, les_analyser=False):
+    """
+    Analyserer alle sesjoner og lager en tidsserie.
     
-    # Lagre resultater
-    resultat = {
-        "analysert_dato": datetime.now().isoformat() if 'datetime' in dir() else None,
-        "antall_sesjoner": len(alle_analyser),
-        "tidsserie": dict(tidsserie),
-        "gjennomsnitt": gjennomsnitt,
-        "sesjonsanalyser": {
-            sesjon: {
-                "antall_voteringer": a["antall_voteringer"],
-                "mest_enige": a.get("mest_enige", [])[:3],
-                "minst_enige": a.get("minst_enige", [])[:3]
-            }
-            for sesjon, a in alle_analyser.items()
-        }
-    }
+    Forventer at du allerede har hentet data med hent_alle_sesjoner.py
+    
+    Bare sesjoner med ny eller endret voteringsfil analyseres på nytt.
+    De andre hentes fra lagrede delresultater (tidsserie_delresultater.json).
+    
+    Parametre:
+        tving: Analyser alle sesjoner på nytt uansett
+        les_analyser: Bruk ferdige analyse_{sesjon}.json (se oppdater_delresultater)
+    
+    Returnerer:
+        Dictionary med:
+        - tidsserie: Enighet per partipar per sesjon
+        - gjennomsnitt: Gjennomsnittlig enighet per partipar
+        - samlet_enighet: Enighet over alle voteringer samlet
+        - pivottidsserie: Avgjørende/kingmaker-andel per parti per sesjon
+        - samholdtidsserie: Rice-indeks og andel avvik per parti per sesjon
+        - run_metadata: Tid, antall og minne per steg (se profilering.py)
+    """
+    with Kjoring("tidsserie", data_mappe=data_mappe) as kjoring:
+        return _analyser_alle_sesjoner(data_mappe, tving, les_analyser, kjoring)
+
+
+def _analyser_alle_sesjoner(data_mappe, tving, les_analyser, kjoring):
+    print("="*60)
+    print("📈 ANALYSERER PARTIENIGHET OVER TID")
+    print("="*60)
+    
+    # Finn alle votering-filer
+    if not finn_voteringsfiler(data_mappe):
+        print("❌ Fant ingen votering-filer!")
+        print(f"   Kjør først: python hent_alle_sesjoner.py")
+        return None
+    
+    with kjoring.steg("delresultater") as steg:
+        delresultater, oppdaterte = oppdater_delresultater(data_mappe, tving=tving, les_analyser=les_analyser)
+        steg["antall"] = len(oppdaterte)
+    kjoring.tell("sesjoner", len(delresultater))
+    kjoring.tell("analysert_paa_nytt", len(oppdaterte))
+    
+    print(f"\n📂 {len(delresultater)} sesjoner, {len(oppdaterte)} analysert på nytt")
+    
+    # Partiparene slås opp i aggregatkuben der den er oppdatert
+    with kjoring.steg("aggregatkube") as steg:
+        fra_kube = partipar_fra_kube(delresultater, data_mappe)
+        steg["antall"] = len(fra_kube)
+    print(f"   🧊 {len(fra_kube)} sesjoner slått opp i aggregatkuben")
+    
+    # Bygg tidsserie for hvert partipar
+    print("\n📊 Bygger tidsserie...")
+    with kjoring.steg("kombiner", len(delresultater)):
+        resultat = kombiner_delresultater(delresultater)
+    
+    vis_trender(resultat["tidsserie"], resultat["gjennomsnitt"])
     
     # Lagre til fil
     output_fil = f"{data_mappe}/analyse_tidsserie.json"
+    tekst = json_med_metadata(resultat, kjoring, ensure_ascii=False, indent=2)
     with open(output_fil, "w", encoding="utf-8") as f:
-        json.dump(resultat, f, ensure_ascii=False, indent=2)
+        f.write(tekst)
     
     print(f"\n💾 Resultat lagret til {output_fil}")
     
     return resultat
 
 
-def lag_tidsserie_for_frontend(data_mappe="../data"):
+def lag_tidsserie_for_frontend(data_mappe="../data", data=None):
     """
     Lager en forenklet tidsserie-fil optimalisert for frontend.
     
     Formatet er enkelt å bruke i React/JavaScript.
+    
+    Parametre:
+        data: Ferdig resultat fra analyser_alle_sesjoner (leses fra
+              analyse_tidsserie.json hvis det ikke er gitt)
     """
     print("\n📦 Lager frontend-data...")
     
     # Les analyse_tidsserie.json
-    try:
-        with open(f"{data_mappe}/analyse_tidsserie.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print("   Kjører full analyse først...")
-        data = analyser_alle_sesjoner(data_mappe)
+    if data is None:
+        try:
+            with open(f"{data_mappe}/analyse_tidsserie.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print("   Bygger tidsserien først...")
+            data = analyser_alle_sesjoner(data_mappe)
     
     if not data:
         return None
@@ -221,13 +506,28 @@ def lag_tidsserie_for_frontend(data_mappe="../data"):
     return frontend_data
 
 
+def oppdater_tidsserie(data_mappe="../data", tving=False):
+    """
+    Oppdaterer analyse_tidsserie.json, tidsserie_frontend.json og de
+    oppdelte frontend-filene i data/frontend/.
+    
+    Analyserer bare endrede sesjoner og slår dem sammen med de lagrede
+    delresultatene for resten.
+    """
+    resultat = analyser_alle_sesjoner(data_mappe, tving=tving)
+    
+    if not resultat:
+        return None
+    
+    eksporter_frontend(data_mappe, tidsserie=resultat)
+    return lag_tidsserie_for_frontend(data_mappe, data=resultat)
+
+
 # ============================================================
 # KJØR
 # ============================================================
 
 if __name__ == "__main__":
-    from datetime import datetime
-    
     print("""
 📈 Stortingsvotering - Tidsserieanalyse
 =======================================
@@ -242,12 +542,7 @@ BRUK:
 
 """)
     
-    # Kjør analyse
-    resultat = analyser_alle_sesjoner()
-    
-    if resultat:
-        # Lag også frontend-data
-        lag_tidsserie_for_frontend()
-        
+    # Kjør analyse og lag frontend-data
+    if oppdater_tidsserie():
         print("\n✅ Ferdig!")
-        print("   Nå kan du bruke tidsserie_frontend.json i React-appen.")
+        print("   Nå kan du bruke data/frontend/ (eller tidsserie_frontend.json) i React-appen.")
@@ -0,0 +1,266 @@
+# ============================================================
+# STORTINGSVOTERING - LOKAL STAND-IN FOR STORTINGETS API
+# ============================================================
+# Dette scriptet starter en liten lokal webserver som svarer
+# som data.stortinget.no/eksport, men med data fra de lagrede
+# voteringer_*.json-filene.
+#
+# Brukes til testing uten nett og uten å belaste Stortinget:
+#   STORTINGET_API_URL=http://127.0.0.1:8765/eksport python3 ...
+#
+# Endepunkter (alle med ?format=json):
+#   partier?sesjonid=        saker?sesjonid=
+#   voteringer?sakid=        voteringsresultat?voteringid=
+#   sak?sakid=
+#
+# Serveren kan også legge inn feil med vilje (feilrate), så
+# stikkprøvekontrollen kan testes på data med kjente avvik.
+# ============================================================
+
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from analyser_data_v2 import finn_sesjoner, strom_voteringer
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+STANDARD_PORT = 8765
+
+# De lagrede dataene har ikke komité, emner og forslagsstillere,
+# så sak?sakid= svarer med faste, tilfeldig valgte verdier per sak
+KOMITEER = [
+    ("ARBSOS", "Arbeids- og sosialkomiteen"),
+    ("ENERGI", "Energi- og miljøkomiteen"),
+    ("FAMKULT", "Familie- og kulturkomiteen"),
+    ("FINANS", "Finanskomiteen"),
+    ("HELSEOMS", "Helse- og omsorgskomiteen"),
+    ("JUSTIS", "Justiskomiteen"),
+    ("KOMMFORV", "Kommunal- og forvaltningskomiteen"),
+    ("KONTROLL", "Kontroll- og konstitusjonskomiteen"),
+    ("NAERING", "Næringskomiteen"),
+    ("TRANSPORT", "Transport- og kommunikasjonskomiteen"),
+    ("KUF", "Utdannings- og forskningskomiteen"),
+    ("UFO", "Utenriks- og forsvarskomiteen")
+]
+EMNER = [
+    (1, "Arbeidsliv"), (2, "Energi"), (3, "Forsvar"), (4, "Helse"),
+    (5, "Innvandring"), (6, "Klima og miljø"), (7, "Kommuner"), (8, "Kultur"),
+    (9, "Landbruk"), (10, "Rettsvesen"), (11, "Samferdsel"), (12, "Skatter og avgifter"),
+    (13, "Sosiale forhold"), (14, "Statsbudsjettet"), (15, "Utdanning"), (16, "Utenriks")
+]
+
+# ============================================================
+# OPPSLAGSTABELLER
+# ============================================================
+
+def bygg_svar(data_mappe="../data", sesjoner=None):
+    """
+    Bygger oppslagstabeller for alle endepunktene fra lagrede data.
+    
+    Returnerer dict med "partier", "saker", "sak", "voteringer" og
+    "voteringsresultat", hver med API-ets nøkkel som oppslag.
+    """
+    if sesjoner is None:
+        sesjoner = finn_sesjoner(data_mappe)
+    
+    svar = {"partier": {}, "saker": {}, "sak": {}, "voteringer": {}, "voteringsresultat": {}}
+    
+    for sesjon_id in sesjoner:
+        partier_fil = os.path.join(data_mappe, f"partier_{sesjon_id}.json")
+        if os.path.exists(partier_fil):
+            with open(partier_fil, "r", encoding="utf-8") as f:
+                svar["partier"][sesjon_id] = json.load(f)
+        
+        saker = {}
+        
+        for votering in strom_voteringer(sesjon_id, data_mappe):
+            sak_id = str(votering.get("sak_id"))
+            
+            if sak_id not in saker:
+                saker[sak_id] = {
+                    "id": votering.get("sak_id"),
+                    "tittel": votering.get("sak_tittel", ""),
+                    "korttittel": votering.get("sak_tittel", ""),
+                    "sakstype": votering.get("sakstype"),
+                    "sist_oppdatert_dato": votering.get("dato", "")
+                }
+            
+            svar["voteringer"].setdefault(sak_id, []).append({
+                "votering_id": votering.get("votering_id"),
+                "votering_tema": votering.get("votering_tema", ""),
+                "antall_for": votering.get("antall_for", 0),
+                "antall_mot": votering.get("antall_mot", 0),
+                "vedtatt": votering.get("vedtatt", False),
+                "votering_tid": votering.get("dato", "")
+            })
+            svar["voteringsresultat"][str(votering.get("votering_id"))] = votering.get("stemmer") or []
+        
+        svar["saker"][sesjon_id] = list(saker.values())
+        svar["sak"].update(saker)
+    
+    return svar
+
+
+def lag_sakdetaljer(sak, stemmer):
+    """
+    Lager et svar som API-ets sak?sakid= med komité, emner og
+    forslagsstillere. Verdiene er tilfeldige, men alltid like for
+    samme sak.
+    """
+    tilfeldig = random.Random(str(sak["id"]))
+    komite_id, komite_navn = tilfeldig.choice(KOMITEER)
+    emner = tilfeldig.sample(EMNER, tilfeldig.randint(1, 3))
+    
+    representanter = [s["representant"] for s in stemmer if s.get("representant")]
+    forslagstillere = tilfeldig.sample(representanter, min(len(representanter), tilfeldig.randint(0, 3)))
+    
+    return {
+        "id": sak["id"],
+        "tittel": sak.get("tittel", ""),
+        "korttittel": sak.get("korttittel", ""),
+        "sakstype": sak.get("sakstype"),
+        "komite": {"id": komite_id, "navn": komite_navn},
+        "emne_liste": [
+            {"id": emne_id, "navn": navn, "er_hovedemne": i == 0}
+            for i, (emne_id, navn) in enumerate(emner)
+        ],
+        "sak_opphav": {"forslagstiller_liste": forslagstillere}
+    }
+
+
+def _med_feil(stemmer, tilfeldig):
+    """
+    Lager en kopi av stemmene der én representant har byttet side.
+    
+    Brukes for å simulere feil i dataene.
+    """
+    stemmer = [dict(s) for s in stemmer]
+    kandidater = [i for i, s in enumerate(stemmer) if s.get("votering") in (1, 2, "for", "mot")]
+    
+    if kandidater:
+        i = tilfeldig.choice(kandidater)
+        bytte = {1: 2, 2: 1, "for": "mot", "mot": "for"}
+        stemmer[i]["votering"] = bytte[stemmer[i]["votering"]]
+    
+    return stemmer
+
+
+# ============================================================
+# WEBSERVER
+# ============================================================
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Svarer på GET-forespørsler som Stortingets eksport-API."""
+    
+    def do_GET(self):
+        server = self.server
+        adresse = urlparse(self.path)
+        endpoint = adresse.path.rstrip("/").split("/")[-1]
+        parametre = {k: v[0] for k, v in parse_qs(adresse.query).items()}
+        
+        with server.laas:
+            server.antall_kall += 1
+        
+        if server.forsinkelse:
+            time.sleep(server.forsinkelse)
+        
+        svar = server.svar
+        
+        if endpoint == "partier":
+            data = {"partier_liste": svar["partier"].get(parametre.get("sesjonid"), [])}
+        elif endpoint == "saker":
+            data = {"saker_liste": svar["saker"].get(parametre.get("sesjonid"), [])}
+        elif endpoint == "voteringer":
+            data = {"votering_liste": svar["voteringer"].get(parametre.get("sakid"), [])}
+        elif endpoint == "sak":
+            sak_id = parametre.get("sakid")
+            sak = svar["sak"].get(sak_id)
+            if sak is None:
+                self._send(404, {"feil": f"ukjent sak {sak_id}"})
+                return
+            voteringer = svar["voteringer"].get(sak_id) or [{}]
+            stemmer = svar["voteringsresultat"].get(str(voteringer[0].get("votering_id"))) or []
+            data = lag_sakdetaljer(sak, stemmer)
+        elif endpoint == "voteringsresultat":
+            votering_id = parametre.get("voteringid")
+            stemmer = svar["voteringsresultat"].get(votering_id)
+            if stemmer is None:
+                self._send(404, {"feil": f"ukjent votering {votering_id}"})
+                return
+            if votering_id in server.endrede:
+                stemmer = _med_feil(stemmer, random.Random(votering_id))
+            data = {"voteringsresultat_liste": stemmer}
+        else:
+            self._send(404, {"feil": f"ukjent endepunkt {endpoint}"})
+            return
+        
+        self._send(200, data)
+    
+    def _send(self, status, data):
+        innhold = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(innhold)))
+        self.end_headers()
+        self.wfile.write(innhold)
+    
+    def log_message(self, format, *args):
+        # Ingen logg per forespørsel
+        pass
+
+
+def start_standin(data_mappe="../data", port=0, feilrate=0.0, forsinkelse=0.0, frø=1):
+    """
+    Starter stand-in-serveren i en egen tråd.
+    
+    Parametre:
+        port: Porten serveren lytter på (0 = velg en ledig port)
+        feilrate: Andel av voteringene som får én endret stemme
+        forsinkelse: Sekunder å vente før hvert svar (simulerer nettet)
+        frø: Frø for valg av hvilke voteringer som endres
+    
+    Returnerer (server, base_url). Stopp med server.shutdown().
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandinHandler)
+    server.svar = bygg_svar(data_mappe)
+    server.forsinkelse = forsinkelse
+    server.antall_kall = 0
+    server.laas = threading.Lock()
+    
+    alle_ider = sorted(server.svar["voteringsresultat"])
+    antall_endret = round(len(alle_ider) * feilrate)
+    server.endrede = set(random.Random(frø).sample(alle_ider, antall_endret))
+    
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/eksport"
+    return server, base_url
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else STANDARD_PORT
+    server, base_url = start_standin(port=port)
+    
+    print(f"🧪 Stand-in for Stortingets API kjører på {base_url}")
+    print(f"   {len(server.svar['voteringsresultat'])} voteringer lastet")
+    print(f"   Bruk: STORTINGET_API_URL={base_url}")
+    print("   Stopp med Ctrl+C")
+    
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
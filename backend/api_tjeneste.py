@@ -0,0 +1,344 @@
+# ============================================================
+# STORTINGSVOTERING - ANALYSE-API
+# ============================================================
+# Dette scriptet starter en liten, skrivebeskyttet webtjeneste
+# over de ferdige analysene (analyse_*.json og
+# analyse_tidsserie.json), for nettsiden og innbygginger.
+#
+# Endepunkter:
+#   /api/sesjoner                  sesjoner og partier
+#   /api/matrise/{sesjon}          enighetsmatrisen
+#   /api/partistatistikk/{sesjon}  statistikk per parti
+#   /api/partipar/{a}-{b}          ett partipar i alle sesjoner
+#   /api/tidsserie                 enighet over tid
+#
+# Alle svar lages ferdig ved oppstart og ligger i minnet som
+# bytes, både rå og gzip-komprimert, med en ETag. Klienter som
+# sender If-None-Match får 304 uten innhold. Serveren bruker én
+# tråd per tilkobling og HTTP/1.1 med keep-alive, så den tåler
+# flere tusen forespørsler i sekundet.
+#
+# Svarene lages på nytt når analysefilene endres (sjekkes hvert
+# SJEKK_INTERVALL_SEKUNDER), eller straks ved SIGHUP.
+# ============================================================
+
+import gzip
+import hashlib
+import json
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+STANDARD_PORT = 8080
+
+# Hvor lenge nettlesere og mellomlagre kan bruke et svar før de
+# spør igjen (med ETag blir det da bare en 304)
+MAKS_ALDER_SEKUNDER = 300
+
+# Svar mindre enn dette komprimeres ikke
+MIN_GZIP_STORRELSE = 256
+
+# Hvor ofte serveren sjekker om analysefilene er endret
+SJEKK_INTERVALL_SEKUNDER = 5
+
+# ============================================================
+# FERDIGE SVAR
+# ============================================================
+
+def lag_svar(data):
+    """
+    Gjør data om til et ferdig svar: JSON-bytes, gzip og ETag.
+    
+    ETag-en er en hash av innholdet, så den er lik mellom omstarter
+    så lenge analysene ikke endres.
+    """
+    innhold = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    komprimert = gzip.compress(innhold, compresslevel=9, mtime=0) if len(innhold) >= MIN_GZIP_STORRELSE else None
+    
+    return {
+        "innhold": innhold,
+        "gzip": komprimert,
+        "etag": '"' + hashlib.sha256(innhold).hexdigest()[:16] + '"'
+    }
+
+
+def _les_json(filsti):
+    try:
+        with open(filsti, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _analysefiler(data_mappe):
+    return sorted(
+        f for f in os.listdir(data_mappe)
+        if f.startswith("analyse_") and f.endswith(".json")
+    )
+
+
+def kildeavtrykk(data_mappe="../data"):
+    """
+    Navn, størrelse og endringstid for analysefilene svarene lages fra.
+    
+    Endres avtrykket, er svarene i minnet utdaterte.
+    """
+    avtrykk = []
+    for filnavn in _analysefiler(data_mappe):
+        try:
+            info = os.stat(os.path.join(data_mappe, filnavn))
+        except FileNotFoundError:
+            continue
+        avtrykk.append((filnavn, info.st_size, info.st_mtime_ns))
+    return avtrykk
+
+
+def bygg_alle_svar(data_mappe="../data"):
+    """
+    Leser alle analysene og lager svarene for alle endepunktene.
+    
+    Returnerer dict: {sti: svar fra lag_svar}
+    """
+    analyser = {}
+    for filnavn in _analysefiler(data_mappe):
+        if filnavn != "analyse_tidsserie.json":
+            analyse = _les_json(os.path.join(data_mappe, filnavn))
+            if analyse and "sesjon_id" in analyse:
+                analyser[analyse["sesjon_id"]] = analyse
+    
+    tidsserie = _les_json(os.path.join(data_mappe, "analyse_tidsserie.json")) or {}
+    
+    svar = {}
+    alle_partier = set()
+    partipar = {}
+    
+    for sesjon_id, analyse in analyser.items():
+        partistatistikk = analyse.get("partistatistikk", {})
+        alle_partier.update(partistatistikk)
+        
+        svar[f"/api/matrise/{sesjon_id}"] = lag_svar({
+            "sesjon": sesjon_id,
+            "antall_voteringer": analyse.get("antall_voteringer"),
+            "enighetsmatrise": analyse.get("enighetsmatrise", {})
+        })
+        svar[f"/api/partistatistikk/{sesjon_id}"] = lag_svar({
+            "sesjon": sesjon_id,
+            "antall_voteringer": analyse.get("antall_voteringer"),
+            "partistatistikk": partistatistikk
+        })
+        
+        for par in analyse.get("alle_partipar", []):
+            nokkel = f"{par['parti_a']}-{par['parti_b']}"
+            partipar.setdefault(nokkel, {})[sesjon_id] = {
+                "enighet_prosent": par["enighet_prosent"],
+                "antall_enige": par["antall_enige"],
+                "antall_uenige": par["antall_uenige"],
+                "antall_totalt": par["antall_totalt"]
+            }
+    
+    for nokkel in set(partipar) | set(tidsserie.get("tidsserie", {})):
+        svar[f"/api/partipar/{nokkel}"] = lag_svar({
+            "partipar": nokkel,
+            "sesjoner": dict(sorted(partipar.get(nokkel, {}).items())),
+            "gjennomsnitt": tidsserie.get("gjennomsnitt", {}).get(nokkel),
+            "samlet_enighet": tidsserie.get("samlet_enighet", {}).get(nokkel)
+        })
+    
+    svar["/api/tidsserie"] = lag_svar({
+        "tidsserie": tidsserie.get("tidsserie", {}),
+        "gjennomsnitt": tidsserie.get("gjennomsnitt", {}),
+        "samlet_enighet": tidsserie.get("samlet_enighet", {}),
+        "pivottidsserie": tidsserie.get("pivottidsserie", {})
+    })
+    svar["/api/sesjoner"] = lag_svar({
+        "sesjoner": sorted(analyser),
+        "partier": sorted(alle_partier),
+        "partipar": sorted(partipar)
+    })
+    
+    return svar
+
+
+def _normaliser_sti(sti):
+    """
+    Partipar kan spørres i begge rekkefølger ("H-A" blir "A-H"),
+    og en avsluttende skråstrek ignoreres.
+    """
+    sti = unquote(sti).rstrip("/")
+    if sti.startswith("/api/partipar/"):
+        partier = sti[len("/api/partipar/"):].split("-")
+        if len(partier) == 2:
+            sti = "/api/partipar/" + "-".join(sorted(partier))
+    return sti
+
+
+def etag_treffer(if_none_match, etag):
+    """
+    Sjekker om etag-en er blant dem klienten sendte i If-None-Match.
+    
+    Hodet er en kommaseparert liste av ETag-er, eventuelt svake
+    (W/"..."), eller "*" for hvilken som helst versjon.
+    """
+    if not if_none_match:
+        return False
+    
+    for kandidat in if_none_match.split(","):
+        kandidat = kandidat.strip()
+        if kandidat == "*":
+            return True
+        if kandidat.startswith("W/"):
+            kandidat = kandidat[2:]
+        if kandidat == etag:
+            return True
+    return False
+
+
+# ============================================================
+# WEBSERVER
+# ============================================================
+
+class AnalyseHandler(BaseHTTPRequestHandler):
+    """Svarer med ferdige svar fra minnet."""
+    
+    # Keep-alive: mange forespørsler over samme tilkobling
+    protocol_version = "HTTP/1.1"
+    
+    # Hoder og innhold skrives samlet, uten Nagle-forsinkelse mellom dem
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self._svar(med_innhold=True)
+    
+    def do_HEAD(self):
+        self._svar(med_innhold=False)
+    
+    def _svar(self, med_innhold):
+        sti = _normaliser_sti(urlparse(self.path).path)
+        svar = self.server.svar.get(sti)
+        
+        if svar is None:
+            innhold = json.dumps({"feil": f"fant ikke {sti}"}).encode("utf-8")
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(innhold)))
+            self.end_headers()
+            if med_innhold:
+                self.wfile.write(innhold)
+            return
+        
+        # Klienten har allerede riktig versjon
+        if etag_treffer(self.headers.get("If-None-Match"), svar["etag"]):
+            self.send_response(304)
+            self.send_header("ETag", svar["etag"])
+            self.send_header("Cache-Control", f"public, max-age={MAKS_ALDER_SEKUNDER}")
+            self.end_headers()
+            return
+        
+        bruk_gzip = svar["gzip"] is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        innhold = svar["gzip"] if bruk_gzip else svar["innhold"]
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(innhold)))
+        self.send_header("ETag", svar["etag"])
+        self.send_header("Cache-Control", f"public, max-age={MAKS_ALDER_SEKUNDER}")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if bruk_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        
+        if med_innhold:
+            self.wfile.write(innhold)
+    
+    def log_message(self, format, *args):
+        # Ingen logg per forespørsel (det ville blitt flaskehalsen)
+        pass
+
+
+class AnalyseServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer med de ferdige svarene i minnet."""
+    
+    daemon_threads = True
+    request_queue_size = 128
+    
+    def __init__(self, adresse, data_mappe):
+        super().__init__(adresse, AnalyseHandler)
+        self.data_mappe = data_mappe
+        self.avtrykk = kildeavtrykk(data_mappe)
+        self.svar = bygg_alle_svar(data_mappe)
+        self.neste_sjekk = time.monotonic() + SJEKK_INTERVALL_SEKUNDER
+    
+    def last_inn_paa_nytt(self):
+        """Leser analysene på nytt. Pågående forespørsler bruker de gamle svarene."""
+        avtrykk = kildeavtrykk(self.data_mappe)
+        try:
+            svar = bygg_alle_svar(self.data_mappe)
+        except ValueError as e:
+            # F.eks. en fil som skrives akkurat nå; prøv igjen ved neste sjekk
+            print(f"   ⚠️  Kunne ikke lese analysene på nytt: {e}")
+            return False
+        
+        self.svar, self.avtrykk = svar, avtrykk
+        print(f"   🔄 Analysene lest på nytt, {len(svar)} ferdige svar i minnet")
+        return True
+    
+    def service_actions(self):
+        # Kalles av serve_forever mellom forespørslene
+        super().service_actions()
+        if time.monotonic() < self.neste_sjekk:
+            return
+        self.neste_sjekk = time.monotonic() + SJEKK_INTERVALL_SEKUNDER
+        if kildeavtrykk(self.data_mappe) != self.avtrykk:
+            self.last_inn_paa_nytt()
+
+
+def start_tjeneste(data_mappe="../data", port=STANDARD_PORT, i_bakgrunnen=False):
+    """
+    Starter analyse-API-et.
+    
+    Parametre:
+        port: Porten tjenesten lytter på (0 = velg en ledig port)
+        i_bakgrunnen: Kjør i en egen tråd og returner med en gang
+    
+    Returnerer serveren (stopp med server.shutdown()).
+    """
+    server = AnalyseServer(("127.0.0.1", port), data_mappe)
+    
+    print(f"🌐 Analyse-API på http://127.0.0.1:{server.server_address[1]}/api/sesjoner")
+    print(f"   {len(server.svar)} ferdige svar i minnet")
+    
+    if i_bakgrunnen:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    
+    # kill -HUP leser analysene på nytt med en gang
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: server.last_inn_paa_nytt())
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n   Stopper...")
+        server.server_close()
+    
+    return server
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else STANDARD_PORT
+    start_tjeneste(port=port)
@@ -0,0 +1,511 @@
+# ============================================================
+# STORTINGSVOTERING - ARBEIDSKØ FOR HENTING
+# ============================================================
+# En full henting fra 2011 og fram til i dag tar mange timer.
+# Med hent_alle_sesjoner er det én lang prosess; stopper den,
+# stopper alt. Her er hentingen i stedet delt opp i små
+# oppgaver i en SQLite-database, som flere prosesser kan jobbe
+# med samtidig og som overlever avbrudd:
+#
+#   sakliste  (én per sesjon)   henter saker og partier,
+#                               legger inn én sak-oppgave per sak
+#   sak       (én per sak)      henter voteringene i saken,
+#                               legger inn én votering-oppgave per votering
+#   votering  (én per votering) henter stemmene og lagrer den
+#                               ferdige voteringen i databasen
+#
+# En arbeider leier én oppgave om gangen. Leien varer
+# LEIE_SEKUNDER; dør arbeideren, tas oppgaven av en annen når
+# leien har gått ut. Feil prøves på nytt med økende pause,
+# opptil MAKS_FORSOK ganger. Det gjelder også oppgaver som tar
+# livet av arbeideren, så én slik oppgave ikke kan stoppe alle
+# arbeiderne etter tur.
+#
+# Alle API-kall fra alle arbeiderne går gjennom én felles
+# hastighetsbegrensning i databasen (PAUSE_MELLOM_KALL mellom
+# hvert kall), så grensen hos Stortinget holder uansett hvor
+# mange arbeidere som kjører.
+#
+# Resultatene er idempotente: oppgaver legges inn med en unik
+# nøkkel (type, sesjon, id), og bare det første resultatet for
+# en oppgave lagres. Når en sesjon er ferdig, skriver
+# samle_sesjon voteringer_{sesjon}.json fra databasen.
+#
+# BRUK:
+#   python3 stortingsvotering.py queue add 2011-2012 2012-2013
+#   python3 stortingsvotering.py queue work       (i så mange prosesser man vil)
+#   python3 stortingsvotering.py queue status
+#   python3 stortingsvotering.py queue collect 2011-2012
+#
+# Flere maskiner kan dele køen hvis databasefilen ligger på en
+# felles disk med fungerende fillåsing (SQLite over NFS er ikke
+# trygt). Leiene og hastighetsbegrensningen bruker klokken, så
+# maskinene bør ha synkronisert tid (NTP).
+# ============================================================
+
+import json
+import os
+import socket
+import sqlite3
+import time
+
+import hent_data_v2
+from hent_data_v2 import hent_fra_api, lag_votering, lagre_til_json, lagre_voteringer
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+KO_FIL = "arbeidsko.sqlite"
+
+# Hvor lenge en arbeider har en oppgave før andre kan ta den
+LEIE_SEKUNDER = 300
+
+# Forsøk per oppgave, og pausen før nytt forsøk (dobles hver gang)
+MAKS_FORSOK = 5
+PAUSE_VED_FEIL = 30
+
+# Hvor lenge en arbeider venter før den ser etter nye oppgaver
+# når køen er tom, men andre arbeidere har oppgaver i gang
+VENT_NAAR_TOM = 5
+
+# Voteringer først, så blir påbegynte saker ferdige før nye tas
+PRIORITET = {"votering": 0, "sak": 1, "sakliste": 2}
+
+SKJEMA = """
+CREATE TABLE IF NOT EXISTS oppgaver (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    sesjon_id TEXT NOT NULL,
+    nokkel TEXT NOT NULL,
+    prioritet INTEGER NOT NULL,
+    posisjon INTEGER NOT NULL DEFAULT 0,
+    delposisjon INTEGER NOT NULL DEFAULT 0,
+    data TEXT,
+    status TEXT NOT NULL DEFAULT 'venter',
+    forsok INTEGER NOT NULL DEFAULT 0,
+    neste_forsok REAL NOT NULL DEFAULT 0,
+    leid_av TEXT,
+    leie_utloper REAL,
+    feil TEXT,
+    resultat TEXT,
+    oppdatert REAL,
+    UNIQUE (type, sesjon_id, nokkel)
+);
+CREATE INDEX IF NOT EXISTS oppgaver_klare ON oppgaver (status, prioritet, id);
+CREATE INDEX IF NOT EXISTS oppgaver_sesjon ON oppgaver (sesjon_id, type, status);
+CREATE TABLE IF NOT EXISTS hastighet (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    neste_kall REAL NOT NULL,
+    pause REAL NOT NULL
+);
+"""
+
+# ============================================================
+# KØEN
+# ============================================================
+
+class Arbeidsko:
+    """
+    Køen i en SQLite-fil. Hver prosess (og hver tråd) åpner sin egen.
+    
+    Parametre:
+        filsti: Databasefilen (lages hvis den mangler)
+        pause: Sekunder mellom API-kall, for alle arbeiderne samlet
+               (standard: PAUSE_MELLOM_KALL, settes når køen lages)
+    """
+    
+    def __init__(self, filsti, pause=None):
+        self.filsti = filsti
+        mappe = os.path.dirname(filsti)
+        if mappe:
+            os.makedirs(mappe, exist_ok=True)
+        
+        # Transaksjonene styres selv (BEGIN IMMEDIATE), så to arbeidere
+        # aldri leier samme oppgave
+        self.db = sqlite3.connect(filsti, timeout=60, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SKJEMA)
+        self.db.execute(
+            "INSERT OR IGNORE INTO hastighet (id, neste_kall, pause) VALUES (1, 0, ?)",
+            (hent_data_v2.PAUSE_MELLOM_KALL if pause is None else pause,)
+        )
+        if pause is not None:
+            self.db.execute("UPDATE hastighet SET pause = ? WHERE id = 1", (pause,))
+    
+    def lukk(self):
+        self.db.close()
+    
+    def _transaksjon(self):
+        self.db.execute("BEGIN IMMEDIATE")
+    
+    def legg_til(self, type_, sesjon_id, nokkel, data=None, posisjon=0, delposisjon=0):
+        """Legger inn en oppgave hvis den ikke finnes fra før. Sann hvis den var ny."""
+        markor = self.db.execute(
+            "INSERT OR IGNORE INTO oppgaver (type, sesjon_id, nokkel, prioritet, posisjon, delposisjon, data, oppdatert) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (type_, sesjon_id, str(nokkel), PRIORITET[type_], posisjon, delposisjon,
+             json.dumps(data, ensure_ascii=False), time.time())
+        )
+        return markor.rowcount == 1
+    
+    def legg_til_sesjon(self, sesjon_id):
+        """Legger inn henting av en hel sesjon. Sann hvis den ikke var lagt inn fra før."""
+        return self.legg_til("sakliste", sesjon_id, sesjon_id)
+    
+    def leie(self, arbeider, leie=LEIE_SEKUNDER):
+        """
+        Leier den neste oppgaven som er klar: en ventende oppgave som
+        ikke venter på nytt forsøk, eller en leid oppgave der leien
+        har gått ut.
+        
+        Oppgaver som har brukt opp MAKS_FORSOK leies ikke ut igjen. En
+        utløpt leie på siste forsøk betyr at arbeideren døde underveis,
+        og oppgaven markeres da som feilet.
+        
+        Returnerer oppgaven som dict (data er pakket ut), eller None
+        hvis ingen er klare.
+        """
+        naa = time.time()
+        self._transaksjon()
+        try:
+            self.db.execute(
+                "UPDATE oppgaver SET status = 'feilet', feil = COALESCE(feil, 'leien gikk ut'), "
+                "leid_av = NULL, leie_utloper = NULL, oppdatert = ? "
+                "WHERE status = 'leid' AND leie_utloper < ? AND forsok >= ?",
+                (naa, naa, MAKS_FORSOK)
+            )
+            rad = self.db.execute(
+                "SELECT * FROM oppgaver "
+                "WHERE ((status = 'venter' AND neste_forsok <= ?) OR (status = 'leid' AND leie_utloper < ?)) "
+                "AND forsok < ? "
+                "ORDER BY prioritet, id LIMIT 1",
+                (naa, naa, MAKS_FORSOK)
+            ).fetchone()
+            if rad is None:
+                self.db.execute("COMMIT")
+                return None
+            
+            self.db.execute(
+                "UPDATE oppgaver SET status = 'leid', leid_av = ?, leie_utloper = ?, forsok = forsok + 1, oppdatert = ? "
+                "WHERE id = ?",
+                (arbeider, naa + leie, naa, rad["id"])
+            )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        
+        oppgave = dict(rad, status="leid", leid_av=arbeider, leie_utloper=naa + leie, forsok=rad["forsok"] + 1)
+        oppgave["data"] = json.loads(oppgave["data"]) if oppgave["data"] else None
+        return oppgave
+    
+    def fullfor(self, oppgave, resultat=None, nye=()):
+        """
+        Markerer en oppgave som ferdig og legger inn oppgavene den førte til.
+        
+        Parametre:
+            resultat: Lagres med oppgaven (JSON)
+            nye: Liste med (type, nokkel, data, posisjon, delposisjon)
+        
+        Alt skjer i én transaksjon. Er oppgaven allerede ferdig (en
+        annen arbeider tok den etter at leien gikk ut), beholdes det
+        første resultatet. Returnerer True hvis dette resultatet ble lagret.
+        """
+        self._transaksjon()
+        try:
+            for type_, nokkel, data, posisjon, delposisjon in nye:
+                self.legg_til(type_, oppgave["sesjon_id"], nokkel, data, posisjon, delposisjon)
+            
+            markor = self.db.execute(
+                "UPDATE oppgaver SET status = 'ferdig', resultat = ?, leid_av = NULL, leie_utloper = NULL, "
+                "feil = NULL, oppdatert = ? WHERE id = ? AND status != 'ferdig'",
+                (json.dumps(resultat, ensure_ascii=False), time.time(), oppgave["id"])
+            )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        
+        return markor.rowcount == 1
+    
+    def mislykket(self, oppgave, feil):
+        """
+        Gir oppgaven tilbake etter en feil. Den prøves på nytt etter
+        PAUSE_VED_FEIL · 2^(forsøk - 1) sekunder, eller markeres som
+        feilet etter MAKS_FORSOK forsøk.
+        """
+        naa = time.time()
+        if oppgave["forsok"] >= MAKS_FORSOK:
+            status, neste = "feilet", naa
+        else:
+            status, neste = "venter", naa + PAUSE_VED_FEIL * 2 ** (oppgave["forsok"] - 1)
+        
+        self.db.execute(
+            "UPDATE oppgaver SET status = ?, neste_forsok = ?, feil = ?, leid_av = NULL, leie_utloper = NULL, "
+            "oppdatert = ? WHERE id = ? AND status = 'leid' AND leid_av = ?",
+            (status, neste, str(feil), naa, oppgave["id"], oppgave["leid_av"])
+        )
+        return status
+    
+    def prov_feilede_igjen(self, sesjon_id=None):
+        """Setter feilede oppgaver tilbake i køen med nye forsøk. Returnerer antallet."""
+        sql = "UPDATE oppgaver SET status = 'venter', forsok = 0, neste_forsok = 0 WHERE status = 'feilet'"
+        parametre = ()
+        if sesjon_id is not None:
+            sql += " AND sesjon_id = ?"
+            parametre = (sesjon_id,)
+        return self.db.execute(sql, parametre).rowcount
+    
+    def vent_paa_tur(self):
+        """
+        Venter til neste API-kall er tillatt for alle arbeiderne samlet.
+        
+        Som hent_data_v2.vent_paa_tur, men tidspunktet for neste kall
+        ligger i databasen, så det deles mellom prosesser og maskiner.
+        """
+        self._transaksjon()
+        try:
+            rad = self.db.execute("SELECT neste_kall, pause FROM hastighet WHERE id = 1").fetchone()
+            naa = time.time()
+            start = max(naa, rad["neste_kall"])
+            self.db.execute("UPDATE hastighet SET neste_kall = ? WHERE id = 1", (start + rad["pause"],))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        
+        if start > naa:
+            time.sleep(start - naa)
+    
+    def status(self):
+        """
+        Teller oppgavene per sesjon, type og status.
+        
+        Returnerer dict: {sesjon_id: {type: {status: antall}}}
+        """
+        oversikt = {}
+        for rad in self.db.execute(
+            "SELECT sesjon_id, type, status, COUNT(*) AS antall FROM oppgaver "
+            "GROUP BY sesjon_id, type, status ORDER BY sesjon_id"
+        ):
+            typer = oversikt.setdefault(rad["sesjon_id"], {})
+            typer.setdefault(rad["type"], {})[rad["status"]] = rad["antall"]
+        return oversikt
+    
+    def i_gang(self):
+        """Antall oppgaver som er leid ut eller venter (også på nytt forsøk)."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM oppgaver WHERE status IN ('venter', 'leid')"
+        ).fetchone()[0]
+    
+    def uferdige(self, sesjon_id):
+        """Antall oppgaver i sesjonen som ikke er ferdige (også feilede)."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM oppgaver WHERE sesjon_id = ? AND status != 'ferdig'", (sesjon_id,)
+        ).fetchone()[0]
+    
+    def resultater(self, sesjon_id, type_):
+        """Resultatene for ferdige oppgaver av en type, i samme rekkefølge som i API-et."""
+        for rad in self.db.execute(
+            "SELECT resultat FROM oppgaver WHERE sesjon_id = ? AND type = ? AND status = 'ferdig' "
+            "ORDER BY posisjon, delposisjon",
+            (sesjon_id, type_)
+        ):
+            yield json.loads(rad["resultat"])
+
+
+# ============================================================
+# OPPGAVENE
+# ============================================================
+
+class HentingFeilet(Exception):
+    """API-kallet ga ikke svar (oppgaven prøves på nytt)."""
+
+
+def _hent(endpoint, parametre):
+    data = hent_fra_api(endpoint, parametre)
+    if data is None:
+        raise HentingFeilet(f"ingen svar fra {endpoint}")
+    return data
+
+
+def utfor_oppgave(oppgave):
+    """
+    Gjør API-kallene for én oppgave.
+    
+    Returnerer (resultat, nye oppgaver) til Arbeidsko.fullfor.
+    Kaster HentingFeilet hvis et kall ikke ga svar.
+    """
+    sesjon_id = oppgave["sesjon_id"]
+    data = oppgave["data"]
+    
+    if oppgave["type"] == "sakliste":
+        saker = _hent("saker", {"sesjonid": sesjon_id}).get("saker_liste") or []
+        # Partiene er ikke nødvendige for voteringene, så de hentes bare hvis det går
+        partier = (hent_fra_api("partier", {"sesjonid": sesjon_id}) or {}).get("partier_liste")
+        nye = [("sak", sak.get("id"), sak, i, 0) for i, sak in enumerate(saker)]
+        return {"antall_saker": len(saker), "partier": partier}, nye
+    
+    if oppgave["type"] == "sak":
+        voteringer = _hent("voteringer", {"sakid": data.get("id")}).get("votering_liste") or []
+        nye = [
+            ("votering", votering.get("votering_id"), {"sak": data, "votering": votering}, oppgave["posisjon"], j)
+            for j, votering in enumerate(voteringer)
+        ]
+        return {"antall_voteringer": len(voteringer)}, nye
+    
+    if oppgave["type"] == "votering":
+        votering = data["votering"]
+        stemmer = _hent("voteringsresultat", {"voteringid": votering.get("votering_id")})
+        return lag_votering(data["sak"], votering, stemmer.get("voteringsresultat_liste") or []), []
+    
+    raise ValueError(f"Ukjent oppgavetype: {oppgave['type']}")
+
+
+# ============================================================
+# HOVEDFUNKSJONER
+# ============================================================
+
+def ko_fil(data_mappe="../data"):
+    """Standard plassering av køen."""
+    return os.path.join(data_mappe, KO_FIL)
+
+
+def legg_til_sesjoner(sesjoner, data_mappe="../data", filsti=None):
+    """Legger inn henting av sesjonene i køen. Returnerer antall nye."""
+    ko = Arbeidsko(filsti or ko_fil(data_mappe))
+    nye = sum(ko.legg_til_sesjon(sesjon_id) for sesjon_id in sesjoner)
+    ko.lukk()
+    
+    print(f"✓ {nye} av {len(sesjoner)} sesjoner lagt i køen ({len(sesjoner) - nye} var der fra før)")
+    return nye
+
+
+def kjor_arbeider(data_mappe="../data", filsti=None, arbeider=None, maks_oppgaver=None, vent=True):
+    """
+    Tar oppgaver fra køen til den er tom.
+    
+    Parametre:
+        arbeider: Navn i leiene (standard: maskinnavn:prosess-ID)
+        maks_oppgaver: Stopp etter så mange oppgaver
+        vent: Når ingen oppgaver er klare, men noen er leid eller venter
+              på nytt forsøk, vent på dem i stedet for å avslutte
+    
+    Returnerer dict med antall ferdige, mislykkede og feilede oppgaver.
+    """
+    arbeider = arbeider or f"{socket.gethostname()}:{os.getpid()}"
+    ko = Arbeidsko(filsti or ko_fil(data_mappe))
+    hent_data_v2.bruk_felles_tur(ko.vent_paa_tur)
+    
+    print("=" * 60)
+    print(f"👷 ARBEIDER {arbeider}")
+    print("=" * 60)
+    
+    telling = {"ferdig": 0, "mislykket": 0, "feilet": 0}
+    start = time.perf_counter()
+    
+    try:
+        while maks_oppgaver is None or sum(telling.values()) < maks_oppgaver:
+            oppgave = ko.leie(arbeider)
+            
+            if oppgave is None:
+                if vent and ko.i_gang():
+                    time.sleep(VENT_NAAR_TOM)
+                    continue
+                break
+            
+            try:
+                resultat, nye = utfor_oppgave(oppgave)
+            except Exception as feil:
+                # Også uventede feil (f.eks. et svar i feil format) gir
+                # oppgaven tilbake, så den ikke stopper arbeideren
+                if not isinstance(feil, HentingFeilet):
+                    feil = f"{type(feil).__name__}: {feil}"
+                status = ko.mislykket(oppgave, feil)
+                telling["feilet" if status == "feilet" else "mislykket"] += 1
+                print(f"   ⚠️  {oppgave['type']} {oppgave['nokkel']}: {feil} (forsøk {oppgave['forsok']}, {status})")
+                continue
+            
+            ko.fullfor(oppgave, resultat, nye)
+            telling["ferdig"] += 1
+            if oppgave["type"] != "votering" or telling["ferdig"] % 100 == 0:
+                print(f"   ✓ {oppgave['type']} {oppgave['nokkel']} ({oppgave['sesjon_id']})"
+                      + (f": {len(nye)} nye oppgaver" if nye else "")
+                      + f"  [{telling['ferdig']} ferdige]")
+    except KeyboardInterrupt:
+        # Oppgaven som var i gang blir ledig igjen når leien går ut
+        print("\n⚠️  Avbrutt")
+    finally:
+        hent_data_v2.bruk_felles_tur(None)
+        ko.lukk()
+    
+    print(f"\n   ✓ {telling['ferdig']} ferdige, {telling['mislykket']} prøves igjen, "
+          f"{telling['feilet']} feilet på {time.perf_counter() - start:.0f} s")
+    return telling
+
+
+def vis_status(data_mappe="../data", filsti=None):
+    """Skriver ut hvor langt køen har kommet. Returnerer oversikten fra Arbeidsko.status."""
+    ko = Arbeidsko(filsti or ko_fil(data_mappe))
+    oversikt = ko.status()
+    ko.lukk()
+    
+    print("=" * 60)
+    print("📋 ARBEIDSKØ")
+    print("=" * 60)
+    if not oversikt:
+        print("   Køen er tom")
+    
+    for sesjon_id, typer in oversikt.items():
+        print(f"\n   {sesjon_id}")
+        for type_ in ("sakliste", "sak", "votering"):
+            antall = typer.get(type_)
+            if antall:
+                detaljer = ", ".join(f"{n} {status}" for status, n in sorted(antall.items()))
+                print(f"      {type_:<9} {detaljer}")
+    
+    return oversikt
+
+
+def samle_sesjon(sesjon_id, data_mappe="../data", filsti=None, tillat_ufullstendig=False):
+    """
+    Skriver voteringer_{sesjon_id}.json (og partier_) fra køen.
+    
+    Filen skrives alltid i sin helhet fra databasen, så det er trygt
+    å kjøre flere ganger.
+    
+    Parametre:
+        tillat_ufullstendig: Skriv det som er ferdig selv om noen
+                             oppgaver gjenstår eller har feilet
+    
+    Returnerer antall voteringer, eller None hvis sesjonen ikke er ferdig.
+    """
+    ko = Arbeidsko(filsti or ko_fil(data_mappe))
+    try:
+        uferdige = ko.uferdige(sesjon_id)
+        liste = list(ko.resultater(sesjon_id, "sakliste"))
+        if not liste or (uferdige and not tillat_ufullstendig):
+            print(f"❌ {sesjon_id} er ikke ferdig hentet ({uferdige} oppgaver gjenstår)")
+            return None
+        
+        voteringer = list(ko.resultater(sesjon_id, "votering"))
+    finally:
+        ko.lukk()
+    
+    if uferdige:
+        print(f"   ⚠️  {uferdige} oppgaver gjenstår, skriver det som er ferdig")
+    
+    if liste[0].get("partier"):
+        lagre_til_json(liste[0]["partier"], os.path.join(data_mappe, f"partier_{sesjon_id}.json"))
+    lagre_voteringer(voteringer, sesjon_id, data_mappe)
+    
+    return len(voteringer)
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    kjor_arbeider()
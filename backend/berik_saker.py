@@ -0,0 +1,366 @@
+# ============================================================
+# STORTINGSVOTERING - BERIK SAKER MED KOMITÉ OG EMNER
+# ============================================================
+# sakslisten fra API-et sier ikke hvilken komité som behandlet
+# saken, hvilke emner den gjelder eller hvem som fremmet den.
+# Dette scriptet henter detaljene for hver sak (sak?sakid=) og
+# lager enighetsmatriser per komité, emne og forslagsstillers
+# parti.
+#
+# Detaljene endres nesten aldri, så de lagres i en varig cache
+# (sakdetaljer.json) og hentes bare for saker som ikke er der.
+# Kallene går i parallell, men under den felles
+# hastighetsbegrensningen i hent_data_v2.
+#
+# Filer:
+#   sakdetaljer.json               cache for alle sesjoner
+#   sakdimensjoner_{sesjon}.json   komiteer, emner og
+#                                  forslagsstillere som oppslag,
+#                                  og hvilke som gjelder hver sak
+#   tematisk_enighet_{sesjon}.json enighetsmatrise per komité,
+#                                  emne og forslagsparti
+#
+# Matrisene regnes ut fra de lagrede voteringene og
+# dimensjonene, uten flere API-kall.
+# ============================================================
+
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from analyser_data_v2 import beregn_enighetsmatrise, les_voteringer, strom_voteringer, tell_alle_voteringer
+from hent_data_v2 import hent_fra_api
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+CACHE_FIL = "sakdetaljer.json"
+CACHE_VERSJON = 1
+
+# Antall kall som kan være i gang samtidig (hastigheten styres
+# uansett av PAUSE_MELLOM_KALL i hent_data_v2)
+SAMTIDIGE_KALL = 8
+
+# Cachen lagres underveis, så et avbrudd ikke mister alt
+LAGRE_HVER = 50
+
+# Temaer med færre voteringer enn dette tas ikke med i tematisk_enighet
+MIN_VOTERINGER = 10
+
+# ============================================================
+# CACHE
+# ============================================================
+
+def les_cache(data_mappe="../data"):
+    """Leser sakdetaljene. Returnerer {sak_id: detaljer}."""
+    try:
+        with open(os.path.join(data_mappe, CACHE_FIL), "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    
+    if cache.get("versjon") != CACHE_VERSJON:
+        return {}
+    
+    return cache.get("saker", {})
+
+
+def lagre_cache(saker, data_mappe="../data"):
+    """Lagrer sakdetaljene (via en midlertidig fil)."""
+    filsti = os.path.join(data_mappe, CACHE_FIL)
+    
+    with open(filsti + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"versjon": CACHE_VERSJON, "saker": saker}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(filsti + ".tmp", filsti)
+
+
+def tolk_sakdetaljer(data):
+    """
+    Trekker ut komité, emner og forslagsstillere fra svaret på sak?sakid=.
+    
+    Forslagsstillere står under sak_opphav i API-et; eldre svar kan
+    ha dem direkte på saken.
+    """
+    komite = data.get("komite") or None
+    opphav = data.get("sak_opphav") or {}
+    forslagstillere = opphav.get("forslagstiller_liste") or data.get("forslagstiller_liste") or []
+    
+    return {
+        "hentet": datetime.now().isoformat(timespec="seconds"),
+        "komite": {"id": komite["id"], "navn": komite.get("navn", "")} if komite and komite.get("id") else None,
+        "emner": [
+            {"id": str(emne["id"]), "navn": emne.get("navn", ""), "hovedemne": bool(emne.get("er_hovedemne"))}
+            for emne in data.get("emne_liste") or []
+            if emne.get("id") is not None
+        ],
+        "forslagstillere": [
+            {
+                "id": rep.get("id"),
+                "navn": f"{rep.get('fornavn', '')} {rep.get('etternavn', '')}".strip(),
+                "parti": (rep.get("parti") or {}).get("id")
+            }
+            for rep in forslagstillere
+        ]
+    }
+
+
+def hent_sakdetaljer(sak_ider, data_mappe="../data", samtidige=SAMTIDIGE_KALL, oppdater=False):
+    """
+    Henter detaljene for sakene som ikke er i cachen.
+    
+    Parametre:
+        sak_ider: Sakene det trengs detaljer for
+        samtidige: Antall kall i gang samtidig
+        oppdater: Hent alle på nytt, også de som er i cachen
+    
+    Returnerer hele cachen: {sak_id: detaljer}
+    """
+    cache = les_cache(data_mappe)
+    mangler = sorted({str(s) for s in sak_ider if oppdater or str(s) not in cache})
+    
+    print(f"   📚 {len(sak_ider) - len(mangler)} saker i cachen, henter {len(mangler)}")
+    
+    if not mangler:
+        return cache
+    
+    feilet = 0
+    
+    with ThreadPoolExecutor(max_workers=samtidige) as utforer:
+        fremtider = {utforer.submit(hent_fra_api, "sak", {"sakid": sak_id}): sak_id for sak_id in mangler}
+        
+        for i, fremtid in enumerate(as_completed(fremtider), 1):
+            data = fremtid.result()
+            if data:
+                cache[fremtider[fremtid]] = tolk_sakdetaljer(data)
+            else:
+                feilet += 1
+            
+            if i % LAGRE_HVER == 0:
+                lagre_cache(cache, data_mappe)
+                print(f"   [{i}/{len(mangler)}] saker hentet")
+    
+    lagre_cache(cache, data_mappe)
+    
+    if feilet:
+        print(f"   ⚠️  {feilet} saker kunne ikke hentes (prøves igjen neste gang)")
+    
+    return cache
+
+
+# ============================================================
+# DIMENSJONSTABELLER
+# ============================================================
+
+def lag_dimensjoner(sesjon_id, sak_ider, cache):
+    """
+    Lager oppslagstabeller for komiteer, emner og forslagsstillere,
+    og hvilke av dem som hører til hver sak.
+    
+    Returnerer dict som lagres i sakdimensjoner_{sesjon_id}.json.
+    """
+    komiteer = {}
+    emner = {}
+    forslagstillere = {}
+    saker = {}
+    
+    for sak_id in sorted(sak_ider, key=str):
+        detaljer = cache.get(str(sak_id))
+        if not detaljer:
+            continue
+        
+        komite = detaljer["komite"]
+        if komite:
+            komiteer[komite["id"]] = komite["navn"]
+        
+        for emne in detaljer["emner"]:
+            emner[emne["id"]] = emne["navn"]
+        
+        for rep in detaljer["forslagstillere"]:
+            if rep["id"]:
+                forslagstillere[rep["id"]] = {"navn": rep["navn"], "parti": rep["parti"]}
+        
+        hovedemner = [e["id"] for e in detaljer["emner"] if e["hovedemne"]]
+        saker[str(sak_id)] = {
+            "komite": komite["id"] if komite else None,
+            "emner": [e["id"] for e in detaljer["emner"]],
+            "hovedemne": hovedemner[0] if hovedemner else None,
+            "forslagstillere": [rep["id"] for rep in detaljer["forslagstillere"] if rep["id"]],
+            "forslagspartier": sorted({rep["parti"] for rep in detaljer["forslagstillere"] if rep["parti"]})
+        }
+    
+    return {
+        "sesjon_id": sesjon_id,
+        "komiteer": dict(sorted(komiteer.items())),
+        "emner": dict(sorted(emner.items(), key=lambda x: x[1])),
+        "forslagstillere": forslagstillere,
+        "saker": saker
+    }
+
+
+def les_dimensjoner(sesjon_id, data_mappe="../data"):
+    """Leser sakdimensjoner_{sesjon_id}.json, eller None hvis den mangler."""
+    try:
+        with open(os.path.join(data_mappe, f"sakdimensjoner_{sesjon_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ============================================================
+# ENIGHET PER TEMA
+# ============================================================
+
+def grupper_voteringer(voteringer, dimensjoner, dimensjon):
+    """
+    Grupperer voteringene etter komité, emne eller forslagsparti.
+    
+    Parametre:
+        dimensjon: "komite", "emner" eller "forslagspartier"
+    
+    Returnerer dict: {verdi: [indekser i voteringer]}. En votering kan
+    høre til flere grupper (en sak kan ha flere emner).
+    """
+    saker = dimensjoner["saker"]
+    grupper = defaultdict(list)
+    
+    for i, votering in enumerate(voteringer):
+        sak = saker.get(str(votering.get("sak_id")))
+        if not sak:
+            continue
+        
+        verdier = sak[dimensjon]
+        for verdi in verdier if isinstance(verdier, list) else [verdier]:
+            if verdi is not None:
+                grupper[verdi].append(i)
+    
+    return grupper
+
+
+def filtrer_voteringer(voteringer, dimensjoner, komite=None, emne=None, forslagsparti=None):
+    """
+    Velger voteringene om saker fra en komité, med et emne og/eller
+    fremmet av et parti. Kan gis videre til beregn_enighetsmatrise.
+    """
+    saker = dimensjoner["saker"]
+    utvalg = []
+    
+    for votering in voteringer:
+        sak = saker.get(str(votering.get("sak_id")))
+        if not sak:
+            continue
+        if komite is not None and sak["komite"] != komite:
+            continue
+        if emne is not None and str(emne) not in sak["emner"]:
+            continue
+        if forslagsparti is not None and forslagsparti not in sak["forslagspartier"]:
+            continue
+        utvalg.append(votering)
+    
+    return utvalg
+
+
+def beregn_tematisk_enighet(voteringer, dimensjoner, min_voteringer=MIN_VOTERINGER):
+    """
+    Beregner en enighetsmatrise per komité, emne og forslagsparti.
+    
+    Partistemmene telles én gang for alle voteringene; hver gruppe
+    bruker bare sine tellinger.
+    
+    Returnerer dict: {"komiteer": {...}, "emner": {...}, "forslagspartier": {...}}
+    der hver verdi har navn, antall_voteringer og enighetsmatrise.
+    """
+    voteringer = [v for v in voteringer if v.get("stemmer")]
+    partitellinger = tell_alle_voteringer(voteringer)
+    
+    navn = {
+        "komiteer": dimensjoner["komiteer"],
+        "emner": dimensjoner["emner"],
+        "forslagspartier": {}
+    }
+    resultat = {}
+    
+    for nokkel, dimensjon in (("komiteer", "komite"), ("emner", "emner"), ("forslagspartier", "forslagspartier")):
+        resultat[nokkel] = {}
+        
+        for verdi, indekser in sorted(grupper_voteringer(voteringer, dimensjoner, dimensjon).items()):
+            if len(indekser) < min_voteringer:
+                continue
+            
+            matrise, _ = beregn_enighetsmatrise(
+                [voteringer[i] for i in indekser],
+                [partitellinger[i] for i in indekser]
+            )
+            resultat[nokkel][verdi] = {
+                "navn": navn[nokkel].get(verdi, verdi),
+                "antall_voteringer": len(indekser),
+                "enighetsmatrise": matrise
+            }
+    
+    return resultat
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def berik_sesjon(sesjon_id, data_mappe="../data", samtidige=SAMTIDIGE_KALL, oppdater=False):
+    """
+    Henter sakdetaljer for en sesjon og lager dimensjoner og tematisk enighet.
+    
+    Parametre:
+        samtidige: Antall API-kall i gang samtidig
+        oppdater: Hent detaljene på nytt selv om de er i cachen
+    
+    Returnerer tematisk enighet (se beregn_tematisk_enighet), eller
+    None hvis voteringsfilen mangler.
+    """
+    print("=" * 60)
+    print(f"🏷️  BERIKER SAKER FOR SESJON {sesjon_id}")
+    print("=" * 60)
+    
+    try:
+        sak_ider = {v.get("sak_id") for v in strom_voteringer(sesjon_id, data_mappe)}
+    except FileNotFoundError:
+        print(f"❌ Fant ikke voteringer_{sesjon_id}.json")
+        return None
+    
+    cache = hent_sakdetaljer(sak_ider, data_mappe, samtidige, oppdater)
+    
+    dimensjoner = lag_dimensjoner(sesjon_id, sak_ider, cache)
+    with open(os.path.join(data_mappe, f"sakdimensjoner_{sesjon_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(dimensjoner, f, ensure_ascii=False, separators=(",", ":"))
+    
+    print(f"   ✓ {len(dimensjoner['saker'])} saker, {len(dimensjoner['komiteer'])} komiteer, {len(dimensjoner['emner'])} emner")
+    
+    # Komité og emner blir søkbare (se sokeindeks.py)
+    from sokeindeks import oppdater_sokeindeks
+    oppdater_sokeindeks(data_mappe, [sesjon_id], tving=True)
+    
+    print("   🔍 Beregner enighet per komité, emne og forslagsparti...")
+    data = les_voteringer(sesjon_id, data_mappe)
+    voteringer = data.get("voteringer", []) if isinstance(data, dict) else data
+    tematisk = beregn_tematisk_enighet(voteringer, dimensjoner)
+    
+    output_fil = os.path.join(data_mappe, f"tematisk_enighet_{sesjon_id}.json")
+    with open(output_fil, "w", encoding="utf-8") as f:
+        json.dump(dict(sesjon_id=sesjon_id, **tematisk), f, ensure_ascii=False, indent=2)
+    
+    for nokkel in ("komiteer", "emner", "forslagspartier"):
+        print(f"   ✓ {len(tematisk[nokkel])} {nokkel} med minst {MIN_VOTERINGER} voteringer")
+    print(f"   💾 Lagret til {output_fil}")
+    
+    return tematisk
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    sesjon = sys.argv[1] if len(sys.argv) > 1 else "2023-2024"
+    berik_sesjon(sesjon)
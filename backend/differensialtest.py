@@ -0,0 +1,367 @@
+# ============================================================
+# STORTINGSVOTERING - DIFFERENSIALTEST AV ANALYSEMOTORER
+# ============================================================
+# Tallene i enighetsmatrisen og partistatistikken er det
+# METODIKK.md lover journalistene. En raskere beregning må
+# derfor gi NØYAKTIG de samme tallene som dagens.
+#
+# Dette scriptet:
+#   1. lager syntetiske voteringer i API-ets format, med de
+#      vanskelige tilfellene (tall- og tekstkoder, uavgjort i
+#      partiet, manglende parti-ID, tomme stemmelister, ...)
+#   2. kjører referansen (beregn_enighetsmatrise og
+#      beregn_partistatistikk) og alle registrerte motorer
+#   3. sjekker at resultatene er identiske
+#   4. viser hvor mye raskere (eller tregere) hver motor er
+#
+# Nye motorer legges til med registrer_motor().
+# ============================================================
+
+import random
+import sys
+import time
+
+from analyser_data_v2 import beregn_enighetsmatrise, beregn_partistatistikk, tell_alle_voteringer
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+PARTIER = ["A", "H", "FrP", "SV", "Sp", "R", "V", "MDG", "KrF", "PF"]
+
+# Stemmekoder slik de kan forekomme i filene: tall fra API-et,
+# tekst fra eldre filer, og noen ugyldige verdier
+TALLKODER = [1, 2, 3, 4, 5]
+TEKSTKODER = ["for", "mot", "ikke_tilstede", "avstar", "ikke_avgitt"]
+UGYLDIGE_KODER = [0, 9, "FOR", "ukjent", None]
+
+# Registrerte motorer: {navn: funksjon(voteringer) → resultat}
+MOTORER = {}
+
+# ============================================================
+# SYNTETISKE DATA
+# ============================================================
+
+def _stemmekode(valg, tilfeldig):
+    """Én stemme som tall eller tekst, av og til ugyldig."""
+    if tilfeldig.random() < 0.01:
+        return tilfeldig.choice(UGYLDIGE_KODER)
+    indeks = TEKSTKODER.index(valg)
+    return TALLKODER[indeks] if tilfeldig.random() < 0.5 else TEKSTKODER[indeks]
+
+
+def _partiinfo(parti_id, tilfeldig):
+    """Partifeltet til en representant, av og til uten gyldig ID."""
+    terning = tilfeldig.random()
+    if terning < 0.01:
+        return None
+    if terning < 0.02:
+        return {}
+    if terning < 0.03:
+        return {"id": tilfeldig.choice([None, ""])}
+    return {"id": parti_id}
+
+
+def lag_testvoteringer(antall=500, frø=1, antall_representanter=169):
+    """
+    Lager syntetiske voteringer med mange kanttilfeller.
+    
+    Representantene fordeles på PARTIER (noen partier har bare én
+    representant). Voteringene har samme felter som i
+    voteringer_{sesjon}.json.
+    
+    Returnerer liste med voteringer.
+    """
+    tilfeldig = random.Random(frø)
+    
+    # Partienes størrelse: de første partiene er store, de siste små
+    vekter = [48, 36, 21, 13, 28, 8, 3, 3, 3, 1]
+    representanter = []
+    for i in range(antall_representanter):
+        parti_id = tilfeldig.choices(PARTIER, weights=vekter)[0] if i >= len(PARTIER) else PARTIER[i]
+        representanter.append({
+            "id": f"R{i}",
+            "fornavn": "Test",
+            "etternavn": f"Representant {i}",
+            "fylke": {"id": "Os"},
+            "parti_id": parti_id
+        })
+    
+    voteringer = []
+    
+    for nummer in range(antall):
+        terning = tilfeldig.random()
+        
+        # Tomme eller manglende stemmelister
+        if terning < 0.03:
+            stemmer = tilfeldig.choice([[], None, "mangler"])
+        else:
+            # Partilinje for hver votering; noen partier deles på midten
+            linje = {p: tilfeldig.choice(["for", "mot"]) for p in PARTIER}
+            delt = set(tilfeldig.sample(PARTIER, 2)) if terning < 0.15 else set()
+            teller = {p: 0 for p in PARTIER}
+            
+            stemmer = []
+            for rep in representanter:
+                parti_id = rep["parti_id"]
+                if tilfeldig.random() < 0.12:
+                    valg = tilfeldig.choice(["ikke_tilstede", "avstar", "ikke_avgitt"])
+                elif parti_id in delt:
+                    # Annenhver for og mot gir uavgjort i partiet
+                    valg = "for" if teller[parti_id] % 2 == 0 else "mot"
+                    teller[parti_id] += 1
+                elif tilfeldig.random() < 0.03:
+                    valg = "mot" if linje[parti_id] == "for" else "for"
+                else:
+                    valg = linje[parti_id]
+                
+                representant = {k: v for k, v in rep.items() if k != "parti_id"}
+                parti = _partiinfo(parti_id, tilfeldig)
+                if parti is not None:
+                    representant["parti"] = parti
+                stemmer.append({"representant": representant, "votering": _stemmekode(valg, tilfeldig)})
+        
+        antall_for = tilfeldig.randint(40, 130)
+        antall_mot = antall_for if tilfeldig.random() < 0.05 else 169 - antall_for
+        
+        votering = {
+            "sak_id": 1000 + nummer // 3,
+            "sak_tittel": f"Testsak {nummer // 3}",
+            "sakstype": tilfeldig.choice(["budsjett", "lovsak", "alminneligsak"]),
+            "votering_id": 50000 + nummer,
+            "votering_tema": f"Votering {nummer}",
+            "antall_for": antall_for,
+            "antall_mot": antall_mot,
+            "vedtatt": antall_for > antall_mot,
+            "dato": f"/Date({1696150800000 + nummer * 3600000}+0200)/"
+        }
+        if stemmer != "mangler":
+            votering["stemmer"] = stemmer
+        voteringer.append(votering)
+    
+    return voteringer
+
+
+# ============================================================
+# MOTORER
+# ============================================================
+
+def registrer_motor(navn):
+    """
+    Registrerer en analysemotor (brukes som dekorator).
+    
+    Motoren får en liste med voteringer og returnerer dict med en eller
+    flere av nøklene "enighetsmatrise", "partipar" og "partistatistikk"
+    i samme format som referansen. Bare nøklene motoren leverer
+    sammenlignes.
+    """
+    def registrer(funksjon):
+        MOTORER[navn] = funksjon
+        return funksjon
+    return registrer
+
+
+def referanse(voteringer):
+    """Dagens beregning i analyser_data_v2.py, uten forhåndstelling."""
+    matrise, partipar = beregn_enighetsmatrise(voteringer)
+    return {
+        "enighetsmatrise": matrise,
+        "partipar": partipar,
+        "partistatistikk": beregn_partistatistikk(voteringer)
+    }
+
+
+@registrer_motor("forhaandstelt")
+def motor_forhaandstelt(voteringer):
+    """Teller partistemmene én gang og deler tellingen (som analyser_sesjon)."""
+    tellinger = tell_alle_voteringer(voteringer)
+    matrise, partipar = beregn_enighetsmatrise(voteringer, tellinger)
+    return {
+        "enighetsmatrise": matrise,
+        "partipar": partipar,
+        "partistatistikk": beregn_partistatistikk(voteringer, tellinger)
+    }
+
+
+@registrer_motor("aggregatkube")
+def motor_aggregatkube(voteringer):
+    """Enighetsmatrisen slått opp i aggregatkuben (se aggregatkube.py)."""
+    from aggregatkube import enighetsmatrise_fra_kube, hent_aggregat, ny_kube, oppdater_kube
+    
+    kube = ny_kube()
+    oppdater_kube(kube, voteringer, "2023-2024")
+    matrise = enighetsmatrise_fra_kube(kube, "sesjon", "2023-2024")
+    
+    partipar = []
+    for parti_a in sorted(matrise):
+        for parti_b in sorted(matrise[parti_a]):
+            if parti_a < parti_b:
+                enige, uenige = hent_aggregat(kube, f"{parti_a}-{parti_b}", "sesjon", "2023-2024")
+                partipar.append({
+                    "parti_a": parti_a,
+                    "parti_b": parti_b,
+                    "enighet_prosent": matrise[parti_a][parti_b],
+                    "antall_enige": enige,
+                    "antall_uenige": uenige,
+                    "antall_totalt": enige + uenige
+                })
+    
+    return {"enighetsmatrise": matrise, "partipar": partipar}
+
+
+@registrer_motor("verifisering")
+def motor_verifisering(voteringer):
+    """Den uavhengige referanseberegningen i verifiser_data.py."""
+    from verifiser_data import _prosent, _referanse_sesjon
+    
+    _, par_telling, partier = _referanse_sesjon(voteringer)
+    
+    matrise = {}
+    partipar = []
+    for (parti_a, parti_b), telling in par_telling.items():
+        totalt = telling["enige"] + telling["uenige"]
+        prosent = _prosent(telling["enige"], totalt)
+        matrise.setdefault(parti_a, {})[parti_b] = prosent
+        matrise.setdefault(parti_b, {})[parti_a] = prosent
+        partipar.append({
+            "parti_a": parti_a,
+            "parti_b": parti_b,
+            "enighet_prosent": prosent,
+            "antall_enige": telling["enige"],
+            "antall_uenige": telling["uenige"],
+            "antall_totalt": totalt
+        })
+    
+    partistatistikk = {
+        parti_id: {
+            "antall_voteringer": stat["antall_voteringer"],
+            "antall_for": stat["antall_for"],
+            "antall_mot": stat["antall_mot"],
+            "for_prosent": _prosent(stat["antall_for"], stat["antall_voteringer"]),
+            "vinnersiden_prosent": _prosent(stat["pa_vinnersiden"], stat["antall_voteringer"])
+        }
+        for parti_id, stat in partier.items()
+    }
+    
+    return {"enighetsmatrise": matrise, "partipar": partipar, "partistatistikk": partistatistikk}
+
+
+# ============================================================
+# SAMMENLIGNING
+# ============================================================
+
+def _normaliser(resultat):
+    """Partipar-listen sorteres, siden rekkefølgen ikke er en del av resultatet."""
+    resultat = dict(resultat)
+    if "partipar" in resultat:
+        resultat["partipar"] = sorted(resultat["partipar"], key=lambda p: (p["parti_a"], p["parti_b"]))
+    return resultat
+
+
+def finn_forskjeller(forventet, faktisk, sti="", maks=10):
+    """
+    Finner de første forskjellene mellom to resultater.
+    
+    Returnerer liste med tekstlinjer, f.eks. "partistatistikk.A.for_prosent: 51.2 != 51.3".
+    """
+    forskjeller = []
+    
+    if isinstance(forventet, dict) and isinstance(faktisk, dict):
+        for nokkel in sorted(set(forventet) | set(faktisk), key=str):
+            if len(forskjeller) >= maks:
+                break
+            if nokkel not in faktisk:
+                forskjeller.append(f"{sti}{nokkel}: mangler")
+            elif nokkel not in forventet:
+                forskjeller.append(f"{sti}{nokkel}: finnes ikke i referansen")
+            else:
+                forskjeller.extend(finn_forskjeller(forventet[nokkel], faktisk[nokkel], f"{sti}{nokkel}.", maks - len(forskjeller)))
+    elif isinstance(forventet, list) and isinstance(faktisk, list) and len(forventet) == len(faktisk):
+        for i, (a, b) in enumerate(zip(forventet, faktisk)):
+            if len(forskjeller) >= maks:
+                break
+            forskjeller.extend(finn_forskjeller(a, b, f"{sti}{i}.", maks - len(forskjeller)))
+    elif forventet != faktisk or type(forventet) is not type(faktisk):
+        forskjeller.append(f"{sti.rstrip('.')}: {forventet!r} != {faktisk!r}")
+    
+    return forskjeller[:maks]
+
+
+def _tidtaking(funksjon, voteringer, runder):
+    """Beste tid over flere runder, og resultatet fra siste runde."""
+    beste = None
+    for _ in range(runder):
+        start = time.perf_counter()
+        resultat = funksjon(voteringer)
+        tid = time.perf_counter() - start
+        beste = tid if beste is None else min(beste, tid)
+    return beste, resultat
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def kjor_differensialtest(antall_voteringer=2000, frø=1, runder=3, motorer=None):
+    """
+    Kjører referansen og alle motorer på samme syntetiske data.
+    
+    Parametre:
+        antall_voteringer: Størrelsen på testdataene
+        frø: Frø for de syntetiske dataene
+        runder: Antall kjøringer per motor (beste tid brukes)
+        motorer: Navn på motorene som skal testes (None = alle)
+    
+    Returnerer dict: {motor: {"identisk", "tid_sekunder", "hastighet", "forskjeller"}}
+    """
+    print("=" * 60)
+    print("⚖️  DIFFERENSIALTEST AV ANALYSEMOTORER")
+    print("=" * 60)
+    
+    voteringer = lag_testvoteringer(antall_voteringer, frø)
+    print(f"\n🎲 {len(voteringer)} syntetiske voteringer (frø {frø})")
+    
+    referanse_tid, forventet = _tidtaking(referanse, voteringer, runder)
+    forventet = _normaliser(forventet)
+    print(f"   Referanse: {referanse_tid * 1000:.1f} ms")
+    
+    resultater = {}
+    valgte = motorer if motorer is not None else sorted(MOTORER)
+    
+    print(f"\n   {'Motor':<16} {'Tid':>10} {'Hastighet':>10}  Resultat")
+    print(f"   {'-'*16} {'-'*10} {'-'*10}  {'-'*20}")
+    
+    for navn in valgte:
+        tid, faktisk = _tidtaking(MOTORER[navn], voteringer, runder)
+        faktisk = _normaliser(faktisk)
+        
+        # Bare nøklene motoren leverer sammenlignes
+        forskjeller = finn_forskjeller({k: forventet[k] for k in faktisk}, faktisk)
+        hastighet = referanse_tid / tid if tid > 0 else float("inf")
+        
+        resultater[navn] = {
+            "identisk": not forskjeller,
+            "sammenlignet": sorted(faktisk),
+            "tid_sekunder": round(tid, 4),
+            "hastighet": round(hastighet, 2),
+            "forskjeller": forskjeller
+        }
+        
+        status = "✅ identisk" if not forskjeller else f"❌ {len(forskjeller)} forskjeller"
+        print(f"   {navn:<16} {tid * 1000:>8.1f}ms {hastighet:>9.2f}x  {status}")
+        for linje in forskjeller[:5]:
+            print(f"      • {linje}")
+    
+    return resultater
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    antall = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    resultater = kjor_differensialtest(antall)
+    
+    if not all(r["identisk"] for r in resultater.values()):
+        sys.exit(1)
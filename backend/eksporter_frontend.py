@@ -0,0 +1,246 @@
+# ============================================================
+# STORTINGSVOTERING - EKSPORT TIL FRONTEND
+# ============================================================
+# Dette scriptet lager små, oppdelte datafiler for nettsiden.
+#
+# I stedet for én stor tidsserie_frontend.json lages:
+#   - index.json: liten oversikt med sesjoner, partipar og
+#     filnavn til resten av filene (lastes først)
+#   - sesjon_{sesjon}.{hash}.json: matrise og partistatistikk
+#     for én sesjon
+#   - par_{a}-{b}.{hash}.json: tidsserien for ett partipar
+#   - deltakelse_{sesjon}.{hash}.json: oppmøte per representant
+#
+# Filene er minifisert og kolonnebaserte (lister i stedet for
+# gjentatte nøkler). Filnavnene inneholder en hash av innholdet,
+# så de kan caches "for alltid" av nettleseren. Hver fil lagres
+# også ferdig gzip-komprimert (.gz) for webserveren.
+# ============================================================
+
+import gzip
+import hashlib
+import json
+import os
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+EKSPORT_MAPPE = "frontend"
+INDEKS_FIL = "index.json"
+EKSPORT_VERSJON = 1
+
+# Kolonnene i partistatistikken, i fast rekkefølge
+PARTISTAT_KOLONNER = ["antall_voteringer", "for_prosent", "vinnersiden_prosent"]
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def til_kompakt_json(data):
+    """Serialiserer til minifisert JSON (bytes)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def skriv_fil(mappe, filnavn, innhold):
+    """Skriver innholdet og en gzip-komprimert kopi (.gz)."""
+    filsti = os.path.join(mappe, filnavn)
+    
+    with open(filsti, "wb") as f:
+        f.write(innhold)
+    
+    # mtime=0 gir samme .gz-fil for samme innhold
+    with open(filsti + ".gz", "wb") as f:
+        f.write(gzip.compress(innhold, compresslevel=9, mtime=0))
+
+
+def skriv_hashet_fil(mappe, prefiks, data):
+    """
+    Skriver data til {prefiks}.{hash}.json og returnerer filnavnet.
+    
+    Hashen er de første 10 tegnene av SHA-256 av innholdet, så filnavnet
+    endres bare når innholdet endres.
+    """
+    innhold = til_kompakt_json(data)
+    hash_verdi = hashlib.sha256(innhold).hexdigest()[:10]
+    filnavn = f"{prefiks}.{hash_verdi}.json"
+    
+    skriv_fil(mappe, filnavn, innhold)
+    return filnavn
+
+
+def fjern_gamle_filer(mappe, beholdes):
+    """Sletter hashede filer fra tidligere eksporter som ikke lenger brukes."""
+    beholdes = set(beholdes) | {INDEKS_FIL}
+    
+    for filnavn in os.listdir(mappe):
+        grunnavn = filnavn[:-3] if filnavn.endswith(".gz") else filnavn
+        if grunnavn not in beholdes and grunnavn.endswith(".json"):
+            os.remove(os.path.join(mappe, filnavn))
+
+
+def les_json(filsti):
+    """Leser en JSON-fil, eller returnerer None hvis den ikke finnes."""
+    try:
+        with open(filsti, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ============================================================
+# FILFORMATER
+# ============================================================
+
+def lag_sesjonsfil(analyse):
+    """
+    Gjør en sesjonsanalyse om til kompakt, kolonnebasert format.
+    
+    Matrisen lagres som en liste av rader i samme rekkefølge som
+    "partier" (null på diagonalen og der partiene aldri møttes).
+    """
+    partistatistikk = analyse.get("partistatistikk", {})
+    matrise = analyse.get("enighetsmatrise", {})
+    
+    # Største partier først (flest voteringer)
+    partier = sorted(
+        partistatistikk,
+        key=lambda p: (-partistatistikk[p]["antall_voteringer"], p)
+    )
+    
+    def par_rader(liste):
+        return [
+            [par["parti_a"], par["parti_b"], par["enighet_prosent"], par["antall_totalt"]]
+            for par in liste
+        ]
+    
+    return {
+        "sesjon": analyse["sesjon_id"],
+        "antall_voteringer": analyse["antall_voteringer"],
+        "partier": partier,
+        "enighet": [
+            [matrise.get(a, {}).get(b) for b in partier]
+            for a in partier
+        ],
+        "partistatistikk": {
+            "kolonner": PARTISTAT_KOLONNER,
+            "rader": [
+                [partistatistikk[p].get(k) for k in PARTISTAT_KOLONNER]
+                for p in partier
+            ]
+        },
+        "mest_enige": par_rader(analyse.get("mest_enige", [])),
+        "minst_enige": par_rader(analyse.get("minst_enige", []))
+    }
+
+
+def lag_parfil(partipar, sesjon_data, sesjoner):
+    """
+    Tidsserien for ett partipar.
+    
+    "enighet" har én verdi per sesjon i index.json sin sesjonsliste
+    (null der paret ikke har data), så sesjonsnavnene gjentas ikke.
+    """
+    return {
+        "partipar": partipar,
+        "enighet": [sesjon_data.get(sesjon) for sesjon in sesjoner]
+    }
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def eksporter_frontend(data_mappe="../data", tidsserie=None):
+    """
+    Lager alle frontend-filene i {data_mappe}/frontend/.
+    
+    Parametre:
+        tidsserie: Ferdig resultat fra analyser_alle_sesjoner (leses fra
+                   analyse_tidsserie.json hvis det ikke er gitt)
+    
+    Returnerer innholdet i index.json.
+    """
+    print("\n📦 Eksporterer frontend-data...")
+    
+    if tidsserie is None:
+        tidsserie = les_json(os.path.join(data_mappe, "analyse_tidsserie.json")) or {}
+    
+    # Finn sesjoner med ferdig analyse
+    analysefiler = sorted(
+        f for f in os.listdir(data_mappe)
+        if f.startswith("analyse_") and f.endswith(".json") and f != "analyse_tidsserie.json"
+    )
+    sesjoner = sorted(
+        set(f.replace("analyse_", "").replace(".json", "") for f in analysefiler)
+        | set(s for data in tidsserie.get("tidsserie", {}).values() for s in data)
+    )
+    
+    if not sesjoner:
+        print("   ❌ Fant ingen analyser å eksportere!")
+        return None
+    
+    mappe = os.path.join(data_mappe, EKSPORT_MAPPE)
+    os.makedirs(mappe, exist_ok=True)
+    
+    filer = {"sesjoner": {}, "partipar": {}, "deltakelse": {}}
+    partier = set()
+    
+    # Én fil per sesjon
+    for sesjon_id in sesjoner:
+        analyse = les_json(os.path.join(data_mappe, f"analyse_{sesjon_id}.json"))
+        if analyse:
+            sesjonsfil = lag_sesjonsfil(analyse)
+            partier.update(sesjonsfil["partier"])
+            filer["sesjoner"][sesjon_id] = skriv_hashet_fil(mappe, f"sesjon_{sesjon_id}", sesjonsfil)
+        
+        deltakelse = les_json(os.path.join(data_mappe, f"deltakelse_{sesjon_id}.json"))
+        if deltakelse:
+            filer["deltakelse"][sesjon_id] = skriv_hashet_fil(mappe, f"deltakelse_{sesjon_id}", deltakelse)
+    
+    # Én fil per partipar
+    gjennomsnitt = tidsserie.get("gjennomsnitt", {})
+    partipar_liste = sorted(
+        tidsserie.get("tidsserie", {}),
+        key=lambda p: gjennomsnitt.get(p) or 0,
+        reverse=True
+    )
+    
+    for partipar in partipar_liste:
+        parfil = lag_parfil(partipar, tidsserie["tidsserie"][partipar], sesjoner)
+        filer["partipar"][partipar] = skriv_hashet_fil(mappe, f"par_{partipar}", parfil)
+    
+    # Indeksen lastes først og er liten: bare navn, gjennomsnitt og filnavn
+    indeks = {
+        "versjon": EKSPORT_VERSJON,
+        "sesjoner": sesjoner,
+        "partier": sorted(partier),
+        "partipar": {
+            "navn": partipar_liste,
+            "gjennomsnitt": [gjennomsnitt.get(p) for p in partipar_liste]
+        },
+        "filer": filer
+    }
+    skriv_fil(mappe, INDEKS_FIL, til_kompakt_json(indeks))
+    
+    alle_filer = (
+        list(filer["sesjoner"].values())
+        + list(filer["partipar"].values())
+        + list(filer["deltakelse"].values())
+    )
+    fjern_gamle_filer(mappe, alle_filer)
+    
+    storrelse = os.path.getsize(os.path.join(mappe, INDEKS_FIL))
+    print(f"   ✓ {len(filer['sesjoner'])} sesjonsfiler, {len(filer['partipar'])} partiparfiler")
+    print(f"   ✓ index.json: {storrelse / 1024:.1f} KB")
+    print(f"   💾 Lagret til {mappe}/")
+    
+    return indeks
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    eksporter_frontend()
@@ -0,0 +1,275 @@
+# ============================================================
+# STORTINGSVOTERING - ENDRINGSPUNKTER I PARTISAMARBEID
+# ============================================================
+# Dette scriptet finner NÅR enigheten mellom to partier endret
+# seg, i stedet for bare å sammenligne første og siste sesjon.
+#
+# For hvert partipar lages en serie med én verdi per votering
+# (enige = 1, uenige = 0). Serien deles opp i perioder med
+# binær segmentering (O(n log n)): den deles der enigheten
+# endrer seg mest, og delene deles videre så lenge endringen
+# er tydelig nok.
+#
+# Voteringene slås sammen per dag før segmenteringen, så et
+# bruddpunkt er alltid en dato. Hvert bruddpunkt rapporteres
+# med enighet før/etter, effektstørrelse og nærmeste
+# regjeringsskifte.
+# ============================================================
+
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import date
+
+from analyser_data_v2 import finn_sesjoner, les_api_dato, standpunkt_fra_telling, strom_voteringer, tell_partistemmer
+from hent_alle_sesjoner import REGJERINGSSKIFTER
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+# Straff per bruddpunkt = STRAFF_FAKTOR × ln(antall voteringer).
+# Høyere verdi gir færre (og sikrere) bruddpunkter.
+STRAFF_FAKTOR = 3.0
+
+# Hver periode må inneholde minst så mange voteringer
+MIN_PERIODE = 30
+
+# Bruddpunkter nærmere et regjeringsskifte enn dette kobles til det
+MAKS_DAGER_FRA_SKIFTE = 120
+
+# ============================================================
+# TIDSSERIE PER PARTIPAR
+# ============================================================
+
+def bygg_dagserier(data_mappe="../data", sesjoner=None):
+    """
+    Teller enige/uenige voteringer per partipar per dag.
+    
+    Returnerer dict: {"A-H": [(dato, enige, totalt), ...]} sortert på dato.
+    """
+    if sesjoner is None:
+        sesjoner = finn_sesjoner(data_mappe)
+    
+    telling = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    
+    for sesjon_id in sesjoner:
+        for votering in strom_voteringer(sesjon_id, data_mappe):
+            stemmer = votering.get("stemmer")
+            dato = les_api_dato(votering.get("dato", ""))
+            if not stemmer or not dato:
+                continue
+            
+            dag = dato.strftime("%Y-%m-%d")
+            standpunkt = standpunkt_fra_telling(tell_partistemmer(stemmer))
+            partier = sorted(standpunkt)
+            
+            for i, parti_a in enumerate(partier):
+                for parti_b in partier[i+1:]:
+                    celle = telling[f"{parti_a}-{parti_b}"][dag]
+                    celle[0] += standpunkt[parti_a] == standpunkt[parti_b]
+                    celle[1] += 1
+    
+    return {
+        partipar: [(dag, enige, totalt) for dag, (enige, totalt) in sorted(dager.items())]
+        for partipar, dager in telling.items()
+    }
+
+
+# ============================================================
+# SEGMENTERING
+# ============================================================
+
+def _segmentkostnad(enige, totalt):
+    """
+    -2 × log-likelihood for en periode med konstant enighet.
+    
+    Binomisk modell: enighetsandelen p = enige / totalt.
+    """
+    if totalt == 0 or enige == 0 or enige == totalt:
+        return 0.0
+    uenige = totalt - enige
+    return -2.0 * (enige * math.log(enige / totalt) + uenige * math.log(uenige / totalt))
+
+
+def finn_bruddpunkter(enige, totalt, straff=None, min_periode=MIN_PERIODE):
+    """
+    Finner bruddpunkter med binær segmentering.
+    
+    Serien deles der delingen gir størst forbedring i likelihood. Hver
+    del deles videre så lenge forbedringen er større enn straffen.
+    Med kumulative summer koster hver deling O(n), så totalt blir det
+    O(n log n).
+    
+    Parametre:
+        enige: liste med antall enige per dag
+        totalt: liste med antall voteringer per dag
+        straff: kostnad per bruddpunkt (standard: STRAFF_FAKTOR × ln N)
+        min_periode: minste antall voteringer i hver periode
+    
+    Returnerer liste med indekser (dag-nummer) der en ny periode starter.
+    """
+    # Kumulative summer gir kostnaden for en periode i konstant tid
+    kum_enige = [0]
+    kum_totalt = [0]
+    for e, t in zip(enige, totalt):
+        kum_enige.append(kum_enige[-1] + e)
+        kum_totalt.append(kum_totalt[-1] + t)
+    
+    if straff is None:
+        straff = STRAFF_FAKTOR * math.log(max(kum_totalt[-1], 2))
+    
+    def kostnad(s, t):
+        return _segmentkostnad(kum_enige[t] - kum_enige[s], kum_totalt[t] - kum_totalt[s])
+    
+    bruddpunkter = []
+    perioder = [(0, len(totalt))]
+    
+    while perioder:
+        start, slutt = perioder.pop()
+        hel = kostnad(start, slutt)
+        beste_gevinst, beste_deling = 0.0, None
+        
+        for deling in range(start + 1, slutt):
+            # Begge delene må ha nok voteringer
+            if kum_totalt[deling] - kum_totalt[start] < min_periode:
+                continue
+            if kum_totalt[slutt] - kum_totalt[deling] < min_periode:
+                break
+            
+            gevinst = hel - kostnad(start, deling) - kostnad(deling, slutt)
+            if gevinst > beste_gevinst:
+                beste_gevinst, beste_deling = gevinst, deling
+        
+        if beste_deling is not None and beste_gevinst > straff:
+            bruddpunkter.append(beste_deling)
+            perioder.append((start, beste_deling))
+            perioder.append((beste_deling, slutt))
+    
+    return sorted(bruddpunkter)
+
+
+# ============================================================
+# RAPPORTERING
+# ============================================================
+
+def naermeste_regjeringsskifte(dag):
+    """
+    Finner regjeringsskiftet nærmest en dato ("ÅÅÅÅ-MM-DD").
+    
+    Returnerer None hvis det ikke er noe skifte innen MAKS_DAGER_FRA_SKIFTE.
+    """
+    dato = date.fromisoformat(dag)
+    beste = None
+    
+    for skifte_dato, navn in REGJERINGSSKIFTER:
+        dager = (dato - date.fromisoformat(skifte_dato)).days
+        if abs(dager) <= MAKS_DAGER_FRA_SKIFTE and (beste is None or abs(dager) < abs(beste["dager_etter"])):
+            beste = {"dato": skifte_dato, "regjering": navn, "dager_etter": dager}
+    
+    return beste
+
+
+def beskriv_bruddpunkter(dagserie, bruddpunkter):
+    """
+    Lager en rapport for hvert bruddpunkt i en dagserie.
+    
+    Effektstørrelsen er Cohens h (0.2 = liten, 0.5 = middels,
+    0.8 = stor), som passer for forskjeller mellom to andeler.
+    """
+    grenser = [0] + bruddpunkter + [len(dagserie)]
+    perioder = []
+    
+    for start, slutt in zip(grenser, grenser[1:]):
+        enige = sum(d[1] for d in dagserie[start:slutt])
+        totalt = sum(d[2] for d in dagserie[start:slutt])
+        perioder.append({
+            "fra": dagserie[start][0],
+            "til": dagserie[slutt - 1][0],
+            "enige": enige,
+            "totalt": totalt
+        })
+    
+    rapport = []
+    
+    for før, etter in zip(perioder, perioder[1:]):
+        p1 = før["enige"] / før["totalt"]
+        p2 = etter["enige"] / etter["totalt"]
+        cohens_h = 2 * math.asin(math.sqrt(p2)) - 2 * math.asin(math.sqrt(p1))
+        
+        rapport.append({
+            "dato": etter["fra"],
+            "enighet_foer": round(p1 * 100, 1),
+            "enighet_etter": round(p2 * 100, 1),
+            "endring_prosentpoeng": round((p2 - p1) * 100, 1),
+            "effektstorrelse_h": round(cohens_h, 2),
+            "voteringer_foer": før["totalt"],
+            "voteringer_etter": etter["totalt"],
+            "periode_foer": [før["fra"], før["til"]],
+            "periode_etter": [etter["fra"], etter["til"]],
+            "regjeringsskifte": naermeste_regjeringsskifte(etter["fra"])
+        })
+    
+    return rapport
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def finn_endringspunkter(data_mappe="../data", straff_faktor=STRAFF_FAKTOR, min_periode=MIN_PERIODE):
+    """
+    Finner endringspunkter i enigheten for alle partipar.
+    
+    Lagrer resultatet til endringspunkter.json og returnerer
+    dict: {partipar: [bruddpunkt, ...]}
+    """
+    print("=" * 60)
+    print("🔀 FINNER ENDRINGSPUNKTER I PARTISAMARBEID")
+    print("=" * 60)
+    
+    dagserier = bygg_dagserier(data_mappe)
+    
+    if not dagserier:
+        print("❌ Fant ingen voteringer med stemmedata og dato!")
+        return None
+    
+    resultat = {}
+    
+    for partipar, dagserie in sorted(dagserier.items()):
+        enige = [d[1] for d in dagserie]
+        totalt = [d[2] for d in dagserie]
+        straff = straff_faktor * math.log(max(sum(totalt), 2))
+        
+        bruddpunkter = finn_bruddpunkter(enige, totalt, straff=straff, min_periode=min_periode)
+        resultat[partipar] = beskriv_bruddpunkter(dagserie, bruddpunkter)
+    
+    output_fil = os.path.join(data_mappe, "endringspunkter.json")
+    with open(output_fil, "w", encoding="utf-8") as f:
+        json.dump({
+            "parametre": {"straff_faktor": straff_faktor, "min_periode": min_periode},
+            "partipar": resultat
+        }, f, ensure_ascii=False, indent=2)
+    
+    # Vis de største endringene
+    alle = [(partipar, b) for partipar, liste in resultat.items() for b in liste]
+    alle.sort(key=lambda x: abs(x[1]["endring_prosentpoeng"]), reverse=True)
+    
+    print(f"\n   ✓ {len(alle)} endringspunkter i {len(resultat)} partipar")
+    print("\n   Største endringer:")
+    for partipar, b in alle[:10]:
+        skifte = f" ← {b['regjeringsskifte']['regjering']}" if b["regjeringsskifte"] else ""
+        print(f"   • {b['dato']} {partipar}: {b['enighet_foer']}% → {b['enighet_etter']}%{skifte}")
+    
+    print(f"\n   💾 Lagret til {output_fil}")
+    
+    return resultat
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    finn_endringspunkter()
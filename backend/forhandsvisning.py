@@ -0,0 +1,368 @@
+# ============================================================
+# STORTINGSVOTERING - FORHÅNDSVISNING MED UTVALG
+# ============================================================
+# Å hente en hel sesjon tar timer (ett API-kall per votering).
+# En forhåndsvisning henter i stedet et tilfeldig utvalg av
+# saker innenfor et budsjett av API-kall, og anslår
+# enighetsmatrisen med feilmarginer.
+#
+# Utvalget er stratifisert: sakene deles i grupper etter
+# sakstype og kvartal, og trekkes slik at hver gruppe er med i
+# forhold til hvor stor den er - også underveis, så det som er
+# hentet til enhver tid er et rimelig utvalg. (De første sakene
+# i sakslisten er ikke et tilfeldig utvalg.)
+#
+# Anslaget er en stratifisert forholdsestimator med sakene som
+# enheter (voteringene i samme sak henger sammen):
+#
+#   enighet = Σ N_h · snitt(enige_h) / Σ N_h · snitt(sammenlignbare_h)
+#
+# der N_h er antall saker i gruppe h. Feilmarginen er et 95 %
+# konfidensintervall fra linearisert varians, med korreksjon for
+# endelig populasjon.
+#
+# Underveis skrives anslagene ut med jevne mellomrom, så man ser
+# om de har stabilisert seg (konvergens). Alt lagres i
+# forhandsvisning_{sesjon}.json; voteringsfilen røres ikke.
+# ============================================================
+
+import json
+import math
+import os
+import random
+from collections import defaultdict
+from datetime import datetime
+
+import hent_data_v2
+from analyser_data_v2 import les_api_dato, standpunkt_fra_telling, tell_partistemmer
+from hent_data_v2 import hent_saker, hent_voteringer_for_sak, hent_voteringsresultat, lag_votering
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+# API-kall per forhåndsvisning (0.7 s per kall gir ca. 3.5 minutter)
+STANDARD_BUDSJETT = 300
+
+# Hvor mange ganger anslagene regnes ut underveis
+KONVERGENS_PUNKTER = 10
+
+# 95 % konfidensintervall
+Z_95 = 1.96
+
+# ============================================================
+# STRATIFISERT UTVALG
+# ============================================================
+
+def stratum(sak):
+    """
+    Gruppen en sak hører til: sakstype og kvartal (fra sist_oppdatert_dato).
+    
+    Returnerer f.eks. "lovsak|2024-K1".
+    """
+    dato = les_api_dato(sak.get("sist_oppdatert_dato") or sak.get("dato"))
+    kvartal = f"{dato.year}-K{(dato.month - 1) // 3 + 1}" if dato else "ukjent"
+    return f"{sak.get('sakstype') or 'ukjent'}|{kvartal}"
+
+
+def grupper_saker(saker):
+    """Deler sakene i strata. Returnerer dict: {stratum: [saker]}."""
+    grupper = defaultdict(list)
+    for sak in saker:
+        grupper[stratum(sak)].append(sak)
+    return dict(sorted(grupper.items()))
+
+
+def lag_rekkefolge(saker, frø=None):
+    """
+    Stokker sakene slik at hver begynnelse av listen er et
+    stratifisert utvalg.
+    
+    Innenfor hvert stratum er rekkefølgen tilfeldig. Neste sak tas
+    alltid fra stratumet som ligger lengst bak sin andel av sakene,
+    så et stratum med 10 % av sakene har ca. 10 % av de første n.
+    
+    Returnerer liste med (stratum, sak).
+    """
+    tilfeldig = random.Random(frø)
+    grupper = grupper_saker(saker)
+    for liste in grupper.values():
+        tilfeldig.shuffle(liste)
+    
+    totalt = len(saker)
+    trukket = {h: 0 for h in grupper}
+    rekkefolge = []
+    
+    for n in range(1, totalt + 1):
+        valgt, etterslep = None, None
+        for h, liste in grupper.items():
+            if trukket[h] == len(liste):
+                continue
+            mangler = len(liste) * n / totalt - trukket[h]
+            if etterslep is None or mangler > etterslep:
+                valgt, etterslep = h, mangler
+        
+        rekkefolge.append((valgt, grupper[valgt][trukket[valgt]]))
+        trukket[valgt] += 1
+    
+    return rekkefolge
+
+
+def stratifisert_utvalg(saker, antall, frø=None):
+    """
+    Trekker antall saker tilfeldig, fordelt på sakstype og kvartal
+    i forhold til hvor mange saker hver gruppe har.
+    
+    Parametre:
+        frø: Frø for trekningen (samme frø gir samme utvalg)
+    
+    Returnerer listen med utvalgte saker.
+    """
+    return [sak for _, sak in lag_rekkefolge(saker, frø)[:antall]]
+
+
+# ============================================================
+# ANSLAG MED FEILMARGIN
+# ============================================================
+
+def tell_sak(voteringer):
+    """
+    Teller enighet per partipar i voteringene til én sak.
+    
+    Returnerer dict: {(parti_a, parti_b): [enige, sammenlignbare]}
+    """
+    telling = {}
+    
+    for votering in voteringer:
+        if not votering.get("stemmer"):
+            continue
+        standpunkt = standpunkt_fra_telling(tell_partistemmer(votering["stemmer"]))
+        partier = sorted(standpunkt)
+        for i, parti_a in enumerate(partier):
+            for parti_b in partier[i+1:]:
+                rad = telling.setdefault((parti_a, parti_b), [0, 0])
+                rad[0] += standpunkt[parti_a] == standpunkt[parti_b]
+                rad[1] += 1
+    
+    return telling
+
+
+def _varians(verdier):
+    """Utvalgsvarians (n - 1 i nevneren)."""
+    snitt = sum(verdier) / len(verdier)
+    return sum((v - snitt) ** 2 for v in verdier) / (len(verdier) - 1)
+
+
+def estimer_enighet(utvalg, populasjon):
+    """
+    Anslår enigheten mellom partiene fra et stratifisert utvalg av saker.
+    
+    Parametre:
+        utvalg: {stratum: [tell_sak(...) for hver hentet sak]}
+        populasjon: {stratum: antall saker i sesjonen}
+    
+    Strata uten hentede saker er ikke med i anslaget. Strata med bare
+    én sak får den felles variansen innenfor de andre strataene.
+    
+    Returnerer liste med dict per partipar: parti_a, parti_b,
+    enighet_prosent, feilmargin (prosentpoeng, 95 %) og
+    antall_voteringer i utvalget.
+    """
+    strata = {h: saker for h, saker in utvalg.items() if saker}
+    alle_par = sorted({par for saker in strata.values() for sak in saker for par in sak})
+    resultat = []
+    
+    for par in alle_par:
+        sum_enige = sum_sammenlignbare = 0.0
+        for h, saker in strata.items():
+            vekt = populasjon[h] / len(saker)
+            sum_enige += vekt * sum(sak.get(par, (0, 0))[0] for sak in saker)
+            sum_sammenlignbare += vekt * sum(sak.get(par, (0, 0))[1] for sak in saker)
+        
+        if not sum_sammenlignbare:
+            continue
+        andel = sum_enige / sum_sammenlignbare
+        
+        # Linearisering: residualene e - andel · s per sak
+        residualer = {
+            h: [sak.get(par, (0, 0))[0] - andel * sak.get(par, (0, 0))[1] for sak in saker]
+            for h, saker in strata.items()
+        }
+        frihetsgrader = sum(len(r) - 1 for r in residualer.values())
+        if frihetsgrader:
+            felles = sum(_varians(r) * (len(r) - 1) for r in residualer.values() if len(r) > 1) / frihetsgrader
+        else:
+            alle = [e for r in residualer.values() for e in r]
+            felles = _varians(alle) if len(alle) > 1 else None
+        
+        feilmargin = None
+        if felles is not None:
+            varians = 0.0
+            for h, r in residualer.items():
+                n, N = len(r), populasjon[h]
+                varians += N * N * (1 - n / N) * (_varians(r) if n > 1 else felles) / n
+            feilmargin = round(Z_95 * math.sqrt(varians) / sum_sammenlignbare * 100, 1)
+        
+        resultat.append({
+            "parti_a": par[0],
+            "parti_b": par[1],
+            "enighet_prosent": round(andel * 100, 1),
+            "feilmargin": feilmargin,
+            "antall_voteringer": sum(sak.get(par, (0, 0))[1] for saker in strata.values() for sak in saker)
+        })
+    
+    return resultat
+
+
+def som_matrise(partipar, felt):
+    """Gjør en liste fra estimer_enighet om til {parti_a: {parti_b: verdi}}."""
+    matrise = defaultdict(dict)
+    for par in partipar:
+        matrise[par["parti_a"]][par["parti_b"]] = par[felt]
+        matrise[par["parti_b"]][par["parti_a"]] = par[felt]
+    return dict(matrise)
+
+
+def konvergenspunkt(partipar, forrige, api_kall, antall_saker, antall_voteringer):
+    """
+    Oppsummerer anslagene på ett tidspunkt.
+    
+    endring er gjennomsnittlig endring (prosentpoeng) i enigheten
+    siden forrige punkt, for partipar som var med begge gangene.
+    """
+    marginer = [p["feilmargin"] for p in partipar if p["feilmargin"] is not None]
+    naa = {(p["parti_a"], p["parti_b"]): p["enighet_prosent"] for p in partipar}
+    felles = [par for par in naa if par in forrige]
+    
+    return {
+        "api_kall": api_kall,
+        "saker": antall_saker,
+        "voteringer": antall_voteringer,
+        "snitt_feilmargin": round(sum(marginer) / len(marginer), 1) if marginer else None,
+        "maks_feilmargin": max(marginer) if marginer else None,
+        "endring": round(sum(abs(naa[p] - forrige[p]) for p in felles) / len(felles), 2) if felles else None
+    }
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def forhandsvis_sesjon(sesjon_id, data_mappe="../data", budsjett=STANDARD_BUDSJETT, frø=None):
+    """
+    Henter et stratifisert utvalg av saker innenfor et budsjett av
+    API-kall og anslår enighetsmatrisen med feilmarginer.
+    
+    Parametre:
+        budsjett: Største antall API-kall (sakslisten medregnet)
+        frø: Frø for trekningen (standard: tilfeldig)
+    
+    En sak hentes bare hvis alle voteringene i den får plass i
+    budsjettet; ellers stopper innhentingen der.
+    
+    Returnerer dict som lagres i forhandsvisning_{sesjon_id}.json,
+    eller None hvis sakslisten ikke kunne hentes.
+    """
+    print("=" * 60)
+    print(f"🔭 FORHÅNDSVISNING AV SESJON {sesjon_id} ({budsjett} API-kall)")
+    print("=" * 60)
+    
+    start_kall = hent_data_v2.antall_kall
+    
+    def brukt():
+        return hent_data_v2.antall_kall - start_kall
+    
+    saker = hent_saker(sesjon_id)
+    if not saker:
+        print("❌ Kunne ikke hente saker. Sjekk internettforbindelsen.")
+        return None
+    
+    rekkefolge = lag_rekkefolge(saker, frø)
+    populasjon = {h: len(liste) for h, liste in grupper_saker(saker).items()}
+    print(f"   ℹ️  {len(saker)} saker i {len(populasjon)} strata (sakstype og kvartal)")
+    
+    utvalg = defaultdict(list)
+    utvalgte_saker = []
+    antall_voteringer = 0
+    konvergens = []
+    forrige = {}
+    neste_punkt = budsjett / KONVERGENS_PUNKTER
+    
+    print("\n📈 Anslag underveis:")
+    for h, sak in rekkefolge:
+        if brukt() >= budsjett:
+            break
+        
+        voteringer = hent_voteringer_for_sak(sak.get("id")) or []
+        if len(voteringer) > budsjett - brukt():
+            print(f"   ℹ️  Sak {sak.get('id')} har {len(voteringer)} voteringer, mer enn det er igjen av budsjettet")
+            break
+        
+        hentet = [lag_votering(sak, v, hent_voteringsresultat(v.get("votering_id")) or []) for v in voteringer]
+        utvalg[h].append(tell_sak(hentet))
+        utvalgte_saker.append(sak.get("id"))
+        antall_voteringer += len(hentet)
+        
+        if brukt() >= neste_punkt:
+            partipar = estimer_enighet(utvalg, populasjon)
+            punkt = konvergenspunkt(partipar, forrige, brukt(), len(utvalgte_saker), antall_voteringer)
+            konvergens.append(punkt)
+            forrige = {(p["parti_a"], p["parti_b"]): p["enighet_prosent"] for p in partipar}
+            while neste_punkt <= brukt():
+                neste_punkt += budsjett / KONVERGENS_PUNKTER
+            _skriv_punkt(punkt)
+    
+    partipar = estimer_enighet(utvalg, populasjon)
+    if not konvergens or konvergens[-1]["api_kall"] != brukt():
+        punkt = konvergenspunkt(partipar, forrige, brukt(), len(utvalgte_saker), antall_voteringer)
+        konvergens.append(punkt)
+        _skriv_punkt(punkt)
+    
+    resultat = {
+        "sesjon_id": sesjon_id,
+        "generert": datetime.now().isoformat(),
+        "budsjett": budsjett,
+        "api_kall": brukt(),
+        "frø": frø,
+        "antall_saker": len(saker),
+        "antall_saker_hentet": len(utvalgte_saker),
+        "antall_voteringer": antall_voteringer,
+        "strata": {h: {"saker": populasjon[h], "hentet": len(utvalg.get(h, []))} for h in populasjon},
+        "enighetsmatrise": som_matrise(partipar, "enighet_prosent"),
+        "feilmargin": som_matrise(partipar, "feilmargin"),
+        "partipar": partipar,
+        "konvergens": konvergens,
+        "utvalgte_saker": utvalgte_saker
+    }
+    
+    filsti = os.path.join(data_mappe, f"forhandsvisning_{sesjon_id}.json")
+    os.makedirs(data_mappe, exist_ok=True)
+    with open(filsti, "w", encoding="utf-8") as f:
+        json.dump(resultat, f, ensure_ascii=False, indent=2)
+    
+    uten_utvalg = sum(1 for h in populasjon if not utvalg.get(h))
+    print(f"\n   ✓ {len(utvalgte_saker)} av {len(saker)} saker, {antall_voteringer} voteringer, {brukt()} API-kall")
+    if uten_utvalg:
+        print(f"   ⚠️  {uten_utvalg} strata uten hentede saker er ikke med i anslaget")
+    print(f"   💾 Lagret til {filsti}")
+    
+    return resultat
+
+
+def _skriv_punkt(punkt):
+    snitt = "-" if punkt["snitt_feilmargin"] is None else f"±{punkt['snitt_feilmargin']}"
+    maks = "-" if punkt["maks_feilmargin"] is None else f"±{punkt['maks_feilmargin']}"
+    endring = "-" if punkt["endring"] is None else punkt["endring"]
+    print(f"   {punkt['api_kall']:>5} kall  {punkt['saker']:>4} saker  {punkt['voteringer']:>5} voteringer  "
+          f"feilmargin snitt {snitt} / maks {maks}  endring {endring}")
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    sesjon = sys.argv[1] if len(sys.argv) > 1 else hent_data_v2.STANDARD_SESJON
+    forhandsvis_sesjon(sesjon)
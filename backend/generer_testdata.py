@@ -0,0 +1,400 @@
+# ============================================================
+# STORTINGSVOTERING - SYNTETISKE TESTDATA
+# ============================================================
+# Dette scriptet lager realistiske, men oppdiktede sesjoner i
+# nøyaktig samme format som voteringer_{sesjon}.json og
+# partier_{sesjon}.json, for å teste hvordan analysene tåler
+# store datamengder.
+#
+# Modellen:
+#   - partiene har en plass på en venstre-høyre-akse; i hver
+#     votering er partiene for eller mot etter hvilken side av
+#     et tilfeldig skille de ligger (noen voteringer er enstemmige)
+#   - representantene følger partilinjen med en gitt sannsynlighet
+#     (partidisiplin), og er borte med en gitt sannsynlighet
+#   - noen representanter bytter parti (eller blir uavhengige)
+#     underveis
+#   - voteringene fordeles på møtedager (tirsdag-torsdag)
+#     mellom start- og sluttdato
+#
+# Filene skrives fortløpende, én votering om gangen, så et
+# datasett med 100 000 voteringer lages uten å ligge i minnet.
+# ============================================================
+
+import json
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+# (id, navn, seter 2021-2025, plass på venstre-høyre-aksen)
+PARTIER = [
+    ("R", "Rødt", 8, -3.0),
+    ("SV", "Sosialistisk Venstreparti", 13, -2.2),
+    ("MDG", "Miljøpartiet De Grønne", 3, -1.6),
+    ("A", "Arbeiderpartiet", 48, -0.9),
+    ("Sp", "Senterpartiet", 28, -0.3),
+    ("PF", "Pasientfokus", 1, -0.5),
+    ("KrF", "Kristelig Folkeparti", 3, 0.8),
+    ("V", "Venstre", 8, 1.0),
+    ("H", "Høyre", 36, 2.0),
+    ("FrP", "Fremskrittspartiet", 21, 2.8),
+]
+
+FYLKER = ["Os", "Ak", "Øf", "He", "Op", "Bu", "Vf", "Te", "AA", "VA",
+          "Ro", "Ho", "SF", "MR", "ST", "No", "Tr", "Fi"]
+
+FORNAVN = ["Anne", "Per", "Kari", "Ola", "Ingrid", "Lars", "Marit", "Jon", "Hilde",
+           "Erik", "Silje", "Knut", "Tone", "Bjørn", "Linn", "Håkon", "Siri", "Even"]
+ETTERNAVN = ["Hansen", "Johansen", "Olsen", "Larsen", "Andersen", "Pedersen", "Nilsen",
+             "Kristiansen", "Jensen", "Karlsen", "Berg", "Haugen", "Hagen", "Bakken",
+             "Solberg", "Strand", "Lie", "Dahl", "Lund", "Moen", "Sæther"]
+
+SAKSTYPER = [("alminneligsak", 0.6), ("budsjett", 0.25), ("lovsak", 0.15)]
+
+# Andel voteringer der (nesten) alle partier stemmer likt
+ANDEL_ENSTEMMIGE = 0.35
+
+# ============================================================
+# REPRESENTANTER
+# ============================================================
+
+def fordel_seter(antall_representanter):
+    """
+    Fordeler setene på partiene etter dagens størrelse (største rest).
+    
+    Returnerer dict: {parti_id: antall seter}
+    """
+    totalt = sum(p[2] for p in PARTIER)
+    andeler = {p[0]: antall_representanter * p[2] / totalt for p in PARTIER}
+    seter = {p: int(a) for p, a in andeler.items()}
+    
+    for parti_id in sorted(andeler, key=lambda p: seter[p] - andeler[p]):
+        if sum(seter.values()) >= antall_representanter:
+            break
+        seter[parti_id] += 1
+    
+    return seter
+
+
+def lag_representanter(antall_representanter, tilfeldig, fravaer=0.1):
+    """
+    Lager representantene med navn, fylke, parti og personlig fraværsrate.
+    
+    Returnerer liste med dict.
+    """
+    representanter = []
+    
+    for parti_id, antall in fordel_seter(antall_representanter).items():
+        for _ in range(antall):
+            nummer = len(representanter) + 1
+            etternavn = tilfeldig.choice(ETTERNAVN)
+            representanter.append({
+                "id": f"{etternavn[:3].upper()}{nummer}",
+                "fornavn": tilfeldig.choice(FORNAVN),
+                "etternavn": etternavn,
+                "fylke": tilfeldig.choice(FYLKER),
+                "parti": parti_id,
+                # Noen er mye borte, de fleste lite
+                "fravaer": min(0.9, tilfeldig.expovariate(1 / fravaer)) if fravaer > 0 else 0.0
+            })
+    
+    return representanter
+
+
+def _representant_json(rep, parti_id):
+    """Representanten som ferdig JSON-tekst (gjenbrukes i alle voteringer)."""
+    return json.dumps({
+        "id": rep["id"],
+        "fornavn": rep["fornavn"],
+        "etternavn": rep["etternavn"],
+        "fylke": {"id": rep["fylke"]},
+        "parti": {"id": parti_id}
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+# ============================================================
+# DATOER
+# ============================================================
+
+def sesjonsdatoer(sesjon_id):
+    """Standard start og slutt for en sesjon: 1. oktober til 20. juni."""
+    start = int(sesjon_id.split("-")[0])
+    return date(start, 10, 1), date(start + 1, 6, 20)
+
+
+def mootedager(start, slutt):
+    """Alle tirsdager, onsdager og torsdager mellom start og slutt."""
+    dager = []
+    dag = start
+    while dag <= slutt:
+        if dag.weekday() in (1, 2, 3):
+            dager.append(dag)
+        dag += timedelta(days=1)
+    return dager
+
+
+def api_dato(tidspunkt):
+    """
+    Lokal tid til API-formatet "/Date(ms+0100)/".
+    
+    Sommertid er forenklet til april-oktober.
+    """
+    timer = 2 if 4 <= tidspunkt.month <= 10 else 1
+    utc = tidspunkt.replace(tzinfo=timezone(timedelta(hours=timer)))
+    return f"/Date({int(utc.timestamp() * 1000)}+0{timer}00)/"
+
+
+# ============================================================
+# GENERERING
+# ============================================================
+
+def generer_sesjon(
+    sesjon_id,
+    data_mappe="../data",
+    antall_voteringer=2000,
+    voteringer_per_sak=3.0,
+    representanter=None,
+    antall_representanter=169,
+    partidisiplin=0.97,
+    fravaer=0.1,
+    avstar=0.005,
+    partiskifter=2,
+    startdato=None,
+    sluttdato=None,
+    tekstkoder=0.0,
+    frø=1
+):
+    """
+    Lager én syntetisk sesjon og skriver den fortløpende til fil.
+    
+    Parametre:
+        antall_voteringer: Antall voteringer i sesjonen
+        voteringer_per_sak: Gjennomsnittlig antall voteringer per sak
+        representanter: Representanter fra lag_representanter (deles
+                        mellom sesjoner, så partiskifter varer)
+        partidisiplin: Sannsynlighet for å stemme som partiet
+        fravaer: Gjennomsnittlig andel voteringer en representant er borte
+        avstar: Sannsynlighet for å avstå
+        partiskifter: Antall representanter som bytter parti i sesjonen
+        startdato, sluttdato: Periode for voteringene (date)
+        tekstkoder: Andel stemmer med tekstkode ("for") i stedet for tall
+        frø: Frø for tilfeldighetene
+    
+    Returnerer dict med antall voteringer, saker og filsti.
+    """
+    tilfeldig = random.Random(f"{frø}-{sesjon_id}")
+    if representanter is None:
+        representanter = lag_representanter(antall_representanter, random.Random(frø), fravaer)
+    
+    if startdato is None or sluttdato is None:
+        standard_start, standard_slutt = sesjonsdatoer(sesjon_id)
+        startdato = startdato or standard_start
+        sluttdato = sluttdato or standard_slutt
+    
+    posisjon = {p[0]: p[3] for p in PARTIER}
+    posisjon["Uav"] = 0.0
+    
+    # Partiskifter: hvem, når (indeks i voteringsrekkefølgen) og til hva
+    skifter = []
+    for rep in tilfeldig.sample(representanter, min(partiskifter, len(representanter))):
+        nytt_parti = "Uav" if tilfeldig.random() < 0.6 else tilfeldig.choice([p[0] for p in PARTIER])
+        if nytt_parti != rep["parti"]:
+            skifter.append((tilfeldig.randrange(antall_voteringer), rep, nytt_parti))
+    skifter.sort(key=lambda s: s[0])
+    
+    # Ferdig JSON for hver representant (lages på nytt ved partiskifte)
+    rep_json = {rep["id"]: _representant_json(rep, rep["parti"]) for rep in representanter}
+    
+    # Voteringene fordeles jevnt på møtedagene
+    dager = mootedager(startdato, sluttdato) or [startdato]
+    start_aar = int(sesjon_id.split("-")[0])
+    votering_id = (start_aar - 2000) * 1000000
+    sak_id = (start_aar - 2000) * 100000
+    
+    sakstyper, vekter = zip(*SAKSTYPER)
+    kode_tekst = {1: '"for"', 2: '"mot"', 3: '"ikke_tilstede"', 4: '"avstar"', 5: '"ikke_avgitt"'}
+    
+    os.makedirs(data_mappe, exist_ok=True)
+    filsti = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
+    
+    antall_saker = 0
+    igjen_i_sak = 0
+    
+    with open(filsti, "w", encoding="utf-8") as f:
+        f.write("[")
+        
+        for nummer in range(antall_voteringer):
+            while skifter and skifter[0][0] <= nummer:
+                _, rep, nytt_parti = skifter.pop(0)
+                rep["parti"] = nytt_parti
+                rep_json[rep["id"]] = _representant_json(rep, nytt_parti)
+            
+            # Ny sak?
+            if igjen_i_sak == 0:
+                sak_id += 1
+                antall_saker += 1
+                igjen_i_sak = max(1, round(tilfeldig.expovariate(1 / voteringer_per_sak)))
+                sakstype = tilfeldig.choices(sakstyper, vekter)[0]
+                sak_tittel = f"Innstilling om {tilfeldig.choice(['skatt', 'helse', 'skole', 'vei', 'klima', 'forsvar', 'landbruk'])} ({sak_id})"
+            igjen_i_sak -= 1
+            votering_id += 1
+            
+            # Partistandpunkt: enstemmig, eller etter et skille på aksen
+            if tilfeldig.random() < ANDEL_ENSTEMMIGE:
+                side = tilfeldig.choice((1, 2))
+                standpunkt = {p: side for p in posisjon}
+            else:
+                skille = tilfeldig.gauss(0.0, 1.5)
+                retning = tilfeldig.choice((1, 2))
+                standpunkt = {
+                    p: retning if (pos + tilfeldig.gauss(0.0, 0.4)) > skille else 3 - retning
+                    for p, pos in posisjon.items()
+                }
+            
+            deler = []
+            antall_for = antall_mot = 0
+            
+            for rep in representanter:
+                terning = tilfeldig.random()
+                if terning < rep["fravaer"]:
+                    kode = 3
+                elif terning < rep["fravaer"] + avstar:
+                    kode = 4
+                elif tilfeldig.random() < partidisiplin:
+                    kode = standpunkt[rep["parti"]]
+                else:
+                    kode = 3 - standpunkt[rep["parti"]]
+                
+                if kode == 1:
+                    antall_for += 1
+                elif kode == 2:
+                    antall_mot += 1
+                
+                verdi = kode_tekst[kode] if tekstkoder and tilfeldig.random() < tekstkoder else kode
+                deler.append(f'{{"representant":{rep_json[rep["id"]]},"votering":{verdi}}}')
+            
+            dag = dager[nummer * len(dager) // antall_voteringer]
+            tidspunkt = datetime(dag.year, dag.month, dag.day, 10) + timedelta(minutes=(nummer % 60) * 5)
+            
+            hode = json.dumps({
+                "sak_id": sak_id,
+                "sak_tittel": sak_tittel,
+                "sakstype": sakstype,
+                "votering_id": votering_id,
+                "votering_tema": f"Forslag nr. {nummer % 40 + 1}",
+                "antall_for": antall_for,
+                "antall_mot": antall_mot,
+                "vedtatt": antall_for > antall_mot,
+                "dato": api_dato(tidspunkt)
+            }, ensure_ascii=False, separators=(",", ":"))
+            
+            f.write(",\n" if nummer else "\n")
+            f.write(hode[:-1] + ',"stemmer":[' + ",".join(deler) + "]}")
+        
+        f.write("\n]\n")
+    
+    # Partilisten i samme format som hent_partier
+    partier = [{"id": p[0], "navn": p[1], "representert_parti": True} for p in PARTIER]
+    with open(os.path.join(data_mappe, f"partier_{sesjon_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(partier, f, ensure_ascii=False, indent=2)
+    
+    return {"sesjon_id": sesjon_id, "antall_voteringer": antall_voteringer, "antall_saker": antall_saker, "filsti": filsti}
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def generer_datasett(
+    data_mappe="../data",
+    forste_sesjon="2021-2022",
+    antall_sesjoner=1,
+    antall_voteringer=2000,
+    antall_representanter=169,
+    fravaer=0.1,
+    frø=1,
+    **innstillinger
+):
+    """
+    Lager flere sammenhengende sesjoner med de samme representantene.
+    
+    Partiskifter i én sesjon gjelder også i de neste.
+    Øvrige innstillinger sendes videre til generer_sesjon.
+    
+    Returnerer liste med resultatene fra generer_sesjon.
+    """
+    print("=" * 60)
+    print("🧪 LAGER SYNTETISKE TESTDATA")
+    print("=" * 60)
+    
+    representanter = lag_representanter(antall_representanter, random.Random(frø), fravaer)
+    start_aar = int(forste_sesjon.split("-")[0])
+    resultater = []
+    start = datetime.now()
+    
+    for i in range(antall_sesjoner):
+        sesjon_id = f"{start_aar + i}-{start_aar + i + 1}"
+        resultat = generer_sesjon(
+            sesjon_id,
+            data_mappe,
+            antall_voteringer=antall_voteringer,
+            representanter=representanter,
+            fravaer=fravaer,
+            frø=frø,
+            **innstillinger
+        )
+        resultater.append(resultat)
+        storrelse = os.path.getsize(resultat["filsti"]) / (1024 * 1024)
+        print(f"   ✓ {sesjon_id}: {resultat['antall_voteringer']} voteringer, "
+              f"{resultat['antall_saker']} saker ({storrelse:.0f} MB)")
+    
+    tid = (datetime.now() - start).total_seconds()
+    totalt = sum(r["antall_voteringer"] for r in resultater)
+    print(f"\n   ✓ {totalt} voteringer på {tid:.1f} sekunder")
+    print(f"   💾 Lagret til {data_mappe}/")
+    
+    return resultater
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Lager syntetiske voteringsdata for testing.")
+    parser.add_argument("--data-mappe", default="../data")
+    parser.add_argument("--forste-sesjon", default="2021-2022")
+    parser.add_argument("--sesjoner", type=int, default=1, help="antall sesjoner")
+    parser.add_argument("--voteringer", type=int, default=2000, help="voteringer per sesjon")
+    parser.add_argument("--voteringer-per-sak", type=float, default=3.0)
+    parser.add_argument("--representanter", type=int, default=169)
+    parser.add_argument("--partidisiplin", type=float, default=0.97)
+    parser.add_argument("--fravaer", type=float, default=0.1)
+    parser.add_argument("--partiskifter", type=int, default=2, help="per sesjon")
+    parser.add_argument("--tekstkoder", type=float, default=0.0, help="andel stemmer med tekstkode")
+    parser.add_argument("--startdato", type=date.fromisoformat, help="ÅÅÅÅ-MM-DD (standard: 1. oktober)")
+    parser.add_argument("--sluttdato", type=date.fromisoformat, help="ÅÅÅÅ-MM-DD (standard: 20. juni)")
+    parser.add_argument("--frø", type=int, default=1)
+    args = parser.parse_args()
+    
+    generer_datasett(
+        data_mappe=args.data_mappe,
+        forste_sesjon=args.forste_sesjon,
+        antall_sesjoner=args.sesjoner,
+        antall_voteringer=args.voteringer,
+        antall_representanter=args.representanter,
+        fravaer=args.fravaer,
+        frø=args.frø,
+        voteringer_per_sak=args.voteringer_per_sak,
+        partidisiplin=args.partidisiplin,
+        partiskifter=args.partiskifter,
+        tekstkoder=args.tekstkoder,
+        startdato=args.startdato,
+        sluttdato=args.sluttdato
+    )
@@ -6,9 +6,11 @@
 #
 # ⚠️  VIKTIG: Dette tar LANG tid (flere timer)!
 #     For testing, bruk maks_saker_per_sesjon=5
+#     For en henting som tåler avbrudd og kan fordeles på
+#     flere prosesser, se arbeidsko.py
 # ============================================================
 
-from hent_data import samle_voteringsdata, hent_fra_api
+from hent_data_v2 import samle_voteringsdata, hent_fra_api
 import json
 import os
 from datetime import datetime
@@ -35,6 +37,16 @@ ALLE_SESJONER = [
     "2024-2025",  # Støre I (pågående)
 ]
 
+# Regjeringsskiftene fra kommentarene over, med tiltredelsesdato.
+# Brukes til å sette endringer i partisamarbeid i sammenheng.
+REGJERINGSSKIFTER = [
+    ("2013-10-16", "Solberg I (H-FrP, støtte fra V-KrF)"),
+    ("2018-01-17", "Solberg II (H-FrP-V)"),
+    ("2019-01-22", "Solberg III (H-FrP-V-KrF)"),
+    ("2020-01-24", "Solberg IV (H-V-KrF, FrP ut)"),
+    ("2021-10-14", "Støre I (Ap-Sp)"),
+]
+
 
 def hent_alle_sesjoner(fra_sesjon=None, til_sesjon=None, maks_saker_per_sesjon=None):
     """
@@ -43,7 +55,8 @@ def hent_alle_sesjoner(fra_sesjon=None, til_sesjon=None, maks_saker_per_sesjon=N
     Parametre:
         fra_sesjon: Start fra denne sesjonen (f.eks. "2017-2018")
         til_sesjon: Stopp etter denne sesjonen
-        maks_saker_per_sesjon: Begrens antall saker (for testing)
+        maks_saker_per_sesjon: Begrens antall saker (for testing). Sakene
+                               trekkes stratifisert, se samle_voteringsdata.
     
     Eksempler:
         # Hent alt fra 2017 til nå
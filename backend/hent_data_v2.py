@@ -14,13 +14,22 @@ import requests
 import json
 import time
 import os
+import threading
 from datetime import datetime
 
+from lagringsformat import les_voteringsfil, skriv_voteringsfil
+from profilering import Kjoring
+from sjekksummer import endringer_siden_innhenting, lag_sjekksummer, lagre_sjekksummer
+
 # ============================================================
 # KONFIGURASJON
 # ============================================================
 
-API_BASE_URL = "https://data.stortinget.no/eksport"
+# Kan overstyres (f.eks. til en lokal stand-in, se api_standin.py)
+API_BASE_URL = os.environ.get("STORTINGET_API_URL", "https://data.stortinget.no/eksport")
+
+# Stortinget tillater 100 kall per minutt, så 0.7 sekunder mellom
+# hvert kall er trygt. Gjelder samlet for alle tråder i prosessen.
 PAUSE_MELLOM_KALL = 0.7
 STANDARD_SESJON = "2023-2024"
 
@@ -28,13 +37,50 @@ STANDARD_SESJON = "2023-2024"
 TIMEOUT_SEKUNDER = 60  # Økt fra 30 til 60
 MAKS_FORSØK = 3        # Antall forsøk ved feil
 
+# Felles hastighetsbegrensning for alle API-kall
+_kall_laas = threading.Lock()
+_neste_kall = 0.0
+antall_kall = 0
+
+# Valgfri hastighetsbegrensning som deles med andre prosesser (se
+# arbeidsko.py). Er den satt, brukes den i stedet for pausen over.
+_felles_tur = None
+
 # ============================================================
 # HJELPEFUNKSJONER
 # ============================================================
 
+def vent_paa_tur():
+    """
+    Venter til neste API-kall er tillatt.
+    
+    Kallene fordeles jevnt med PAUSE_MELLOM_KALL mellom hver start,
+    også når flere tråder henter samtidig. Da kan svarene hentes
+    parallelt uten at vi går over Stortingets grense.
+    """
+    global _neste_kall, antall_kall
+    
+    if _felles_tur is not None:
+        with _kall_laas:
+            antall_kall += 1
+        _felles_tur()
+        return
+    
+    with _kall_laas:
+        naa = time.monotonic()
+        start = max(naa, _neste_kall)
+        _neste_kall = start + PAUSE_MELLOM_KALL
+        antall_kall += 1
+    
+    if start > naa:
+        time.sleep(start - naa)
+
+
 def hent_fra_api(endpoint, parametre=None, forsøk=1):
     """
     Henter data fra Stortingets API med retry-logikk.
+    
+    Alle kall går gjennom den felles hastighetsbegrensningen.
     """
     url = f"{API_BASE_URL}/{endpoint}"
     
@@ -42,6 +88,8 @@ def hent_fra_api(endpoint, parametre=None, forsøk=1):
         parametre = {}
     parametre["format"] = "json"
     
+    vent_paa_tur()
+    
     try:
         respons = requests.get(url, params=parametre, timeout=TIMEOUT_SEKUNDER)
         
@@ -88,6 +136,16 @@ def lagre_til_json(data, filnavn):
     print(f"✓ Lagret data til {filnavn}")
 
 
+def bruk_felles_tur(vent):
+    """
+    Lar alle API-kall i prosessen vente på vent() i stedet for den
+    lokale pausen, f.eks. en hastighetsbegrensning som deles med
+    andre prosesser. None slår av igjen.
+    """
+    global _felles_tur
+    _felles_tur = vent
+
+
 # ============================================================
 # DATAHENTING-FUNKSJONER
 # ============================================================
@@ -117,112 +175,214 @@ def hent_saker(sesjon_id):
 
 
 def hent_voteringer_for_sak(sak_id):
-    """Henter alle voteringer for en sak."""
+    """
+    Henter alle voteringer for en sak.
+    
+    Returnerer None hvis API-et ikke svarte (se hent_voteringsresultat).
+    """
     data = hent_fra_api("voteringer", {"sakid": sak_id})
     
-    if data and "votering_liste" in data:
-        return data["votering_liste"]
-    return []
+    if data is None:
+        return None
+    return data.get("votering_liste") or []
 
 
 def hent_voteringsresultat(votering_id):
-    """Henter detaljert resultat for én votering."""
+    """
+    Henter detaljert resultat for én votering.
+    
+    Returnerer None hvis API-et ikke svarte, så en feilet henting
+    ikke forveksles med en votering uten registrerte stemmer.
+    """
     data = hent_fra_api("voteringsresultat", {"voteringid": votering_id})
     
-    if data and "voteringsresultat_liste" in data:
-        return data["voteringsresultat_liste"]
-    return []
+    if data is None:
+        return None
+    return data.get("voteringsresultat_liste") or []
+
+
+def hent_voteringer_for_saker(saker, kjente=None, feilede=None):
+    """
+    Henter voteringer og detaljerte stemmer for en liste med saker.
+    
+    Parametre:
+        saker: Sakene som skal hentes
+        kjente: votering_id-er (som strenger) som allerede er lagret.
+                Voteringslisten hentes fortsatt for hver sak, men
+                stemmene hentes bare for voteringer som ikke er kjent.
+        feilede: Liste som fylles med ID-ene til sakene som ikke kunne
+                 hentes helt (voteringslisten eller noen av stemmene)
+    
+    Returnerer liste med voteringer i formatet som lagres i
+    voteringer_{sesjon}.json. Voteringer der stemmene ikke kunne
+    hentes er ikke med, så de hentes på nytt neste gang.
+    """
+    if kjente is None:
+        kjente = set()
+    
+    alle_voteringer = []
+    
+    for i, sak in enumerate(saker):
+        sak_id = sak.get("id")
+        sak_tittel = sak.get("korttittel", "Ukjent")[:50]
+        
+        # Vis fremdrift
+        print(f"[{i+1}/{len(saker)}] Sak {sak_id}: {sak_tittel}...")
+        
+        # Hent voteringer for saken (hent_fra_api sørger for pause mellom kallene)
+        voteringer = hent_voteringer_for_sak(sak_id)
+        
+        if voteringer is None:
+            print("   ⚠️  Fikk ikke voteringslisten, hoppes over")
+            if feilede is not None:
+                feilede.append(sak_id)
+            continue
+        
+        if not voteringer:
+            print(f"   Ingen voteringer for denne saken")
+            continue
+        
+        voteringer = [v for v in voteringer if str(v.get("votering_id")) not in kjente]
+        
+        if not voteringer:
+            print(f"   Ingen nye voteringer")
+            continue
+        
+        print(f"   Fant {len(voteringer)} ny(e) votering(er)")
+        
+        for votering in voteringer:
+            # Hent detaljerte stemmer
+            stemmer = hent_voteringsresultat(votering.get("votering_id"))
+            if stemmer is None:
+                print(f"   ⚠️  Fikk ikke stemmene for votering {votering.get('votering_id')}, hoppes over")
+                if feilede is not None and sak_id not in feilede:
+                    feilede.append(sak_id)
+                continue
+            
+            # Lagre voteringen med all info
+            alle_voteringer.append(lag_votering(sak, votering, stemmer))
+    
+    return alle_voteringer
+
+
+def lag_votering(sak, votering, stemmer):
+    """Setter sammen en votering slik den lagres i voteringer_{sesjon}.json."""
+    return {
+        "sak_id": sak.get("id"),
+        "sak_tittel": sak.get("tittel", ""),
+        "sakstype": sak.get("sakstype"),
+        "votering_id": votering.get("votering_id"),
+        "votering_tema": votering.get("votering_tema", ""),
+        "antall_for": votering.get("antall_for", 0),
+        "antall_mot": votering.get("antall_mot", 0),
+        "vedtatt": votering.get("vedtatt", False),
+        "dato": votering.get("votering_tid", ""),
+        "stemmer": stemmer
+    }
+
+
+def lagre_voteringer(voteringer, sesjon_id, data_mappe="../data", kompakt=None, indekser=True):
+    """
+    Lagrer voteringene og sjekksummene for en sesjon.
+    
+    Parametre:
+        kompakt: Lagre representantene én gang i representanter_{sesjon}.json
+                 (se lagringsformat.py). None = som før for sesjonen, eller
+                 etter STORTINGSVOTERING_KOMPAKT.
+        indekser: Oppdater også søkeindeksen. Slås av fra
+                  orkestrering.py, der en egen regel eier den.
+    """
+    filsti = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
+    if skriv_voteringsfil(voteringer, filsti, kompakt):
+        print(f"✓ Lagret data til {filsti} (kompakt)")
+    else:
+        print(f"✓ Lagret data til {filsti}")
+    
+    # Sjekksummer per votering, sak og sesjon (se sjekksummer.py)
+    sjekksummer = lag_sjekksummer(voteringer, sesjon_id)
+    lagre_sjekksummer(sjekksummer, data_mappe)
+    
+    if not indekser:
+        return
+    
+    # Nye voteringer legges rett inn i søkeindeksen (se sokeindeks.py)
+    from sokeindeks import indekser_voteringer
+    nye = indekser_voteringer(voteringer, sesjon_id, data_mappe)
+    if nye:
+        print(f"✓ {nye} nye eller endrede voteringer i søkeindeksen")
 
 
 # ============================================================
 # HOVEDFUNKSJON
 # ============================================================
 
-def samle_voteringsdata(sesjon_id=None, maks_saker=None, lagre_til_fil=True):
+def samle_voteringsdata(sesjon_id=None, maks_saker=None, lagre_til_fil=True, data_mappe="../data"):
     """
     Samler all voteringsdata for en sesjon.
     
     Parametre:
         sesjon_id: Sesjons-ID (f.eks. "2023-2024")
-        maks_saker: Begrens antall saker (for testing)
+        maks_saker: Begrens antall saker (for testing). Sakene trekkes
+                    tilfeldig, fordelt på sakstype og dato, men likt for
+                    samme sesjon.
         lagre_til_fil: Om resultatet skal lagres til JSON
+        data_mappe: Mappen filene lagres i
+    
+    Returnerer dict med antall saker og voteringer, voteringene og
+    run_metadata (tid og antall per steg, se profilering.py).
     """
     if sesjon_id is None:
         sesjon_id = STANDARD_SESJON
     
+    with Kjoring(f"henting_{sesjon_id}", data_mappe=data_mappe) as kjoring:
+        resultat = _samle_voteringsdata(sesjon_id, maks_saker, lagre_til_fil, data_mappe, kjoring)
+    
+    if resultat:
+        resultat["run_metadata"] = kjoring.metadata()
+    return resultat
+
+
+def _samle_voteringsdata(sesjon_id, maks_saker, lagre_til_fil, data_mappe, kjoring):
     print("=" * 60)
     print(f"STARTER DATAINNSAMLING FOR SESJON {sesjon_id}")
     print("=" * 60)
     
     # Hent partier
-    partier = hent_partier(sesjon_id)
+    with kjoring.steg("partier"):
+        partier = hent_partier(sesjon_id)
     if partier:
-        lagre_til_json(partier, f"../data/partier_{sesjon_id}.json")
+        lagre_til_json(partier, os.path.join(data_mappe, f"partier_{sesjon_id}.json"))
     
     # Hent saker
-    saker = hent_saker(sesjon_id)
+    with kjoring.steg("saker") as steg:
+        saker = hent_saker(sesjon_id)
+        steg["antall"] = len(saker or [])
     
     if not saker:
         print("❌ Kunne ikke hente saker. Sjekk internettforbindelsen.")
         return None
     
-    # Begrens antall saker hvis ønskelig
+    # Begrens antall saker hvis ønskelig: et tilfeldig utvalg fordelt på
+    # sakstype og dato (se forhandsvisning.py), ikke de første i listen
     if maks_saker:
-        saker = saker[:maks_saker]
-        print(f"   ℹ️  Begrenset til {maks_saker} saker")
-    
-    # Hent voteringer for hver sak
-    alle_voteringer = []
+        from forhandsvisning import stratifisert_utvalg
+        saker = stratifisert_utvalg(saker, maks_saker, frø=sesjon_id)
+        print(f"   ℹ️  Begrenset til {len(saker)} saker (stratifisert utvalg)")
     
     print(f"\n🔄 Behandler {len(saker)} av {len(saker)} saker...")
     
-    for i, sak in enumerate(saker):
-        sak_id = sak.get("id")
-        sak_tittel = sak.get("korttittel", "Ukjent")[:50]
-        
-        # Vis fremdrift
-        print(f"[{i+1}/{len(saker)}] Sak {sak_id}: {sak_tittel}...")
-        
-        # Pause for å ikke overbelaste API-et
-        time.sleep(PAUSE_MELLOM_KALL)
-        
-        # Hent voteringer for saken
-        voteringer = hent_voteringer_for_sak(sak_id)
-        
-        if not voteringer:
-            print(f"   Ingen voteringer for denne saken")
-            continue
-        
-        print(f"   Fant {len(voteringer)} votering(er)")
-        
-        for votering in voteringer:
-            votering_id = votering.get("votering_id")
-            
-            # Pause
-            time.sleep(PAUSE_MELLOM_KALL)
-            
-            # Hent detaljerte stemmer
-            stemmer = hent_voteringsresultat(votering_id)
-            
-            # Lagre voteringen med all info
-            alle_voteringer.append({
-                "sak_id": sak_id,
-                "sak_tittel": sak.get("tittel", ""),
-                "sakstype": sak.get("sakstype"),
-                "votering_id": votering_id,
-                "votering_tema": votering.get("votering_tema", ""),
-                "antall_for": votering.get("antall_for", 0),
-                "antall_mot": votering.get("antall_mot", 0),
-                "vedtatt": votering.get("vedtatt", False),
-                "dato": votering.get("votering_tid", ""),
-                "stemmer": stemmer
-            })
+    # Hent voteringer for hver sak
+    with kjoring.steg("voteringer", len(saker)):
+        alle_voteringer = hent_voteringer_for_saker(saker)
+    kjoring.tell("voteringer", len(alle_voteringer))
+    kjoring.tell("stemmer", sum(len(v.get("stemmer") or []) for v in alle_voteringer))
     
     # Lagre resultatet
     print(f"\n💾 Lagrer {len(alle_voteringer)} voteringer...")
     
     if lagre_til_fil:
-        lagre_til_json(alle_voteringer, f"../data/voteringer_{sesjon_id}.json")
+        with kjoring.steg("lagring", len(alle_voteringer)):
+            lagre_voteringer(alle_voteringer, sesjon_id, data_mappe)
     
     print("=" * 60)
     print("✅ DATAINNSAMLING FULLFØRT!")
@@ -236,6 +396,132 @@ def samle_voteringsdata(sesjon_id=None, maks_saker=None, lagre_til_fil=True):
     }
 
 
+def synkroniser_sesjon(sesjon_id=None, data_mappe="../data", saker=None, indekser=True):
+    """
+    Henter bare det som er nytt siden forrige innhenting.
+    
+    Voteringslisten hentes for hver sak, men stemmene hentes bare
+    for voteringer som ikke allerede finnes i voteringer_{sesjon_id}.json
+    (sammenlignet på votering_id). Slik fanges også nye voteringer i
+    saker som har voteringer fra før, f.eks. ved annen gangs
+    behandling. Et kjapt alternativ til samle_voteringsdata for
+    daglige kjøringer.
+    
+    Voteringer som ikke lenger stemmer med sjekksummene fra forrige
+    innhenting (endret eller borte fra filen, se sjekksummer.py)
+    hentes også på nytt, og bare de.
+    
+    Parametre:
+        saker: Sjekk bare disse sakene (f.eks. de som har endret seg
+               siden sist, se overvaking.py) i stedet for å hente
+               sakslisten
+        indekser: Se lagre_voteringer
+    """
+    if sesjon_id is None:
+        sesjon_id = STANDARD_SESJON
+    
+    print("=" * 60)
+    print(f"SYNKRONISERER SESJON {sesjon_id}")
+    print("=" * 60)
+    
+    filsti = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
+    try:
+        eksisterende = les_voteringsfil(filsti)
+    except FileNotFoundError:
+        eksisterende = []
+    
+    # Voteringer som har endret seg siden innhentingen hentes på nytt
+    forskjell = endringer_siden_innhenting(sesjon_id, data_mappe, eksisterende) if eksisterende else None
+    odelagte = set(forskjell["endrede"] + forskjell["fjernede"]) if forskjell else set()
+    if odelagte:
+        print(f"   ⚠️  {len(odelagte)} voteringer stemmer ikke med sjekksummene og hentes på nytt")
+    
+    kjente = {str(v.get("votering_id")) for v in eksisterende} - odelagte
+    if saker is None:
+        saker = hent_saker(sesjon_id)
+    
+    if not saker:
+        print("❌ Kunne ikke hente saker. Sjekk internettforbindelsen.")
+        return None
+    
+    # Sørg for at sakene med endrede voteringer er med
+    if odelagte:
+        sjekkes = {str(sak.get("id")) for sak in saker}
+        lagrede_saker = {str(v.get("sak_id")): v for v in eksisterende}
+        for sak_id in forskjell["endrede_saker"]:
+            if sak_id not in sjekkes:
+                v = lagrede_saker.get(sak_id, {"sak_id": sak_id})
+                saker = saker + [{
+                    "id": v.get("sak_id"), "tittel": v.get("sak_tittel", ""),
+                    "korttittel": v.get("sak_tittel", ""), "sakstype": v.get("sakstype")
+                }]
+    
+    print(f"   ℹ️  {len(kjente)} voteringer fra før, sjekker {len(saker)} saker")
+    
+    feilede = []
+    nye_voteringer = hent_voteringer_for_saker(saker, kjente, feilede)
+    if feilede:
+        print(f"   ⚠️  {len(feilede)} saker kunne ikke hentes helt og sjekkes på nytt neste gang")
+    
+    if nye_voteringer:
+        # Hentede voteringer erstatter de lagrede kopiene med samme ID
+        hentet = {str(v.get("votering_id")) for v in nye_voteringer}
+        eksisterende = [v for v in eksisterende if str(v.get("votering_id")) not in hentet]
+        if odelagte - hentet:
+            print(f"   ⚠️  {len(odelagte - hentet)} voteringer kunne ikke hentes på nytt")
+        print(f"\n💾 Legger til {len(nye_voteringer)} nye voteringer...")
+        lagre_voteringer(eksisterende + nye_voteringer, sesjon_id, data_mappe, indekser=indekser)
+    else:
+        print("\n   ✓ Ingen nye voteringer")
+        if eksisterende and forskjell is None:
+            # Filen er fra før sjekksummene fantes (se sjekksummer.py)
+            lagre_sjekksummer(lag_sjekksummer(eksisterende, sesjon_id), data_mappe)
+            print("   ✓ Sjekksummer lagret for eksisterende voteringer")
+    
+    return {
+        "sesjon_id": sesjon_id,
+        "antall_saker": len(saker),
+        "antall_voteringer": len(nye_voteringer),
+        "voteringer": nye_voteringer,
+        "feilede_saker": feilede
+    }
+
+
+def konverter_sesjon(sesjon_id=None, data_mappe="../data", kompakt=True):
+    """
+    Skriver voteringer_{sesjon_id}.json om til kompakt (eller vanlig) format.
+    
+    Innholdet og sjekksummene blir de samme; bare lagringen endres.
+    
+    Returnerer dict med filstørrelser før og etter (bytes), eller None
+    hvis sesjonen ikke finnes.
+    """
+    if sesjon_id is None:
+        sesjon_id = STANDARD_SESJON
+    
+    filsti = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
+    tabellfil = os.path.join(data_mappe, f"representanter_{sesjon_id}.json")
+    
+    def storrelse():
+        return sum(os.path.getsize(f) for f in (filsti, tabellfil) if os.path.exists(f))
+    
+    try:
+        voteringer = les_voteringsfil(filsti)
+    except FileNotFoundError:
+        print(f"❌ Fant ikke {filsti}")
+        return None
+    
+    før = storrelse()
+    skriv_voteringsfil(voteringer, filsti, kompakt)
+    etter = storrelse()
+    
+    format_navn = "kompakt" if kompakt else "vanlig"
+    print(f"✓ {sesjon_id}: {len(voteringer)} voteringer lagret i {format_navn} format")
+    print(f"   {før / 1024:.0f} KB → {etter / 1024:.0f} KB")
+    
+    return {"sesjon_id": sesjon_id, "bytes_foer": før, "bytes_etter": etter}
+
+
 # ============================================================
 # KJØR SCRIPTET
 # ============================================================
@@ -0,0 +1,258 @@
+# ============================================================
+# STORTINGSVOTERING - KOMPAKT LAGRING AV STEMMER
+# ============================================================
+# I voteringer_{sesjon}.json har hver stemme et fullt
+# representant-objekt (navn, fylke, parti). De samme ~170
+# objektene gjentas for hver votering, og står for det meste av
+# filstørrelsen.
+#
+# I kompakt format lagres hver representant én gang, i
+# representanter_{sesjon}.json, og stemmene blir par:
+#
+#   vanlig:   {"representant": {"id": "ABC", ...}, "votering": 1}
+#   kompakt:  [0, 1]        (indeks i tabellen, stemmekode)
+#
+# En representant som bytter parti midt i sesjonen får én rad
+# per variant, så ingenting går tapt. Andre felt på stemmen
+# lagres også: felt som er like for alle stemmene i en votering
+# legges i "stemme_felles", resten som et tredje element.
+#
+# Leserne (les_voteringer, strom_voteringer, verifiser_data)
+# gjør kompakte stemmer om til vanlig form igjen, så resten av
+# koden ikke merker forskjell. Filene kan også blandes: en
+# votering med vanlige stemmer leses som før.
+#
+# Kompakt lagring slås på med STORTINGSVOTERING_KOMPAKT=1, eller
+# gjelder automatisk for sesjoner som allerede har en
+# representanter_{sesjon}.json.
+# ============================================================
+
+import json
+import os
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+KOMPAKT_LAGRING = os.environ.get("STORTINGSVOTERING_KOMPAKT", "") == "1"
+TABELL_VERSJON = 1
+
+# ============================================================
+# FILNAVN
+# ============================================================
+
+def representantfil(voteringsfil):
+    """Stien til representanter_{sesjon}.json ved siden av voteringer_{sesjon}.json."""
+    mappe, filnavn = os.path.split(voteringsfil)
+    return os.path.join(mappe, filnavn.replace("voteringer_", "representanter_", 1))
+
+
+def les_representanttabell(voteringsfil):
+    """
+    Leser representanttabellen som hører til en voteringsfil.
+    
+    Returnerer en liste med representant-objekter (indeksen er den
+    som brukes i de kompakte stemmene).
+    """
+    with open(representantfil(voteringsfil), "r", encoding="utf-8") as f:
+        return json.load(f)["representanter"]
+
+
+# ============================================================
+# KOMPRIMERING
+# ============================================================
+
+def er_kompakt(votering):
+    """Sann hvis stemmene i voteringen er lagret som [indeks, kode]."""
+    stemmer = votering.get("stemmer")
+    return bool(stemmer) and isinstance(stemmer[0], list)
+
+
+def komprimer_voteringer(voteringer, representanter=None):
+    """
+    Gjør stemmene om til [indeks, kode] med én felles representanttabell.
+    
+    Parametre:
+        representanter: Tabellen fra forrige lagring. Radene beholder
+                        indeksene sine og nye representanter legges til
+                        bakerst, så voteringer som allerede er kompakte
+                        (og en leser med den gamle voteringsfilen) peker
+                        på de samme radene som før.
+    
+    Returnerer (representanter, kompakte voteringer). Voteringene
+    og tabellen som gis inn endres ikke.
+    """
+    representanter = list(representanter or [])
+    indekser = {}
+    for indeks, representant in enumerate(representanter):
+        indekser.setdefault(json.dumps(representant, sort_keys=True, ensure_ascii=False), indeks)
+    kompakte = []
+    
+    for votering in voteringer:
+        stemmer = votering.get("stemmer")
+        if not stemmer or er_kompakt(votering):
+            kompakte.append(votering)
+            continue
+        
+        # Felt som er like for alle stemmene lagres én gang per votering
+        andre_felt = {}
+        for stemme in stemmer:
+            for nokkel, verdi in stemme.items():
+                if nokkel not in ("representant", "votering"):
+                    andre_felt.setdefault(nokkel, []).append(verdi)
+        felles = {
+            nokkel: verdier[0] for nokkel, verdier in andre_felt.items()
+            if len(verdier) == len(stemmer) and all(v == verdier[0] for v in verdier)
+        }
+        
+        rader = []
+        for stemme in stemmer:
+            representant = stemme.get("representant")
+            if representant is None:
+                indeks = None
+            else:
+                nokkel = json.dumps(representant, sort_keys=True, ensure_ascii=False)
+                indeks = indekser.get(nokkel)
+                if indeks is None:
+                    indeks = indekser[nokkel] = len(representanter)
+                    representanter.append(representant)
+            
+            rad = [indeks, stemme.get("votering")]
+            ekstra = {
+                k: v for k, v in stemme.items()
+                if k not in ("representant", "votering") and k not in felles
+            }
+            if "representant" in stemme and representant is None:
+                # Skiller "representant": None fra en stemme uten feltet
+                ekstra["representant"] = None
+            if ekstra or "votering" not in stemme:
+                rad.append(dict(ekstra, **({} if "votering" in stemme else {"_uten_votering": True})))
+            rader.append(rad)
+        
+        kompakt = dict(votering, stemmer=rader)
+        if felles:
+            kompakt["stemme_felles"] = felles
+        kompakte.append(kompakt)
+    
+    return representanter, kompakte
+
+
+def utvid_votering(votering, representanter):
+    """
+    Gjør kompakte stemmer om til vanlig form (samme votering endres).
+    
+    Stemmene for samme representant deler representant-objektet, så
+    de må ikke endres på stedet.
+    """
+    if not er_kompakt(votering):
+        return votering
+    
+    felles = votering.pop("stemme_felles", {})
+    stemmer = []
+    
+    for rad in votering["stemmer"]:
+        stemme = dict(felles)
+        if rad[0] is not None:
+            stemme["representant"] = representanter[rad[0]]
+        
+        ekstra = rad[2] if len(rad) > 2 else {}
+        if not ekstra.get("_uten_votering"):
+            stemme["votering"] = rad[1]
+        stemme.update((k, v) for k, v in ekstra.items() if k != "_uten_votering")
+        stemmer.append(stemme)
+    
+    votering["stemmer"] = stemmer
+    return votering
+
+
+def utvid_voteringer(voteringer, voteringsfil):
+    """
+    Gjør alle kompakte voteringer i en lest fil om til vanlig form.
+    
+    Representanttabellen leses bare hvis filen har kompakte stemmer.
+    """
+    representanter = None
+    
+    for votering in voteringer:
+        if er_kompakt(votering):
+            if representanter is None:
+                representanter = les_representanttabell(voteringsfil)
+            utvid_votering(votering, representanter)
+    
+    return voteringer
+
+
+# ============================================================
+# LESING OG SKRIVING
+# ============================================================
+
+def les_voteringsfil(voteringsfil):
+    """
+    Leser en voteringsfil i vanlig form, uansett lagringsformat.
+    
+    Filer på formen {"voteringer": [...]} gir listen.
+    """
+    with open(voteringsfil, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    
+    voteringer = data.get("voteringer", []) if isinstance(data, dict) else data
+    return utvid_voteringer(voteringer, voteringsfil)
+
+
+def skriv_voteringsfil(voteringer, voteringsfil, kompakt=None):
+    """
+    Skriver voteringene, kompakt eller vanlig.
+    
+    Parametre:
+        kompakt: True/False, eller None for å beholde formatet filen har
+                 (kompakt hvis tabellen finnes eller KOMPAKT_LAGRING er på)
+    
+    Begge filene skrives først til en midlertidig fil og flyttes på
+    plass etterpå, så et avbrudd aldri etterlater en halvskrevet fil.
+    Den nye tabellen bygger på den gamle (se komprimer_voteringer) og
+    flyttes før voteringene, så en leser som ser den nye tabellen med
+    den gamle voteringsfilen fortsatt får riktige representanter.
+    Går filen over til vanlig format, fjernes tabellen.
+    
+    Returnerer True hvis filen ble lagret kompakt.
+    """
+    tabellfil = representantfil(voteringsfil)
+    if kompakt is None:
+        kompakt = KOMPAKT_LAGRING or os.path.exists(tabellfil)
+    
+    mappe = os.path.dirname(voteringsfil)
+    if mappe:
+        os.makedirs(mappe, exist_ok=True)
+    
+    if not kompakt:
+        with open(voteringsfil + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(voteringer, f, ensure_ascii=False, indent=2)
+        os.replace(voteringsfil + ".tmp", voteringsfil)
+        if os.path.exists(tabellfil):
+            os.remove(tabellfil)
+        return False
+    
+    try:
+        tidligere = les_representanttabell(voteringsfil)
+    except (FileNotFoundError, json.JSONDecodeError):
+        tidligere = None
+    representanter, kompakte = komprimer_voteringer(voteringer, tidligere)
+    
+    with open(tabellfil + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {"versjon": TABELL_VERSJON, "representanter": representanter},
+            f, ensure_ascii=False, indent=1
+        )
+    
+    # Én votering per linje: lesbart med head/grep, men uten innrykk per stemme
+    with open(voteringsfil + ".tmp", "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i, votering in enumerate(kompakte):
+            f.write(json.dumps(votering, ensure_ascii=False, separators=(",", ":")))
+            f.write(",\n" if i < len(kompakte) - 1 else "\n")
+        f.write("]\n")
+    
+    os.replace(tabellfil + ".tmp", tabellfil)
+    os.replace(voteringsfil + ".tmp", voteringsfil)
+    
+    return True
@@ -0,0 +1,430 @@
+# ============================================================
+# STORTINGSVOTERING - LIKHETSINDEKS
+# ============================================================
+# Svarer på "hvilke andre voteringer delte partiene på samme
+# måte som denne?" uten å gå gjennom alle stemmene på nytt.
+#
+# Hver votering lagres som to bitvektorer (Python-heltall):
+#
+#   partistandpunkt:  2 bit per parti, 01 = for, 10 = mot,
+#                     00 = ikke noe standpunkt
+#   stemmer:          én for-vektor og én mot-vektor med
+#                     1 bit per representant
+#
+# Avstanden mellom to voteringer er Hamming-avstanden (antall
+# ulike bit). For partiene betyr det 2 for et parti som stemte
+# motsatt og 1 for et parti som bare hadde standpunkt i den ene.
+#
+# Voteringene grupperes i bøtter etter partistandpunkt. De
+# fleste voteringer deler seg på noen få hundre måter, så et
+# søk sorterer bøttene etter avstand og ser bare på de nærmeste,
+# i stedet for å sammenligne med hver votering. Innenfor samme
+# partiavstand rangeres treffene etter representantenes stemmer.
+#
+#   indeks = last_likhetsindeks()
+#   indeks.finn_lignende(12345, k=10)
+#   indeks.sok_standpunkt({"A": "for", "H": "mot"})
+#
+# Partier og representanter får faste bitposisjoner etter hvert
+# som de dukker opp, så nye voteringer kan legges til uten at de
+# gamle vektorene endres. Voteringer som er hentet på nytt med
+# andre stemmer får radene sine byttet ut (se oppdater_indeksdata).
+# ============================================================
+
+import heapq
+import json
+import os
+import time
+
+from analyser_data_v2 import finn_sesjoner, normaliser_votering, standpunkt_fra_telling, strom_voteringer, tell_partistemmer
+from sjekksummer import les_sjekksummer
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+INDEKS_FIL = "likhetsindeks.json"
+INDEKS_VERSJON = 1
+
+STANDARD_ANTALL = 10
+
+# Bitene for hvert standpunkt (forskjøvet 2 * partiets posisjon)
+STANDPUNKT_BIT = {"for": 1, "mot": 2}
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def ny_indeksdata():
+    """Tom indeks (slik den lagres)."""
+    return {"versjon": INDEKS_VERSJON, "partier": [], "representanter": [], "voteringer": {}}
+
+
+def _posisjon(liste, oppslag, verdi):
+    """Fast posisjon for et parti eller en representant (legges til bakerst)."""
+    posisjon = oppslag.get(verdi)
+    if posisjon is None:
+        posisjon = oppslag[verdi] = len(liste)
+        liste.append(verdi)
+    return posisjon
+
+
+def koder_votering(votering, data, partiposisjon, repposisjon):
+    """
+    Lager bitvektorene for én votering.
+    
+    Returnerer (partibit, forbit, motbit).
+    """
+    stemmer = votering.get("stemmer", [])
+    
+    partibit = 0
+    for parti_id, standpunkt in standpunkt_fra_telling(tell_partistemmer(stemmer)).items():
+        posisjon = _posisjon(data["partier"], partiposisjon, parti_id)
+        partibit |= STANDPUNKT_BIT[standpunkt] << (2 * posisjon)
+    
+    forbit = motbit = 0
+    for stemme in stemmer:
+        rep_id = (stemme.get("representant") or {}).get("id")
+        resultat = normaliser_votering(stemme.get("votering"))
+        if not rep_id or resultat not in ("for", "mot"):
+            continue
+        bit = 1 << _posisjon(data["representanter"], repposisjon, rep_id)
+        if resultat == "for":
+            forbit |= bit
+        else:
+            motbit |= bit
+    
+    return partibit, forbit, motbit
+
+
+def oppdater_indeksdata(data, voteringer, sesjon_id, sjekksummer=None):
+    """
+    Legger nye voteringer (med stemmer) fra én sesjon til i indeksen.
+    
+    Voteringer som allerede er med kodes på nytt, og raden byttes ut
+    hvis den er endret (en votering som ikke lenger har stemmer
+    fjernes). Med sjekksummene for sesjonen (se sjekksummer.py) hoppes
+    voteringer med samme sjekksum som sist over uten å kodes.
+    
+    Returnerer antall nye eller endrede voteringer.
+    """
+    partiposisjon = {p: i for i, p in enumerate(data["partier"])}
+    repposisjon = {r: i for i, r in enumerate(data["representanter"])}
+    
+    summer = {}
+    if sjekksummer is not None:
+        summer = {
+            votering_id: sjekksum
+            for sak in sjekksummer["saker"].values()
+            for votering_id, sjekksum in sak["voteringer"].items()
+        }
+    
+    rader = data["voteringer"].setdefault(sesjon_id, [])
+    plass = {rad[0]: i for i, rad in enumerate(rader)}
+    fjernes = set()
+    nye = endrede = 0
+    
+    for votering in voteringer:
+        votering_id = votering.get("votering_id")
+        i = plass.get(votering_id)
+        sjekksum = summer.get(str(votering_id))
+        
+        if not votering.get("stemmer"):
+            if i is not None:
+                fjernes.add(i)
+            continue
+        if i is not None and sjekksum is not None and rader[i][7:] == [sjekksum]:
+            continue
+        
+        partibit, forbit, motbit = koder_votering(votering, data, partiposisjon, repposisjon)
+        rad = [
+            votering_id,
+            votering.get("sak_id"),
+            votering.get("votering_tema") or votering.get("sak_tittel", ""),
+            votering.get("dato", ""),
+            format(partibit, "x"),
+            format(forbit, "x"),
+            format(motbit, "x"),
+            sjekksum
+        ]
+        
+        if i is None:
+            plass[votering_id] = len(rader)
+            rader.append(rad)
+            nye += 1
+        else:
+            if rader[i][:7] != rad[:7]:
+                endrede += 1
+            rader[i] = rad
+    
+    if fjernes:
+        rader[:] = [rad for i, rad in enumerate(rader) if i not in fjernes]
+    
+    return nye + endrede + len(fjernes)
+
+
+def les_indeksdata(data_mappe="../data"):
+    """Leser den lagrede indeksen, eller lager en tom (også hvis filen er ødelagt)."""
+    try:
+        with open(os.path.join(data_mappe, INDEKS_FIL), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return ny_indeksdata()
+    
+    if data.get("versjon") != INDEKS_VERSJON:
+        return ny_indeksdata()
+    
+    return data
+
+
+def lagre_indeksdata(data, data_mappe="../data"):
+    """Lagrer indeksen kompakt (uten innrykk), via en midlertidig fil."""
+    filsti = os.path.join(data_mappe, INDEKS_FIL)
+    midlertidig = filsti + ".tmp"
+    with open(midlertidig, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(midlertidig, filsti)
+    return filsti
+
+
+# ============================================================
+# INDEKS
+# ============================================================
+
+class Likhetsindeks:
+    """
+    Søkbar indeks over alle voteringene.
+    
+    Parametre:
+        data: Indeksen slik den lagres (se les_indeksdata)
+    """
+    
+    def __init__(self, data):
+        self.partier = data["partier"]
+        self.representanter = data["representanter"]
+        
+        self.sesjoner = []
+        self.rader = []
+        self.partibit = []
+        self.forbit = []
+        self.motbit = []
+        self.posisjoner = {}
+        self.botter = {}
+        
+        for sesjon_id in sorted(data["voteringer"]):
+            for rad in data["voteringer"][sesjon_id]:
+                posisjon = len(self.rader)
+                partibit = int(rad[4], 16)
+                
+                self.sesjoner.append(sesjon_id)
+                self.rader.append(rad)
+                self.partibit.append(partibit)
+                self.forbit.append(int(rad[5], 16))
+                self.motbit.append(int(rad[6], 16))
+                self.posisjoner.setdefault(rad[0], []).append(posisjon)
+                self.botter.setdefault(partibit, []).append(posisjon)
+    
+    def __len__(self):
+        return len(self.rader)
+    
+    def finn_posisjon(self, votering_id, sesjon_id=None):
+        """
+        Finner voteringen i indeksen.
+        
+        Uten sesjon_id brukes den nyeste sesjonen voteringen finnes i.
+        Returnerer None hvis den ikke finnes.
+        """
+        posisjoner = self.posisjoner.get(votering_id, [])
+        if sesjon_id is not None:
+            posisjoner = [p for p in posisjoner if self.sesjoner[p] == sesjon_id]
+        return posisjoner[-1] if posisjoner else None
+    
+    def standpunkt(self, partibit):
+        """Gjør partibitene om til {parti_id: "for"/"mot"}."""
+        standpunkt = {}
+        for i, parti_id in enumerate(self.partier):
+            bit = (partibit >> (2 * i)) & 3
+            if bit == STANDPUNKT_BIT["for"]:
+                standpunkt[parti_id] = "for"
+            elif bit == STANDPUNKT_BIT["mot"]:
+                standpunkt[parti_id] = "mot"
+        return standpunkt
+    
+    def koder_standpunkt(self, standpunkt):
+        """
+        Gjør {parti_id: "for"/"mot"} om til partibiter.
+        
+        Partier som ikke finnes i indeksen ignoreres.
+        """
+        partibit = 0
+        for i, parti_id in enumerate(self.partier):
+            if standpunkt.get(parti_id) in STANDPUNKT_BIT:
+                partibit |= STANDPUNKT_BIT[standpunkt[parti_id]] << (2 * i)
+        return partibit
+    
+    def _ulike_partier(self, partibit_a, partibit_b):
+        forskjell = partibit_a ^ partibit_b
+        return [p for i, p in enumerate(self.partier) if (forskjell >> (2 * i)) & 3]
+    
+    def _treff(self, posisjon, partiavstand, repavstand, partibit):
+        rad = self.rader[posisjon]
+        treff = {
+            "votering_id": rad[0],
+            "sesjon_id": self.sesjoner[posisjon],
+            "sak_id": rad[1],
+            "tema": rad[2],
+            "dato": rad[3],
+            "parti_avstand": partiavstand,
+            "ulike_partier": self._ulike_partier(self.partibit[posisjon], partibit)
+        }
+        if repavstand is not None:
+            treff["representant_avstand"] = repavstand
+        return treff
+    
+    def _naermeste_botter(self, partibit, k, tillatt):
+        """
+        Går gjennom bøttene i stigende partiavstand til minst k
+        voteringer er funnet og resten av bøttene er lenger unna.
+        
+        Returnerer liste med (partiavstand, posisjon).
+        """
+        rekkefolge = sorted(self.botter, key=lambda b: (b ^ partibit).bit_count())
+        kandidater = []
+        terskel = None
+        
+        for botte in rekkefolge:
+            avstand = (botte ^ partibit).bit_count()
+            if terskel is not None and avstand > terskel:
+                break
+            kandidater.extend((avstand, p) for p in self.botter[botte] if tillatt(p))
+            if terskel is None and len(kandidater) >= k:
+                terskel = avstand
+        
+        return kandidater
+    
+    def _tillatt(self, sesjoner, unntatt=None):
+        sesjoner = set(sesjoner) if sesjoner else None
+        return lambda p: p != unntatt and (sesjoner is None or self.sesjoner[p] in sesjoner)
+    
+    def finn_lignende(self, votering_id, k=STANDARD_ANTALL, etter="parti", sesjon_id=None, sesjoner=None):
+        """
+        Finner de k voteringene som ligner mest på én votering.
+        
+        Parametre:
+            votering_id: Voteringen det sammenlignes med
+            k: Antall treff
+            etter: "parti" (partistandpunkt, deretter representantenes
+                   stemmer) eller "representant" (bare stemmene)
+            sesjon_id: Sesjonen voteringen er i (standard: den nyeste)
+            sesjoner: Søk bare i disse sesjonene (standard: alle)
+        
+        Returnerer liste med treff sortert etter avstand, eller None
+        hvis voteringen ikke finnes.
+        """
+        posisjon = self.finn_posisjon(votering_id, sesjon_id)
+        if posisjon is None:
+            return None
+        
+        partibit = self.partibit[posisjon]
+        forbit = self.forbit[posisjon]
+        motbit = self.motbit[posisjon]
+        tillatt = self._tillatt(sesjoner, unntatt=posisjon)
+        
+        def repavstand(p):
+            return (self.forbit[p] ^ forbit).bit_count() + (self.motbit[p] ^ motbit).bit_count()
+        
+        if etter == "representant":
+            # Stemmene kan ikke grupperes på samme måte, men popcount
+            # på heltall er raskt nok til å sammenligne med alle
+            beste = heapq.nsmallest(
+                k, ((repavstand(p), p) for p in range(len(self.rader)) if tillatt(p))
+            )
+            return [
+                self._treff(p, (self.partibit[p] ^ partibit).bit_count(), avstand, partibit)
+                for avstand, p in beste
+            ]
+        
+        if etter != "parti":
+            raise ValueError(f"Ukjent sortering: {etter}")
+        
+        kandidater = self._naermeste_botter(partibit, k, tillatt)
+        beste = heapq.nsmallest(k, ((avstand, repavstand(p), p) for avstand, p in kandidater))
+        return [self._treff(p, avstand, rep, partibit) for avstand, rep, p in beste]
+    
+    def sok_standpunkt(self, standpunkt, k=STANDARD_ANTALL, sesjoner=None):
+        """
+        Finner voteringene der partiene stemte nærmest et gitt mønster.
+        
+        Parametre:
+            standpunkt: {parti_id: "for"/"mot"}, f.eks. {"A": "for", "H": "mot"}
+            k: Antall treff
+            sesjoner: Søk bare i disse sesjonene (standard: alle)
+        
+        Partier som ikke er med i mønsteret teller som "uten standpunkt".
+        Blant like nære treff kommer de nyeste sesjonene først.
+        """
+        partibit = self.koder_standpunkt(standpunkt)
+        kandidater = self._naermeste_botter(partibit, k, self._tillatt(sesjoner))
+        # Posisjonene følger sesjonene i stigende rekkefølge
+        beste = heapq.nsmallest(k, kandidater, key=lambda t: (t[0], -t[1]))
+        return [self._treff(p, avstand, None, partibit) for avstand, p in beste]
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def oppdater_likhetsindeks(data_mappe="../data", sesjoner=None, tving=False):
+    """
+    Legger nye voteringer fra voteringsfilene til i indeksen og lagrer den.
+    
+    Parametre:
+        sesjoner: Sesjoner som skal oppdateres (standard: alle)
+        tving: Bygg indeksen på nytt fra bunnen av
+    
+    Returnerer indeksen (Likhetsindeks).
+    """
+    print("=" * 60)
+    print("🧭 OPPDATERER LIKHETSINDEKS")
+    print("=" * 60)
+    
+    if sesjoner is None:
+        sesjoner = finn_sesjoner(data_mappe)
+    
+    data = ny_indeksdata() if tving else les_indeksdata(data_mappe)
+    start = time.perf_counter()
+    totalt_nye = 0
+    
+    for sesjon_id in sesjoner:
+        sjekksummer = les_sjekksummer(sesjon_id, data_mappe)
+        nye = oppdater_indeksdata(data, strom_voteringer(sesjon_id, data_mappe), sesjon_id, sjekksummer)
+        totalt_nye += nye
+        print(f"   {sesjon_id}: {nye} nye eller endrede voteringer")
+    
+    filsti = lagre_indeksdata(data, data_mappe)
+    indeks = Likhetsindeks(data)
+    
+    print(f"\n   ✓ {totalt_nye} nye eller endrede voteringer på {time.perf_counter() - start:.1f} s")
+    print(f"   ✓ {len(indeks)} voteringer i {len(indeks.botter)} bøtter")
+    print(f"   💾 Lagret til {filsti}")
+    
+    return indeks
+
+
+def last_likhetsindeks(data_mappe="../data"):
+    """
+    Leser den lagrede indeksen (bygger den hvis den mangler).
+    
+    Returnerer Likhetsindeks.
+    """
+    if not os.path.exists(os.path.join(data_mappe, INDEKS_FIL)):
+        return oppdater_likhetsindeks(data_mappe)
+    return Likhetsindeks(les_indeksdata(data_mappe))
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    oppdater_likhetsindeks()
@@ -0,0 +1,571 @@
+# ============================================================
+# STORTINGSVOTERING - ORKESTRERING
+# ============================================================
+# Bygger alle analysefilene i riktig rekkefølge, som make:
+#
+#   voteringer_{sesjon}.json → analyse_{sesjon}.json
+#                            → deltakelse_{sesjon}.json
+#   alle voteringer_*.json   → representanter.json, endringspunkter.json,
+#                              likhetsindeks.json, sokeindeks.json,
+#                              aggregatkube.json
+#   alle analyse_*.json      → analyse_tidsserie.json (med aggregatkube.json)
+#   analyse_tidsserie.json   → tidsserie_frontend.json og frontend/
+#
+# For hver regel huskes en hash av inndataene og av koden
+# (modulene regelen bruker) i orkestrering_tilstand.json. Bare
+# regler der noe har endret seg - eller der utdataene mangler
+# eller er endret utenfra - kjøres på nytt. Endres én sesjon,
+# bygges bare den sesjonens kjede og samlefilene på nytt.
+#
+# Regler som ikke avhenger av hverandre kjøres i parallell i
+# egne prosesser (--jobber). Med --hent synkroniseres valgte
+# sesjoner fra API-et først, én om gangen så API-et ikke får
+# flere samtidige kall; nedstrøms bygges da bare hvis
+# voteringsfilen faktisk fikk nytt innhold. Hentereglene
+# skriver bare voterings- og sjekksumfilene sine - søkeindeksen
+# og aggregatkuben eies av egne regler.
+#
+# BRUK:
+#   python orkestrering.py                 bygg det som er utdatert
+#   python orkestrering.py --vis           vis hva som ville blitt bygget
+#   python orkestrering.py --hent 2024-2025 --jobber 2
+# ============================================================
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from analyser_data_v2 import finn_sesjoner
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+TILSTAND_FIL = "orkestrering_tilstand.json"
+TILSTAND_VERSJON = 1
+
+# Mappen med modulene (kodehashen lages av filene her)
+KODE_MAPPE = os.path.dirname(os.path.abspath(__file__))
+
+# ============================================================
+# HANDLINGER
+# ============================================================
+# Funksjonene kjøres i egne prosesser og må derfor ligge på
+# modulnivå. Importene skjer inne i funksjonene, så en
+# arbeidsprosess bare laster det den trenger.
+
+def _hent(data_mappe, sesjon_id):
+    from hent_data_v2 import synkroniser_sesjon
+    # Søkeindeksen og aggregatkuben bygges av egne regler
+    return synkroniser_sesjon(sesjon_id, data_mappe, indekser=False) is not None
+
+
+def _analyse(data_mappe, sesjon_id):
+    from analyser_data_v2 import analyser_sesjon
+    return analyser_sesjon(sesjon_id, data_mappe) is not None
+
+
+def _deltakelse(data_mappe, sesjon_id):
+    from analyser_deltakelse import analyser_deltakelse
+    return analyser_deltakelse(sesjon_id, data_mappe) is not None
+
+
+def _representanter(data_mappe):
+    from representantregister import oppdater_representantregister
+    return oppdater_representantregister(data_mappe) is not None
+
+
+def _endringspunkter(data_mappe):
+    from endringspunkter import finn_endringspunkter
+    return finn_endringspunkter(data_mappe) is not None
+
+
+def _likhetsindeks(data_mappe):
+    from likhetsindeks import oppdater_likhetsindeks
+    return oppdater_likhetsindeks(data_mappe, tving=True) is not None
+
+
+def _sokeindeks(data_mappe):
+    from sokeindeks import oppdater_sokeindeks
+    return oppdater_sokeindeks(data_mappe, tving=True) is not None
+
+
+def _aggregatkube(data_mappe):
+    from aggregatkube import oppdater_aggregatkube
+    return oppdater_aggregatkube(data_mappe) is not None
+
+
+def _tidsserie(data_mappe):
+    from analyser_tidsserie import analyser_alle_sesjoner
+    return analyser_alle_sesjoner(data_mappe, les_analyser=True) is not None
+
+
+def _frontend(data_mappe):
+    from analyser_tidsserie import lag_tidsserie_for_frontend
+    from eksporter_frontend import eksporter_frontend
+    
+    with open(os.path.join(data_mappe, "analyse_tidsserie.json"), "r", encoding="utf-8") as f:
+        tidsserie = json.load(f)
+    
+    return (
+        eksporter_frontend(data_mappe, tidsserie=tidsserie) is not None
+        and lag_tidsserie_for_frontend(data_mappe, data=tidsserie) is not None
+    )
+
+
+def _utfor(handling, data_mappe, args):
+    """
+    Kjører én handling og fanger utskriften.
+    
+    Returnerer (ok, utskrift, sekunder).
+    """
+    utskrift = io.StringIO()
+    start = time.perf_counter()
+    
+    with contextlib.redirect_stdout(utskrift):
+        try:
+            ok = handling(data_mappe, *args)
+        except Exception:
+            traceback.print_exc(file=utskrift)
+            ok = False
+    
+    return ok, utskrift.getvalue(), time.perf_counter() - start
+
+
+# ============================================================
+# REGLER
+# ============================================================
+
+def _regel(navn, handling, args, inndata, utdata, kode, alltid=False, alene=False):
+    return {
+        "navn": navn,
+        "handling": handling,
+        "args": args,
+        "inndata": inndata,
+        "utdata": utdata,
+        "kode": kode,
+        # Kjøres hver gang (f.eks. henting fra API-et)
+        "alltid": alltid,
+        # Kjøres aldri samtidig med en annen slik regel (henting deler
+        # hastighetsgrensen hos API-et, som hver prosess ellers styrer selv)
+        "alene": alene
+    }
+
+
+def lag_regler(data_mappe="../data", hent=None):
+    """
+    Lager reglene for alle sesjonene.
+    
+    Parametre:
+        hent: Sesjoner som skal synkroniseres fra API-et først
+    
+    Returnerer dict: {regelnavn: regel}. Avhengighetene mellom
+    reglene utledes av inn- og utdatafilene (se lag_avhengigheter).
+    """
+    hent = sorted(set(hent or []))
+    sesjoner = sorted(set(finn_sesjoner(data_mappe)) | set(hent))
+    
+    # Kompakt lagrede sesjoner har representantene i en egen fil (se lagringsformat.py)
+    voteringsdata = {
+        s: [f"voteringer_{s}.json"] + [
+            f for f in [f"representanter_{s}.json"] if os.path.exists(os.path.join(data_mappe, f))
+        ]
+        for s in sesjoner
+    }
+    voteringsfiler = [f for s in sesjoner for f in voteringsdata[s]]
+    analysefiler = [f"analyse_{s}.json" for s in sesjoner]
+    # Sakdetaljene fra berik_saker gjør komité og emner søkbare
+    dimensjonsfiler = [
+        f"sakdimensjoner_{s}.json" for s in sesjoner
+        if os.path.exists(os.path.join(data_mappe, f"sakdimensjoner_{s}.json"))
+    ]
+    deltakelsesfiler = [f"deltakelse_{s}.json" for s in sesjoner]
+    
+    analysekode = ["analyser_data_v2.py", "profilering.py", "lagringsformat.py"]
+    
+    regler = []
+    
+    # Sjekksummene skrives sammen med voteringsfilen (se hent_data_v2.lagre_voteringer)
+    sjekksumfiler = {
+        s: [
+            f for f in [f"sjekksummer_{s}.json"]
+            if s in hent or os.path.exists(os.path.join(data_mappe, f))
+        ]
+        for s in sesjoner
+    }
+    
+    for sesjon_id in hent:
+        regler.append(_regel(
+            f"hent_{sesjon_id}", _hent, (sesjon_id,),
+            [], voteringsdata[sesjon_id] + sjekksumfiler[sesjon_id],
+            ["hent_data_v2.py", "sjekksummer.py", "lagringsformat.py"], alltid=True, alene=True
+        ))
+    
+    for sesjon_id in sesjoner:
+        regler.append(_regel(
+            f"analyse_{sesjon_id}", _analyse, (sesjon_id,),
+            voteringsdata[sesjon_id], [f"analyse_{sesjon_id}.json", f"samhold_{sesjon_id}.json"],
+            analysekode
+        ))
+        regler.append(_regel(
+            f"deltakelse_{sesjon_id}", _deltakelse, (sesjon_id,),
+            voteringsdata[sesjon_id] + ["representanter.json"], [f"deltakelse_{sesjon_id}.json"],
+            ["analyser_deltakelse.py", "analyser_data_v2.py", "representantregister.py"]
+        ))
+    
+    regler += [
+        _regel(
+            "representanter", _representanter, (),
+            voteringsfiler, ["representanter.json"],
+            ["representantregister.py", "analyser_data_v2.py"]
+        ),
+        _regel(
+            "endringspunkter", _endringspunkter, (),
+            voteringsfiler, ["endringspunkter.json"],
+            ["endringspunkter.py", "analyser_data_v2.py"]
+        ),
+        _regel(
+            "likhetsindeks", _likhetsindeks, (),
+            voteringsfiler, ["likhetsindeks.json"],
+            ["likhetsindeks.py", "analyser_data_v2.py", "lagringsformat.py"]
+        ),
+        _regel(
+            "sokeindeks", _sokeindeks, (),
+            voteringsfiler + dimensjonsfiler, ["sokeindeks.json"],
+            ["sokeindeks.py", "berik_saker.py", "analyser_data_v2.py", "lagringsformat.py"]
+        ),
+        _regel(
+            "aggregatkube", _aggregatkube, (),
+            voteringsfiler + [f for s in sesjoner for f in sjekksumfiler[s]], ["aggregatkube.json"],
+            ["aggregatkube.py", "sjekksummer.py", "analyser_data_v2.py"]
+        ),
+        _regel(
+            "tidsserie", _tidsserie, (),
+            analysefiler + ["aggregatkube.json"], ["analyse_tidsserie.json", "tidsserie_delresultater.json"],
+            ["analyser_tidsserie.py", "aggregatkube.py"] + analysekode
+        ),
+        _regel(
+            "frontend", _frontend, (),
+            ["analyse_tidsserie.json"] + analysefiler + deltakelsesfiler,
+            ["tidsserie_frontend.json", "frontend/index.json"],
+            ["eksporter_frontend.py", "analyser_tidsserie.py"]
+        )
+    ]
+    
+    return {regel["navn"]: regel for regel in regler}
+
+
+def lag_avhengigheter(regler):
+    """
+    Finner hvilke regler hver regel avhenger av: de som lager
+    inndataene dens.
+    
+    Returnerer dict: {regelnavn: [regelnavn, ...]}
+    """
+    laget_av = {}
+    for regel in regler.values():
+        for fil in regel["utdata"]:
+            laget_av[fil] = regel["navn"]
+    
+    return {
+        navn: sorted({laget_av[fil] for fil in regel["inndata"] if fil in laget_av})
+        for navn, regel in regler.items()
+    }
+
+
+def velg_maal(regler, avhengigheter, maal):
+    """
+    Begrenser reglene til målene og alt de avhenger av.
+    
+    Et mål kan være et regelnavn ("analyse_2023-2024", "frontend")
+    eller en sesjon ("2023-2024"), som gir alle reglene for sesjonen.
+    """
+    valgte = set()
+    stabel = []
+    
+    for m in maal:
+        treff = [navn for navn in regler if navn == m or navn.endswith("_" + m)]
+        if not treff:
+            raise ValueError(f"ukjent mål: {m}")
+        stabel += treff
+    
+    while stabel:
+        navn = stabel.pop()
+        if navn not in valgte:
+            valgte.add(navn)
+            stabel += avhengigheter[navn]
+    
+    return {navn: regel for navn, regel in regler.items() if navn in valgte}
+
+
+# ============================================================
+# TILSTAND OG HASHER
+# ============================================================
+
+def les_tilstand(data_mappe="../data"):
+    """Leser tilstandsfilen. Returnerer en tom tilstand hvis den mangler eller er utdatert."""
+    try:
+        with open(os.path.join(data_mappe, TILSTAND_FIL), "r", encoding="utf-8") as f:
+            tilstand = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        tilstand = {}
+    
+    if tilstand.get("versjon") != TILSTAND_VERSJON:
+        tilstand = {"versjon": TILSTAND_VERSJON, "filer": {}, "regler": {}}
+    
+    return tilstand
+
+
+def lagre_tilstand(tilstand, data_mappe="../data"):
+    """Lagrer tilstanden (via en midlertidig fil, så den aldri blir halvskrevet)."""
+    filsti = os.path.join(data_mappe, TILSTAND_FIL)
+    
+    with open(filsti + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(tilstand, f, ensure_ascii=False, indent=1)
+    os.replace(filsti + ".tmp", filsti)
+
+
+def hash_fil(filsti, filer):
+    """
+    sha256 av en fil, eller None hvis den ikke finnes.
+    
+    Hashen huskes i filer sammen med størrelse og endringstid, så
+    store voteringsfiler bare leses på nytt når de faktisk er endret.
+    """
+    try:
+        status = os.stat(filsti)
+    except FileNotFoundError:
+        filer.pop(filsti, None)
+        return None
+    
+    lagret = filer.get(filsti)
+    if lagret and lagret["storrelse"] == status.st_size and lagret["endret_ns"] == status.st_mtime_ns:
+        return lagret["sha256"]
+    
+    sha = hashlib.sha256()
+    with open(filsti, "rb") as f:
+        for blokk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(blokk)
+    
+    filer[filsti] = {"storrelse": status.st_size, "endret_ns": status.st_mtime_ns, "sha256": sha.hexdigest()}
+    return sha.hexdigest()
+
+
+def hash_kode(moduler, filer):
+    """En samlet hash av kildekoden til modulene en regel bruker."""
+    sha = hashlib.sha256()
+    for modul in sorted(moduler):
+        sha.update(modul.encode("utf-8"))
+        sha.update((hash_fil(os.path.join(KODE_MAPPE, modul), filer) or "").encode("utf-8"))
+    return sha.hexdigest()
+
+
+def finn_grunn(regel, tilstand, data_mappe):
+    """
+    Sjekker om en regel må kjøres.
+    
+    Returnerer grunnen som tekst, eller None hvis regelen er oppdatert.
+    """
+    if regel["alltid"]:
+        return "kjøres alltid"
+    
+    filer = tilstand["filer"]
+    forrige = tilstand["regler"].get(regel["navn"])
+    
+    for fil in regel["inndata"]:
+        if hash_fil(os.path.join(data_mappe, fil), filer) is None:
+            return f"mangler inndata {fil}"
+    
+    if forrige is None:
+        return "aldri bygget"
+    
+    for fil in regel["utdata"]:
+        sha = hash_fil(os.path.join(data_mappe, fil), filer)
+        if sha is None:
+            return f"mangler {fil}"
+        if sha != forrige["utdata"].get(fil):
+            return f"{fil} er endret utenfra"
+    
+    if hash_kode(regel["kode"], filer) != forrige["kode"]:
+        return "endret kode"
+    
+    for fil in regel["inndata"]:
+        if hash_fil(os.path.join(data_mappe, fil), filer) != forrige["inndata"].get(fil):
+            return f"endret {fil}"
+    if set(forrige["inndata"]) != set(regel["inndata"]):
+        return "nye eller fjernede inndata"
+    
+    return None
+
+
+def registrer_bygg(regel, tilstand, data_mappe, sekunder):
+    """Husker hashene regelen ble bygget med."""
+    filer = tilstand["filer"]
+    
+    tilstand["regler"][regel["navn"]] = {
+        "inndata": {fil: hash_fil(os.path.join(data_mappe, fil), filer) for fil in regel["inndata"]},
+        "utdata": {fil: hash_fil(os.path.join(data_mappe, fil), filer) for fil in regel["utdata"]},
+        "kode": hash_kode(regel["kode"], filer),
+        "bygget": datetime.now().isoformat(timespec="seconds"),
+        "sekunder": round(sekunder, 3)
+    }
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def bygg(data_mappe="../data", maal=None, hent=None, jobber=1, tving=False, bare_vis=False, vis_logg=False):
+    """
+    Bygger alt som er utdatert.
+    
+    Parametre:
+        maal: Bygg bare disse reglene/sesjonene (og det de avhenger av)
+        hent: Sesjoner som skal synkroniseres fra API-et først
+        jobber: Antall regler som kan kjøres samtidig (egne prosesser)
+        tving: Bygg alt på nytt
+        bare_vis: Bare vis hva som ville blitt bygget
+        vis_logg: Vis utskriften fra hver regel
+    
+    Returnerer dict: {regelnavn: "bygget" | "oppdatert" | "feilet" | "hoppet_over"}
+    """
+    print("=" * 60)
+    print("🛠️  BYGGER UTDATERTE ANALYSER")
+    print("=" * 60)
+    
+    regler = lag_regler(data_mappe, hent)
+    avhengigheter = lag_avhengigheter(regler)
+    if maal:
+        regler = velg_maal(regler, avhengigheter, maal)
+    
+    tilstand = les_tilstand(data_mappe)
+    status = {}
+    ventende = set(regler)
+    kjorer = {}
+    
+    # Ved --vis bygges ingenting, så alt nedstrøms for en utdatert regel regnes som utdatert
+    ville_bygget = set()
+    
+    utforer = ProcessPoolExecutor(max_workers=jobber) if jobber > 1 and not bare_vis else None
+    start = time.perf_counter()
+    
+    try:
+        while ventende or kjorer:
+            # Start alle regler som har fått ferdig det de avhenger av
+            fremgang = True
+            while fremgang:
+                fremgang = False
+                for navn in sorted(ventende):
+                    avhenger = [a for a in avhengigheter[navn] if a in regler]
+                    if any(a not in status for a in avhenger):
+                        continue
+                    if regler[navn]["alene"] and any(regler[k]["alene"] for k in kjorer.values()):
+                        continue
+                    
+                    ventende.remove(navn)
+                    fremgang = True
+                    regel = regler[navn]
+                    
+                    if any(status[a] in ("feilet", "hoppet_over") for a in avhenger):
+                        status[navn] = "hoppet_over"
+                        print(f"   ⏭️  {navn}: hoppet over (avhenger av noe som feilet)")
+                        continue
+                    
+                    grunn = finn_grunn(regel, tilstand, data_mappe)
+                    if grunn is None and tving:
+                        grunn = "tvunget"
+                    if grunn is None and any(a in ville_bygget for a in avhenger):
+                        grunn = "avhenger av noe som bygges"
+                    
+                    if grunn is None:
+                        status[navn] = "oppdatert"
+                        continue
+                    
+                    if bare_vis:
+                        print(f"   🔨 {navn}: {grunn}")
+                        ville_bygget.add(navn)
+                        status[navn] = "bygget"
+                        continue
+                    
+                    if grunn.startswith("mangler inndata"):
+                        print(f"   ❌ {navn}: {grunn}")
+                        status[navn] = "feilet"
+                        continue
+                    
+                    print(f"   🔨 {navn}: {grunn}")
+                    if utforer:
+                        kjorer[utforer.submit(_utfor, regel["handling"], data_mappe, regel["args"])] = navn
+                    else:
+                        _ferdig(regel, _utfor(regel["handling"], data_mappe, regel["args"]), tilstand, status, data_mappe, vis_logg)
+            
+            if kjorer:
+                ferdige, _ = wait(kjorer, return_when=FIRST_COMPLETED)
+                for fremtid in ferdige:
+                    regel = regler[kjorer.pop(fremtid)]
+                    _ferdig(regel, fremtid.result(), tilstand, status, data_mappe, vis_logg)
+    finally:
+        if utforer:
+            utforer.shutdown()
+        if not bare_vis:
+            lagre_tilstand(tilstand, data_mappe)
+    
+    antall = {s: sum(1 for v in status.values() if v == s) for s in ("bygget", "oppdatert", "feilet", "hoppet_over")}
+    
+    print("\n" + "=" * 60)
+    if bare_vis:
+        print(f"📋 {antall['bygget']} av {len(status)} regler ville blitt bygget")
+    else:
+        print(f"✅ {antall['bygget']} bygget, {antall['oppdatert']} var oppdatert", end="")
+        if antall["feilet"] or antall["hoppet_over"]:
+            print(f", ❌ {antall['feilet']} feilet, {antall['hoppet_over']} hoppet over", end="")
+        print(f" ({time.perf_counter() - start:.1f} s)")
+    print("=" * 60)
+    
+    return status
+
+
+def _ferdig(regel, resultat, tilstand, status, data_mappe, vis_logg):
+    """Registrerer resultatet av en regel."""
+    ok, utskrift, sekunder = resultat
+    
+    if vis_logg or not ok:
+        print(utskrift)
+    
+    if ok:
+        registrer_bygg(regel, tilstand, data_mappe, sekunder)
+        # Lagres etter hver regel, så et avbrudd ikke gjør ferdig arbeid ugyldig
+        lagre_tilstand(tilstand, data_mappe)
+        status[regel["navn"]] = "bygget"
+        print(f"   ✓ {regel['navn']} ({sekunder:.1f} s)")
+    else:
+        tilstand["regler"].pop(regel["navn"], None)
+        status[regel["navn"]] = "feilet"
+        print(f"   ❌ {regel['navn']} feilet ({sekunder:.1f} s)")
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    
+    parser = argparse.ArgumentParser(description="Bygger analysefilene som er utdatert.")
+    parser.add_argument("maal", nargs="*", help="regler eller sesjoner (standard: alt)")
+    parser.add_argument("--data-mappe", default="../data")
+    parser.add_argument("--hent", nargs="+", default=[], metavar="SESJON", help="synkroniser sesjonene fra API-et først")
+    parser.add_argument("--jobber", type=int, default=1, help="antall regler i parallell (hver analyse har en hel sesjon i minnet)")
+    parser.add_argument("--tving", action="store_true", help="bygg alt på nytt")
+    parser.add_argument("--vis", action="store_true", help="bare vis hva som ville blitt bygget")
+    parser.add_argument("--logg", action="store_true", help="vis utskriften fra hver regel")
+    args = parser.parse_args()
+    
+    status = bygg(args.data_mappe, args.maal, args.hent, args.jobber, args.tving, args.vis, args.logg)
+    sys.exit(1 if "feilet" in status.values() or "hoppet_over" in status.values() else 0)
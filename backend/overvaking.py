@@ -0,0 +1,356 @@
+# ============================================================
+# STORTINGSVOTERING - OVERVÅKING AV PÅGÅENDE SESJON
+# ============================================================
+# Dette scriptet kjører i bakgrunnen og holder analysen av den
+# pågående sesjonen oppdatert mens Stortinget voterer.
+#
+# Hver runde (standard hvert 2. minutt):
+#   1. Henter sakslisten (ett API-kall) og sammenligner hver sak
+#      med forrige runde (status og sist oppdatert).
+#   2. Henter voteringslisten bare for saker som er nye eller
+#      endret, og stemmene bare for voteringer som ikke er lagret
+#      fra før (synkroniser_sesjon).
+#   3. Hvis det kom nye voteringer: bygger analysen, tidsserien
+#      og frontend-filene for sesjonen på nytt (orkestrering.py).
+#
+# Helse og etterslep kan leses over HTTP:
+#   /helse       200 hvis siste runde gikk bra og ikke er for gammel
+#   /metrikker   runder, API-kall, nye voteringer og etterslep
+#
+# Alle kall går gjennom den felles hastighetsbegrensningen i
+# hent_data_v2, og en runde sjekker maks MAKS_SAKER_PER_RUNDE
+# saker (resten tas i neste runde). Ved feil ventes det
+# gradvis lenger mellom rundene.
+#
+# BRUK:
+#   python overvaking.py 2025-2026
+#   STORTINGET_API_URL=http://127.0.0.1:8765/eksport python overvaking.py 2023-2024
+# ============================================================
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+
+import hent_data_v2
+from analyser_data_v2 import les_api_dato
+from orkestrering import bygg
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+STANDARD_INTERVALL = 120
+STANDARD_PORT = 8090
+
+# Ved feil dobles ventetiden, opp til dette
+MAKS_INTERVALL = 30 * 60
+
+# Saker som sjekkes per runde (hver sak koster minst ett kall,
+# pluss ett per votering)
+MAKS_SAKER_PER_RUNDE = 50
+
+# Sakslisten fra forrige runde, så en omstart ikke sjekker alt på nytt
+TILSTAND_FIL = "overvaking_tilstand.json"
+
+# /helse svarer 503 hvis siste vellykkede runde er eldre enn
+# dette antall intervaller
+MAKS_RUNDER_UTEN_SVAR = 3
+
+# Datoene fra API-et er norsk lokal tid (uten tidssone)
+API_TIDSSONE = ZoneInfo("Europe/Oslo")
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def sak_avtrykk(sak):
+    """
+    Det som endrer seg på en sak når den blir behandlet.
+    
+    Stortingets API oppdaterer status og sist_oppdatert_dato når
+    en sak blir votert over.
+    """
+    return f"{sak.get('status')}|{sak.get('sist_oppdatert_dato')}"
+
+
+def _tidspunkt(sekunder):
+    return datetime.fromtimestamp(sekunder).isoformat(timespec="seconds") if sekunder else None
+
+
+# ============================================================
+# OVERVÅKER
+# ============================================================
+
+class Overvaker:
+    """
+    Holder én sesjon oppdatert og teller det som skjer.
+    
+    Parametre:
+        sesjon_id: Sesjonen som overvåkes
+        intervall: Sekunder mellom rundene
+        maks_saker: Saker som sjekkes per runde
+    """
+    
+    def __init__(self, sesjon_id, data_mappe="../data", intervall=STANDARD_INTERVALL, maks_saker=MAKS_SAKER_PER_RUNDE):
+        self.sesjon_id = sesjon_id
+        self.data_mappe = data_mappe
+        self.intervall = intervall
+        self.maks_saker = maks_saker
+        self.stopp = threading.Event()
+        self.laas = threading.Lock()
+        
+        self.avtrykk = self._les_tilstand()
+        
+        self.startet = time.time()
+        self.runder = 0
+        self.feil_pa_rad = 0
+        self.siste_feil = None
+        self.siste_runde = None
+        self.siste_vellykkede = None
+        self.siste_endring = None
+        self.nye_voteringer = 0
+        self.api_kall = 0
+        self.ventende_saker = 0
+        self.etterslep = None
+        self.byggetid = None
+        
+        # Settes når det har kommet voteringer som ikke er med i analysen ennå
+        self.maa_bygges = False
+    
+    def _les_tilstand(self):
+        try:
+            with open(os.path.join(self.data_mappe, TILSTAND_FIL), "r", encoding="utf-8") as f:
+                tilstand = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        
+        return tilstand.get("saker", {}) if tilstand.get("sesjon_id") == self.sesjon_id else {}
+    
+    def _lagre_tilstand(self):
+        with open(os.path.join(self.data_mappe, TILSTAND_FIL), "w", encoding="utf-8") as f:
+            json.dump({"sesjon_id": self.sesjon_id, "saker": self.avtrykk}, f, separators=(",", ":"))
+    
+    def runde(self):
+        """
+        Én runde: finn endrede saker, hent nye voteringer og oppdater analysen.
+        
+        Returnerer antall nye voteringer.
+        """
+        kall_for = hent_data_v2.antall_kall
+        
+        saker = hent_data_v2.hent_saker(self.sesjon_id)
+        if not saker:
+            raise RuntimeError("fikk ingen saker fra API-et")
+        
+        # Også saker med voteringer fra før sjekkes når de endrer seg
+        # (f.eks. annen gangs behandling); synkroniser_sesjon henter
+        # bare voteringene som ikke er lagret
+        endrede = [sak for sak in saker if self.avtrykk.get(str(sak.get("id"))) != sak_avtrykk(sak)]
+        
+        denne_runden = endrede[:self.maks_saker]
+        print(f"   🔎 {len(endrede)} nye eller endrede saker, sjekker {len(denne_runden)}")
+        
+        nye = []
+        if denne_runden:
+            resultat = hent_data_v2.synkroniser_sesjon(self.sesjon_id, self.data_mappe, saker=denne_runden)
+            if resultat is None:
+                raise RuntimeError("synkroniseringen feilet")
+            nye = resultat["voteringer"]
+            self.maa_bygges = self.maa_bygges or bool(nye)
+            
+            # Sakene er sjekket; de hentes bare på nytt hvis de endrer seg
+            # igjen. Saker som ikke kunne hentes prøves i neste runde.
+            feilede = {str(s) for s in resultat["feilede_saker"]}
+            for sak in denne_runden:
+                if str(sak.get("id")) not in feilede:
+                    self.avtrykk[str(sak.get("id"))] = sak_avtrykk(sak)
+        self._lagre_tilstand()
+        
+        if self.maa_bygges:
+            start = time.perf_counter()
+            status = bygg(self.data_mappe, maal=["frontend"])
+            if "feilet" in status.values() or "hoppet_over" in status.values():
+                raise RuntimeError("oppdateringen av analysen feilet")
+            self.maa_bygges = False
+            ferdig = time.time()
+            
+            # Etterslep: fra voteringen skjedde til den er med i analysen
+            datoer = [les_api_dato(v.get("dato")) for v in nye]
+            datoer = [d.replace(tzinfo=API_TIDSSONE) for d in datoer if d]
+            with self.laas:
+                self.byggetid = time.perf_counter() - start
+                self.siste_endring = ferdig
+                self.nye_voteringer += len(nye)
+                if datoer:
+                    self.etterslep = round(ferdig - max(datoer).timestamp())
+        
+        with self.laas:
+            self.api_kall += hent_data_v2.antall_kall - kall_for
+            self.ventende_saker = len(endrede) - len(denne_runden)
+        
+        return len(nye)
+    
+    def kjor(self, maks_runder=None):
+        """
+        Kjører runder til stopp er satt (eller maks_runder er nådd).
+        
+        Feil stopper ikke overvåkingen, men ventetiden dobles for hver
+        feil på rad (opp til MAKS_INTERVALL).
+        """
+        while not self.stopp.is_set():
+            print(f"\n🔄 Runde {self.runder + 1} ({datetime.now():%H:%M:%S})")
+            
+            try:
+                antall = self.runde()
+                with self.laas:
+                    self.feil_pa_rad = 0
+                    self.siste_vellykkede = time.time()
+                print(f"   ✓ {antall} nye voteringer")
+            except Exception as e:
+                with self.laas:
+                    self.feil_pa_rad += 1
+                    self.siste_feil = f"{datetime.now().isoformat(timespec='seconds')}: {e}"
+                print(f"   ⚠️  Feil: {e}")
+            
+            with self.laas:
+                self.runder += 1
+                self.siste_runde = time.time()
+            
+            if maks_runder is not None and self.runder >= maks_runder:
+                break
+            
+            # Er det saker igjen fra forrige runde, fortsettes det med en gang
+            if self.ventende_saker and not self.feil_pa_rad:
+                continue
+            
+            ventetid = min(self.intervall * 2 ** self.feil_pa_rad, MAKS_INTERVALL)
+            self.stopp.wait(ventetid)
+    
+    def metrikker(self):
+        """Status og etterslep som dict (for /metrikker)."""
+        naa = time.time()
+        
+        with self.laas:
+            return {
+                "sesjon_id": self.sesjon_id,
+                "startet": _tidspunkt(self.startet),
+                "oppetid_sekunder": round(naa - self.startet),
+                "intervall_sekunder": self.intervall,
+                "runder": self.runder,
+                "siste_runde": _tidspunkt(self.siste_runde),
+                "siste_vellykkede_runde": _tidspunkt(self.siste_vellykkede),
+                "sekunder_siden_vellykket": round(naa - self.siste_vellykkede) if self.siste_vellykkede else None,
+                "siste_endring": _tidspunkt(self.siste_endring),
+                "feil_pa_rad": self.feil_pa_rad,
+                "siste_feil": self.siste_feil,
+                "api_kall": self.api_kall,
+                "nye_voteringer": self.nye_voteringer,
+                "ventende_saker": self.ventende_saker,
+                "kjente_saker": len(self.avtrykk),
+                "etterslep_sekunder": self.etterslep,
+                "byggetid_sekunder": round(self.byggetid, 2) if self.byggetid is not None else None
+            }
+    
+    def er_frisk(self):
+        """Frisk hvis siste vellykkede runde ikke er eldre enn MAKS_RUNDER_UTEN_SVAR intervaller."""
+        with self.laas:
+            sist = self.siste_vellykkede or self.startet
+        return time.time() - sist <= MAKS_RUNDER_UTEN_SVAR * self.intervall
+
+
+# ============================================================
+# WEBSERVER FOR HELSE OG METRIKKER
+# ============================================================
+
+class OvervakingHandler(BaseHTTPRequestHandler):
+    """Svarer på /helse og /metrikker."""
+    
+    def do_GET(self):
+        overvaker = self.server.overvaker
+        sti = urlparse(self.path).path.rstrip("/")
+        
+        if sti == "/helse":
+            frisk = overvaker.er_frisk()
+            self._send(200 if frisk else 503, {"status": "ok" if frisk else "forsinket"})
+        elif sti == "/metrikker":
+            self._send(200, overvaker.metrikker())
+        else:
+            self._send(404, {"feil": f"fant ikke {sti}"})
+    
+    def _send(self, status, data):
+        innhold = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(innhold)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(innhold)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrikkserver(overvaker, port=STANDARD_PORT):
+    """
+    Starter /helse og /metrikker i en egen tråd.
+    
+    Returnerer serveren (stopp med server.shutdown()).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), OvervakingHandler)
+    server.daemon_threads = True
+    server.overvaker = overvaker
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def start_overvaking(sesjon_id, data_mappe="../data", intervall=STANDARD_INTERVALL, port=STANDARD_PORT, maks_runder=None):
+    """
+    Overvåker en sesjon til den stoppes med Ctrl+C.
+    
+    Parametre:
+        intervall: Sekunder mellom rundene
+        port: Port for /helse og /metrikker (None = ingen server)
+        maks_runder: Stopp etter så mange runder (for testing)
+    
+    Returnerer overvåkeren (med metrikkene fra kjøringen).
+    """
+    print("=" * 60)
+    print(f"👀 OVERVÅKER SESJON {sesjon_id} (hvert {intervall}. sekund)")
+    print("=" * 60)
+    
+    overvaker = Overvaker(sesjon_id, data_mappe, intervall)
+    server = None
+    
+    if port is not None:
+        server = start_metrikkserver(overvaker, port)
+        print(f"   🌐 http://127.0.0.1:{server.server_address[1]}/helse og /metrikker")
+    
+    try:
+        overvaker.kjor(maks_runder)
+    except KeyboardInterrupt:
+        print("\n   Stopper...")
+    finally:
+        if server:
+            server.shutdown()
+    
+    return overvaker
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    sesjon = sys.argv[1] if len(sys.argv) > 1 else hent_data_v2.STANDARD_SESJON
+    start_overvaking(sesjon)
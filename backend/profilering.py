@@ -0,0 +1,315 @@
+# ============================================================
+# STORTINGSVOTERING - PROFILERING
+# ============================================================
+# Måler hvor tiden (og minnet) går i hvert steg av en kjøring,
+# f.eks. lesing, partitelling, matrise og lagring i
+# analyser_sesjon.
+#
+#   kjoring = Kjoring("analyse")
+#   with kjoring:
+#       with kjoring.steg("lesing") as steg:
+#           data = les_voteringer(...)
+#           steg["antall"] = len(data)
+#
+# Tiden måles alltid (det koster nesten ingenting), og havner i
+# en run_metadata-blokk i analyse_{sesjon}.json og
+# analyse_tidsserie.json. Minne og cProfile slås på ved behov
+# med miljøvariabelen STORTINGSVOTERING_PROFIL:
+#
+#   STORTINGSVOTERING_PROFIL=tid         skriv ut tabell over stegene
+#   STORTINGSVOTERING_PROFIL=minne       + høyeste minnebruk per steg
+#   STORTINGSVOTERING_PROFIL=cprofile    + cProfile av hele kjøringen
+#
+# (flere verdier skilles med komma, f.eks. "minne,cprofile").
+# tracemalloc gjør Python to-tre ganger tregere, så tidene er
+# bare sammenlignbare mellom kjøringer med samme innstilling.
+# ============================================================
+
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+MILJO_VARIABEL = "STORTINGSVOTERING_PROFIL"
+
+# cProfile-filene lagres her (under datamappen)
+PROFIL_MAPPE = "profiler"
+
+# Antall funksjoner som vises fra cProfile
+ANTALL_FUNKSJONER = 15
+
+# Bare én cProfile kan være aktiv om gangen, så nestede kjøringer
+# (f.eks. analyser_sesjon inne i tidsserien) profileres av den ytterste
+_aktive_kjoringer = []
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def profil_valg():
+    """
+    Leser STORTINGSVOTERING_PROFIL.
+    
+    Returnerer et sett med "tid", "minne" og/eller "cprofile".
+    "1" betyr tid og minne.
+    """
+    verdi = os.environ.get(MILJO_VARIABEL, "").strip().lower()
+    if not verdi or verdi == "0":
+        return set()
+    if verdi == "1":
+        return {"tid", "minne"}
+    return {v.strip() for v in verdi.split(",") if v.strip()}
+
+
+def _bevar_topp():
+    """
+    Tar vare på minnetoppen i alle åpne steg før tracemalloc-toppen
+    nullstilles (av et nytt steg eller en nestet kjøring).
+    """
+    topp = tracemalloc.get_traced_memory()[1]
+    for kjoring in _aktive_kjoringer:
+        if kjoring.minne and kjoring._aapne_steg:
+            info = kjoring._aapne_steg[-1]
+            info["topp"] = max(info["topp"], topp)
+
+
+def _mb(antall_bytes):
+    return round(antall_bytes / (1024 * 1024), 2)
+
+
+# ============================================================
+# KJØRING
+# ============================================================
+
+class Kjoring:
+    """
+    Tidtaking, tellere og (valgfritt) minne og cProfile for én kjøring.
+    
+    Parametre:
+        navn: Navn på kjøringen (f.eks. "analyse" eller "tidsserie")
+        minne: Mål høyeste minnebruk per steg med tracemalloc
+        cprofile: Filsti for cProfile-resultatet (True = velg selv)
+        data_mappe: Mappen cProfile-filene lagres under
+    
+    Uten argumenter styres minne og cProfile av STORTINGSVOTERING_PROFIL.
+    """
+    
+    def __init__(self, navn, minne=None, cprofile=None, data_mappe="../data"):
+        valg = profil_valg()
+        
+        self.navn = navn
+        self.minne = "minne" in valg if minne is None else minne
+        self.cprofile = "cprofile" in valg if cprofile is None else cprofile
+        self.vis_tabell = bool(valg) or self.minne or bool(self.cprofile)
+        self.data_mappe = data_mappe
+        
+        self.steg_data = {}
+        self.tellere = {}
+        self.startet = None
+        self.varighet = None
+        self.minne_topp = None
+        self.profil_fil = None
+        
+        self._start = None
+        self._aapne_steg = []
+        self._startet_tracemalloc = False
+        self._profiler = None
+    
+    def __enter__(self):
+        self.startet = datetime.now().isoformat(timespec="seconds")
+        
+        if self.minne:
+            if tracemalloc.is_tracing():
+                _bevar_topp()
+            else:
+                tracemalloc.start()
+                self._startet_tracemalloc = True
+            tracemalloc.reset_peak()
+            # Hele kjøringen er det ytterste "steget"
+            self._aapne_steg = [{"minne_start": tracemalloc.get_traced_memory()[0], "topp": 0}]
+        
+        if self.cprofile and not any(k._profiler for k in _aktive_kjoringer):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        
+        _aktive_kjoringer.append(self)
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *feil):
+        self.varighet = time.perf_counter() - self._start
+        _aktive_kjoringer.remove(self)
+        
+        if self.minne:
+            rot = self._aapne_steg.pop()
+            self.minne_topp = max(rot["topp"], tracemalloc.get_traced_memory()[1]) - rot["minne_start"]
+            if self._startet_tracemalloc:
+                tracemalloc.stop()
+        
+        if self._profiler:
+            self._profiler.disable()
+            self._lagre_profil()
+        
+        if self.vis_tabell and not any(feil):
+            self.skriv_ut()
+        
+        return False
+    
+    @contextmanager
+    def steg(self, navn, antall=None):
+        """
+        Måler ett steg. Antall poster kan gis som argument eller settes
+        underveis med steg["antall"] = ...
+        
+        Et steg som kjøres flere ganger summeres.
+        """
+        info = {"antall": antall}
+        
+        if self.minne:
+            _bevar_topp()
+            tracemalloc.reset_peak()
+            info["minne_start"] = tracemalloc.get_traced_memory()[0]
+            info["topp"] = 0
+        
+        self._aapne_steg.append(info)
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            sekunder = time.perf_counter() - start
+            self._aapne_steg.pop()
+            
+            data = self.steg_data.setdefault(navn, {"sekunder": 0.0, "antall": None, "ganger": 0})
+            data["sekunder"] += sekunder
+            data["ganger"] += 1
+            if info["antall"] is not None:
+                data["antall"] = (data["antall"] or 0) + info["antall"]
+            
+            if self.minne:
+                topp = max(info["topp"], tracemalloc.get_traced_memory()[1])
+                forelder = self._aapne_steg[-1]
+                forelder["topp"] = max(forelder["topp"], topp)
+                økning = topp - info["minne_start"]
+                data["minne_topp_bytes"] = max(data.get("minne_topp_bytes", 0), økning)
+    
+    def tell(self, navn, antall=1):
+        """Legger til antall på en teller."""
+        self.tellere[navn] = self.tellere.get(navn, 0) + antall
+    
+    def _lagre_profil(self):
+        if self.cprofile is True:
+            mappe = os.path.join(self.data_mappe, PROFIL_MAPPE)
+            os.makedirs(mappe, exist_ok=True)
+            tidspunkt = datetime.now().strftime("%Y%m%d-%H%M%S")
+            self.profil_fil = os.path.join(mappe, f"{self.navn}_{tidspunkt}.prof")
+        else:
+            self.profil_fil = self.cprofile
+        
+        self._profiler.dump_stats(self.profil_fil)
+    
+    def metadata(self):
+        """
+        Returnerer run_metadata-blokken: tider, antall og minne per steg.
+        
+        Kan kalles før kjøringen er ferdig (f.eks. rett før lagring);
+        varigheten er da tiden så langt.
+        """
+        varighet = self.varighet if self.varighet is not None else time.perf_counter() - self._start
+        
+        steg = {}
+        for navn, data in self.steg_data.items():
+            steg[navn] = {"sekunder": round(data["sekunder"], 4)}
+            if data["ganger"] > 1:
+                steg[navn]["ganger"] = data["ganger"]
+            if data["antall"] is not None:
+                steg[navn]["antall"] = data["antall"]
+                if data["sekunder"] > 0:
+                    steg[navn]["per_sekund"] = round(data["antall"] / data["sekunder"])
+            if "minne_topp_bytes" in data:
+                steg[navn]["minne_topp_mb"] = _mb(data["minne_topp_bytes"])
+        
+        metadata = {
+            "kjoring": self.navn,
+            "startet": self.startet,
+            "varighet_sekunder": round(varighet, 4),
+            "python": platform.python_version(),
+            "steg": steg,
+            "tellere": dict(self.tellere),
+            "profilering": {"minne": self.minne, "cprofile": self._profiler is not None}
+        }
+        
+        if self.minne:
+            if self.minne_topp is None:
+                # Kjøringen pågår fortsatt
+                rot = self._aapne_steg[0]
+                topp = max(rot["topp"], tracemalloc.get_traced_memory()[1]) - rot["minne_start"]
+            else:
+                topp = self.minne_topp
+            metadata["minne_topp_mb"] = _mb(topp)
+        if self.profil_fil:
+            metadata["profil_fil"] = self.profil_fil
+        
+        return metadata
+    
+    def skriv_ut(self):
+        """Skriver ut en tabell over stegene (og de tyngste funksjonene fra cProfile)."""
+        metadata = self.metadata()
+        totalt = metadata["varighet_sekunder"] or 1
+        
+        print(f"\n⏱️  PROFIL: {self.navn} ({metadata['varighet_sekunder']:.2f} s)")
+        print("-" * 60)
+        for navn, data in metadata["steg"].items():
+            linje = f"   {navn:<16}{data['sekunder']:>9.3f} s {100 * data['sekunder'] / totalt:>5.1f} %"
+            linje += f" {data['antall']:>8} stk" if "antall" in data else " " * 13
+            if "minne_topp_mb" in data:
+                linje += f" {data['minne_topp_mb']:>8.1f} MB"
+            print(linje.rstrip())
+        
+        if "minne_topp_mb" in metadata:
+            print(f"   Høyeste minnebruk: {metadata['minne_topp_mb']:.1f} MB")
+        
+        if self.profil_fil:
+            utdata = io.StringIO()
+            pstats.Stats(self.profil_fil, stream=utdata).sort_stats("cumulative").print_stats(ANTALL_FUNKSJONER)
+            print(utdata.getvalue())
+            print(f"   cProfile lagret til {self.profil_fil}")
+
+
+def json_med_metadata(data, kjoring, **json_args):
+    """
+    Serialiserer data som JSON med kjoring.metadata() lagt til som
+    "run_metadata".
+    
+    Serialiseringen måles som steget "lagring", så run_metadata
+    kan lages etterpå og tas med uten å serialisere alt to ganger.
+    Resultatet er det samme som json.dumps gir med run_metadata
+    som siste nøkkel i data.
+    """
+    with kjoring.steg("lagring"):
+        tekst = json.dumps(data, **json_args)
+    
+    metadata = kjoring.metadata()
+    data["run_metadata"] = metadata
+    
+    innrykk = json_args.get("indent")
+    komma, kolon = json_args.get("separators") or ((", " if innrykk is None else ","), ": ")
+    nokkel = json.dumps("run_metadata") + kolon
+    
+    if innrykk is None:
+        starten = tekst[:-1] + komma if len(data) > 1 else "{"
+        return starten + nokkel + json.dumps(metadata, **json_args) + "}"
+    
+    mellomrom = " " * innrykk if isinstance(innrykk, int) else innrykk
+    blokk = json.dumps(metadata, **json_args).replace("\n", "\n" + mellomrom)
+    starten = tekst[:-2] + komma if len(data) > 1 else "{"
+    return starten + "\n" + mellomrom + nokkel + blokk + "\n}"
@@ -0,0 +1,278 @@
+# ============================================================
+# STORTINGSVOTERING - REPRESENTANTREGISTER
+# ============================================================
+# Dette scriptet kobler samme person på tvers av sesjoner.
+#
+# Representanter kan bytte parti (f.eks. bli uavhengige, "Uav",
+# eller gå til Pasientfokus, "PF"). Registeret bygges én gang
+# fra alle voteringer_*.json og gir for hver representant:
+#   - navn og fylke
+#   - en datert partihistorikk (hvilket parti, fra og til)
+#
+# Oppslag skjer via en dictionary på representant-ID med
+# sorterte startdatoer for partiperiodene (lag_partiindeks), så
+# analysene finner riktig parti på en gitt dato med et binærsøk
+# uten å lese stemmene på nytt.
+# ============================================================
+
+import json
+import os
+from bisect import bisect_right
+from collections import defaultdict
+
+from analyser_data_v2 import finn_sesjoner, les_api_dato, strom_voteringer
+
+REGISTER_FIL = "representanter.json"
+
+# ============================================================
+# BYGGING
+# ============================================================
+
+def _lag_partihistorikk(parti_per_dag):
+    """
+    Slår sammen {dato: parti} til perioder.
+    
+    Returnerer liste med {"parti", "fra", "til"}, sortert på dato.
+    """
+    perioder = []
+    
+    for dag in sorted(parti_per_dag):
+        parti = parti_per_dag[dag]
+        if perioder and perioder[-1]["parti"] == parti:
+            perioder[-1]["til"] = dag
+        else:
+            perioder.append({"parti": parti, "fra": dag, "til": dag})
+    
+    return perioder
+
+
+def bygg_representantregister(data_mappe="../data", sesjoner=None):
+    """
+    Bygger registeret ved å gå gjennom alle lagrede voteringer én gang.
+    
+    Returnerer dictionary: {rep_id: {fornavn, etternavn, fylke,
+    sesjoner, partihistorikk}}
+    """
+    if sesjoner is None:
+        sesjoner = finn_sesjoner(data_mappe)
+    
+    personer = {}
+    parti_per_dag = defaultdict(dict)
+    
+    for sesjon_id in sesjoner:
+        print(f"   Leser {sesjon_id}...")
+        
+        for votering in strom_voteringer(sesjon_id, data_mappe):
+            dato = les_api_dato(votering.get("dato", ""))
+            dag = dato.strftime("%Y-%m-%d") if dato else None
+            
+            for stemme in votering.get("stemmer") or []:
+                rep = stemme.get("representant", {})
+                rep_id = rep.get("id")
+                if not rep_id:
+                    continue
+                
+                person = personer.get(rep_id)
+                if person is None:
+                    person = personer[rep_id] = {
+                        "fornavn": rep.get("fornavn", ""),
+                        "etternavn": rep.get("etternavn", ""),
+                        "fylke": rep.get("fylke", {}).get("id"),
+                        "sesjoner": []
+                    }
+                if not person["sesjoner"] or person["sesjoner"][-1] != sesjon_id:
+                    person["sesjoner"].append(sesjon_id)
+                
+                parti_id = rep.get("parti", {}).get("id")
+                if parti_id and dag:
+                    parti_per_dag[rep_id][dag] = parti_id
+    
+    for rep_id, person in personer.items():
+        person["partihistorikk"] = _lag_partihistorikk(parti_per_dag.get(rep_id, {}))
+    
+    return personer
+
+
+# ============================================================
+# LAGRING (KOMPAKT TABELLFORMAT)
+# ============================================================
+
+def lagre_representantregister(register, data_mappe="../data"):
+    """
+    Lagrer registeret som kompakte tabeller.
+    
+    Representantene lagres som rader, og partiperiodene peker på
+    representantens radnummer i stedet for å gjenta ID-en som tekst.
+    """
+    rep_ider = sorted(register)
+    indeks = {rep_id: i for i, rep_id in enumerate(rep_ider)}
+    
+    representanter = []
+    perioder = []
+    
+    for rep_id in rep_ider:
+        person = register[rep_id]
+        representanter.append([
+            rep_id,
+            person["fornavn"],
+            person["etternavn"],
+            person["fylke"],
+            person["sesjoner"]
+        ])
+        for periode in person["partihistorikk"]:
+            perioder.append([indeks[rep_id], periode["parti"], periode["fra"], periode["til"]])
+    
+    data = {
+        "representanter": {
+            "kolonner": ["id", "fornavn", "etternavn", "fylke", "sesjoner"],
+            "rader": representanter
+        },
+        "partiperioder": {
+            "kolonner": ["representant", "parti", "fra", "til"],
+            "rader": perioder
+        }
+    }
+    
+    filsti = os.path.join(data_mappe, REGISTER_FIL)
+    with open(filsti, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    
+    return filsti
+
+
+def les_representantregister(data_mappe="../data"):
+    """
+    Leser registeret fra fil og bygger opp oppslagstabellen.
+    
+    Returnerer samme format som bygg_representantregister.
+    """
+    with open(os.path.join(data_mappe, REGISTER_FIL), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    
+    rader = data["representanter"]["rader"]
+    register = {}
+    
+    for rep_id, fornavn, etternavn, fylke, sesjoner in rader:
+        register[rep_id] = {
+            "fornavn": fornavn,
+            "etternavn": etternavn,
+            "fylke": fylke,
+            "sesjoner": sesjoner,
+            "partihistorikk": []
+        }
+    
+    for rep_indeks, parti, fra, til in data["partiperioder"]["rader"]:
+        register[rader[rep_indeks][0]]["partihistorikk"].append({
+            "parti": parti,
+            "fra": fra,
+            "til": til
+        })
+    
+    return register
+
+
+# ============================================================
+# OPPSLAG
+# ============================================================
+
+def lag_partiindeks(register):
+    """
+    Lager oppslagstabellen parti_ved_dato bruker.
+    
+    Returnerer dict: {rep_id: (startdatoer, partier)}, der startdatoene
+    er sortert, så et oppslag blir et binærsøk.
+    """
+    return {
+        rep_id: (
+            [periode["fra"] for periode in person["partihistorikk"]],
+            [periode["parti"] for periode in person["partihistorikk"]]
+        )
+        for rep_id, person in register.items()
+        if person["partihistorikk"]
+    }
+
+
+def parti_ved_dato(partiindeks, rep_id, dato):
+    """
+    Finner hvilket parti en representant tilhørte på en gitt dato.
+    
+    partiindeks kommer fra lag_partiindeks. dato kan være "ÅÅÅÅ-MM-DD",
+    en datetime eller API-formatet. Mellom to perioder (f.eks. i et
+    sommeropphold) brukes partiet fra siste periode før datoen, og før
+    første periode det første partiet. Returnerer None for ukjente
+    representanter og for datoer som mangler eller ikke kan tolkes.
+    """
+    oppslag = partiindeks.get(rep_id)
+    if oppslag is None or not dato:
+        return None
+    
+    if isinstance(dato, str) and dato.startswith("/Date("):
+        dato = les_api_dato(dato)
+        if dato is None:
+            return None
+    if not isinstance(dato, str):
+        dato = dato.strftime("%Y-%m-%d")
+    
+    startdatoer, partier = oppslag
+    return partier[max(bisect_right(startdatoer, dato) - 1, 0)]
+
+
+def finn_partiskifter(register):
+    """
+    Lister alle partiskifter i registeret.
+    
+    Returnerer liste med {rep_id, navn, fra_parti, til_parti, dato},
+    sortert på dato.
+    """
+    skifter = []
+    
+    for rep_id, person in register.items():
+        historikk = person["partihistorikk"]
+        for forrige, neste in zip(historikk, historikk[1:]):
+            skifter.append({
+                "rep_id": rep_id,
+                "navn": f"{person['fornavn']} {person['etternavn']}".strip(),
+                "fra_parti": forrige["parti"],
+                "til_parti": neste["parti"],
+                "dato": neste["fra"]
+            })
+    
+    skifter.sort(key=lambda x: x["dato"])
+    return skifter
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def oppdater_representantregister(data_mappe="../data"):
+    """
+    Bygger registeret fra alle sesjoner og lagrer det.
+    """
+    print("=" * 60)
+    print("👥 BYGGER REPRESENTANTREGISTER")
+    print("=" * 60)
+    
+    register = bygg_representantregister(data_mappe)
+    
+    if not register:
+        print("❌ Fant ingen representanter i voteringsfilene!")
+        return None
+    
+    filsti = lagre_representantregister(register, data_mappe)
+    skifter = finn_partiskifter(register)
+    
+    print(f"\n   ✓ {len(register)} representanter, {len(skifter)} partiskifter")
+    for skifte in skifter[:10]:
+        print(f"   • {skifte['dato']}: {skifte['navn']} {skifte['fra_parti']} → {skifte['til_parti']}")
+    print(f"   💾 Lagret til {filsti}")
+    
+    return register
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    oppdater_representantregister()
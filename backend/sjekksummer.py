@@ -0,0 +1,240 @@
+# ============================================================
+# STORTINGSVOTERING - SJEKKSUMMER
+# ============================================================
+# Dette scriptet lager en sjekksum-indeks (Merkle-tre) for de
+# lagrede voteringene:
+#   - én SHA-256 per votering
+#   - én per sak (av voteringenes sjekksummer)
+#   - én for hele sesjonen (av sakenes sjekksummer)
+#
+# Indeksen skrives ved innhenting til sjekksummer_{sesjon}.json.
+# To kopier av en sesjon (eller filen og indeksen) kan da
+# sammenlignes ovenfra og ned: er sesjonssummen lik, er alt
+# likt. Ellers sjekkes bare sakene med ulik sum, og til slutt
+# bare voteringene i de sakene. Arbeidet blir proporsjonalt
+# med antall endringer, ikke med størrelsen på sesjonen.
+# ============================================================
+
+import hashlib
+import json
+import os
+
+from analyser_data_v2 import strom_voteringer
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+SJEKKSUM_VERSJON = 1
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def sjekksum_fil(sesjon_id, data_mappe="../data"):
+    """Stien til sjekksum-indeksen for en sesjon."""
+    return os.path.join(data_mappe, f"sjekksummer_{sesjon_id}.json")
+
+
+def hash_votering(votering):
+    """
+    SHA-256 av én votering i kanonisk form.
+    
+    Nøklene sorteres og stemmene ordnes etter representant-ID, så
+    samme innhold alltid gir samme sum uansett rekkefølge i filen.
+    """
+    stemmer = sorted(
+        votering.get("stemmer") or [],
+        key=lambda s: str(s.get("representant", {}).get("id"))
+    )
+    kanonisk = json.dumps(
+        dict(votering, stemmer=stemmer),
+        ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(kanonisk.encode("utf-8")).hexdigest()
+
+
+def _samle_hash(barn):
+    """Sjekksum av en samling {nøkkel: sjekksum}, uavhengig av rekkefølge."""
+    linjer = "\n".join(f"{nokkel}:{barn[nokkel]}" for nokkel in sorted(barn))
+    return hashlib.sha256(linjer.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# BYGGING OG LAGRING
+# ============================================================
+
+def lag_sjekksummer(voteringer, sesjon_id):
+    """
+    Lager sjekksum-indeksen for en sesjon.
+    
+    voteringer kan være en liste eller en generator (f.eks. fra
+    strom_voteringer).
+    
+    Returnerer dict:
+        {"versjon", "sesjon_id", "sesjon": hash, "antall_voteringer",
+         "saker": {sak_id: {"hash": hash, "voteringer": {votering_id: hash}}}}
+    """
+    saker = {}
+    antall = 0
+    
+    for votering in voteringer:
+        sak_id = str(votering.get("sak_id"))
+        votering_id = str(votering.get("votering_id"))
+        sak = saker.setdefault(sak_id, {"voteringer": {}})
+        sak["voteringer"][votering_id] = hash_votering(votering)
+        antall += 1
+    
+    for sak in saker.values():
+        sak["hash"] = _samle_hash(sak["voteringer"])
+    
+    return {
+        "versjon": SJEKKSUM_VERSJON,
+        "sesjon_id": sesjon_id,
+        "sesjon": _samle_hash({sak_id: sak["hash"] for sak_id, sak in saker.items()}),
+        "antall_voteringer": antall,
+        "saker": dict(sorted(saker.items()))
+    }
+
+
+def lagre_sjekksummer(sjekksummer, data_mappe="../data"):
+    """Lagrer indeksen kompakt (uten innrykk)."""
+    filsti = sjekksum_fil(sjekksummer["sesjon_id"], data_mappe)
+    with open(filsti, "w", encoding="utf-8") as f:
+        json.dump(sjekksummer, f, ensure_ascii=False, separators=(",", ":"))
+    return filsti
+
+
+def les_sjekksummer(sesjon_id, data_mappe="../data"):
+    """Leser indeksen for en sesjon, eller None hvis den mangler eller er utdatert."""
+    try:
+        with open(sjekksum_fil(sesjon_id, data_mappe), "r", encoding="utf-8") as f:
+            sjekksummer = json.load(f)
+    except FileNotFoundError:
+        return None
+    
+    if sjekksummer.get("versjon") != SJEKKSUM_VERSJON:
+        return None
+    
+    return sjekksummer
+
+
+# ============================================================
+# SAMMENLIGNING
+# ============================================================
+
+def sammenlign_sjekksummer(gammel, ny):
+    """
+    Finner nøyaktig hvilke voteringer som er forskjellige i to indekser.
+    
+    Går ovenfra og ned og ser bare på saker med ulik sjekksum.
+    
+    Returnerer dict med:
+        - lik: True hvis sesjonssummene er like
+        - endrede_saker: sak_id-er med ulik sum
+        - nye, fjernede, endrede: votering_id-er
+    """
+    resultat = {"lik": gammel["sesjon"] == ny["sesjon"], "endrede_saker": [], "nye": [], "fjernede": [], "endrede": []}
+    
+    if resultat["lik"]:
+        return resultat
+    
+    gamle_saker = gammel["saker"]
+    nye_saker = ny["saker"]
+    
+    for sak_id in sorted(set(gamle_saker) | set(nye_saker)):
+        a = gamle_saker.get(sak_id)
+        b = nye_saker.get(sak_id)
+        if a is not None and b is not None and a["hash"] == b["hash"]:
+            continue
+        
+        resultat["endrede_saker"].append(sak_id)
+        a_vot = a["voteringer"] if a else {}
+        b_vot = b["voteringer"] if b else {}
+        
+        for votering_id in sorted(set(a_vot) | set(b_vot)):
+            if votering_id not in a_vot:
+                resultat["nye"].append(votering_id)
+            elif votering_id not in b_vot:
+                resultat["fjernede"].append(votering_id)
+            elif a_vot[votering_id] != b_vot[votering_id]:
+                resultat["endrede"].append(votering_id)
+    
+    return resultat
+
+
+def endringer_siden_innhenting(sesjon_id, data_mappe="../data", voteringer=None):
+    """
+    Sammenligner voteringsfilen med indeksen som ble skrevet ved innhentingen.
+    
+    Parametre:
+        voteringer: Voteringene hvis de allerede er lest inn (ellers
+                    strømmes voteringer_{sesjon_id}.json)
+    
+    Returnerer resultatet fra sammenlign_sjekksummer, med "endrede"
+    (ulikt innhold) og "fjernede" (mangler i filen) som voteringene
+    som må hentes på nytt, og "antall_voteringer" i filen. None hvis
+    det ikke finnes noen indeks.
+    """
+    lagret = les_sjekksummer(sesjon_id, data_mappe)
+    if lagret is None:
+        return None
+    
+    if voteringer is None:
+        voteringer = strom_voteringer(sesjon_id, data_mappe)
+    naa = lag_sjekksummer(voteringer, sesjon_id)
+    
+    forskjell = sammenlign_sjekksummer(lagret, naa)
+    forskjell["antall_voteringer"] = naa["antall_voteringer"]
+    return forskjell
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def kontroller_sjekksummer(sesjon_id, data_mappe="../data"):
+    """
+    Sjekker at voteringsfilen fortsatt stemmer med indeksen fra innhentingen.
+    
+    Returnerer resultatet fra sammenlign_sjekksummer, eller None hvis
+    voteringsfilen eller indeksen mangler. En manglende indeks regnes
+    som feil: den lages bare ved innhenting, ellers ville en endret
+    fil blitt godkjent mot seg selv.
+    """
+    print("=" * 60)
+    print(f"🔐 KONTROLLERER SJEKKSUMMER FOR SESJON {sesjon_id}")
+    print("=" * 60)
+    
+    try:
+        forskjell = endringer_siden_innhenting(sesjon_id, data_mappe)
+    except FileNotFoundError:
+        print(f"❌ Fant ikke voteringer_{sesjon_id}.json")
+        return None
+    
+    if forskjell is None:
+        print(f"❌ Fant ikke {os.path.basename(sjekksum_fil(sesjon_id, data_mappe))}")
+        print("   Indeksen lages ved innhenting (fetch eller sync)")
+        return None
+    
+    if forskjell["lik"]:
+        print(f"   ✅ Alle {forskjell['antall_voteringer']} voteringer stemmer med indeksen")
+    else:
+        print(f"   ❌ {len(forskjell['endrede_saker'])} saker har endret seg:")
+        print(f"      {len(forskjell['endrede'])} endrede, {len(forskjell['nye'])} nye, "
+              f"{len(forskjell['fjernede'])} fjernede voteringer")
+        for votering_id in forskjell["endrede"][:10]:
+            print(f"   • Votering {votering_id}")
+    
+    return forskjell
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import sys
+    
+    sesjon = sys.argv[1] if len(sys.argv) > 1 else "2023-2024"
+    kontroller_sjekksummer(sesjon)
@@ -0,0 +1,484 @@
+# ============================================================
+# STORTINGSVOTERING - SØKEINDEKS
+# ============================================================
+# Fritekstsøk i sakstitler, voteringstemaer og sakdetaljer
+# (komité, emner, sakstype), uten å lese voteringsfilene.
+#
+# Indeksen er invertert: for hvert ord lagres hvilke voteringer
+# det står i. Ordene normaliseres for norsk:
+#
+#   - små bokstaver, æøå beholdes (é → e, ä → æ, ö → ø)
+#   - vanlige småord (og, i, om, til ...) tas ikke med
+#   - enkel stamming: vanlige endelser fjernes og dobbel
+#     konsonant til slutt forenkles, så "strømmen", "strøm"
+#     og "budsjettet", "budsjetter" gir samme ord
+#
+# Søk:
+#
+#   strøm avgift           begge ordene (OG)
+#   strøm OR energi        ett av dem (ELLER går også)
+#   strøm -nett            strøm, men ikke nett (IKKE går også)
+#   budsj*                 ord som begynner med budsj
+#   type:budsjett          sakstype
+#   komite:fin* emne:123   komité-id og emne-id (fra berik_saker)
+#
+#   indeks = last_sokeindeks()
+#   indeks.sok("strøm OR energi")   → {sesjon_id: [votering_id, ...]}
+#   beregn_enighet_for_sok("strøm", "2023-2024")
+#
+# Hver sesjon har sin egen del av indeksen. Nye voteringer
+# legges til når de lagres (hent_data_v2.lagre_voteringer), og
+# voteringer som er hentet på nytt med endret tekst får ordene
+# sine byttet ut. En sesjon indekseres på nytt når sakdetaljene
+# er hentet (berik_saker).
+# ============================================================
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import time
+
+from analyser_data_v2 import beregn_enighetsmatrise, finn_sesjoner, strom_voteringer, tell_alle_voteringer
+from berik_saker import les_dimensjoner
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+INDEKS_FIL = "sokeindeks.json"
+INDEKS_VERSJON = 1
+
+# Småord som står i nesten alle titler
+STOPPORD = {
+    "og", "i", "om", "av", "til", "for", "på", "med", "fra", "en", "et", "ei",
+    "den", "det", "de", "som", "er", "å", "at", "ved", "samt", "eller", "mv",
+    "m", "v", "mm", "sin", "sine", "sitt", "under", "etter", "mot", "ny", "nye"
+}
+
+# Endelser som fjernes (lengste først), og hvor kort stammen kan bli
+ENDELSER = sorted([
+    "hetenes", "hetene", "hetens", "heten", "heter", "endes", "ende", "ande",
+    "edes", "enes", "ene", "ane", "ens", "ers", "ets", "het", "ast", "ert",
+    "ede", "en", "ar", "er", "as", "es", "et", "a", "e"
+], key=len, reverse=True)
+MIN_STAMME = 3
+
+# "s" fjernes bare etter disse bokstavene (statens, budsjetts, men ikke hus)
+S_ETTER = set("bcdfghjlmnoprtvyz")
+
+# Felt som kan søkes i med felt:verdi (verdien stemmes ikke)
+FELT = ("type", "komite", "emne")
+
+# Ord som styrer søket
+ELLER = {"OR", "ELLER"}
+IKKE = {"NOT", "IKKE"}
+
+TEGN = str.maketrans({
+    "é": "e", "è": "e", "ê": "e", "á": "a", "à": "a", "ó": "o", "ò": "o",
+    "ô": "o", "ü": "u", "ä": "æ", "ö": "ø"
+})
+ORD = re.compile(r"[^\W_]+")
+
+# ============================================================
+# ORD OG STAMMER
+# ============================================================
+
+def stam(ordet):
+    """Enkel norsk stamming: fjerner én endelse og forenkler dobbel konsonant."""
+    for endelse in ENDELSER:
+        if ordet.endswith(endelse) and len(ordet) - len(endelse) >= MIN_STAMME:
+            ordet = ordet[:-len(endelse)]
+            break
+    else:
+        if ordet.endswith("s") and len(ordet) > MIN_STAMME and ordet[-2] in S_ETTER:
+            ordet = ordet[:-1]
+    
+    if len(ordet) > MIN_STAMME and ordet[-1] == ordet[-2] and ordet[-1] not in "aeiouyæøå":
+        ordet = ordet[:-1]
+    return ordet
+
+
+def ord_i_tekst(tekst):
+    """
+    Deler en tekst i normaliserte og stemmede ord.
+    
+    Returnerer en liste (samme ord kan komme flere ganger).
+    """
+    if not tekst:
+        return []
+    return [
+        stam(o) for o in ORD.findall(str(tekst).lower().translate(TEGN))
+        if o not in STOPPORD
+    ]
+
+
+def termer_for_votering(votering, dimensjoner=None):
+    """
+    Alle søkeordene for én votering: ord fra sakstittel, tema,
+    sakstype og - hvis sakdetaljene er hentet - komité og emner.
+    
+    Returnerer et sett.
+    """
+    termer = set(ord_i_tekst(votering.get("sak_tittel")))
+    termer.update(ord_i_tekst(votering.get("votering_tema")))
+    
+    sakstype = votering.get("sakstype")
+    if sakstype:
+        termer.update(ord_i_tekst(sakstype))
+        termer.add(f"type:{str(sakstype).lower()}")
+    
+    sak = (dimensjoner or {}).get("saker", {}).get(str(votering.get("sak_id")))
+    if sak:
+        if sak["komite"]:
+            termer.add(f"komite:{sak['komite'].lower()}")
+            termer.update(ord_i_tekst(dimensjoner["komiteer"].get(sak["komite"])))
+        for emne_id in sak["emner"]:
+            termer.add(f"emne:{str(emne_id).lower()}")
+            termer.update(ord_i_tekst(dimensjoner["emner"].get(emne_id)))
+    
+    return termer
+
+
+# ============================================================
+# BYGGING
+# ============================================================
+
+def ny_indeksdata():
+    """Tom indeks (slik den lagres)."""
+    return {"versjon": INDEKS_VERSJON, "sesjoner": {}}
+
+
+def _termsum(termer):
+    """Kort hash av termene til én votering."""
+    return hashlib.sha256("\n".join(sorted(termer)).encode("utf-8")).hexdigest()[:16]
+
+
+def oppdater_indeksdata(data, voteringer, sesjon_id, dimensjoner=None):
+    """
+    Legger nye voteringer fra én sesjon til i indeksen.
+    
+    Hver votering får et løpenummer i sesjonen; ordlistene er sorterte
+    lister med løpenumre, så nye voteringer bare legges til bakerst.
+    Radene er [votering_id, sak_id, termsum]. Voteringer som allerede
+    er med, men har fått andre termer (f.eks. en votering som er hentet
+    på nytt med rettet tema), beholder løpenummeret og får ordene sine
+    byttet ut.
+    
+    Returnerer antall nye eller endrede voteringer.
+    """
+    sesjon = data["sesjoner"].setdefault(sesjon_id, {"voteringer": [], "termer": {}})
+    rader = sesjon["voteringer"]
+    termer = sesjon["termer"]
+    nummer_for = {rad[0]: i for i, rad in enumerate(rader)}
+    endrede = {}
+    nye = 0
+    
+    for votering in voteringer:
+        votering_id = votering.get("votering_id")
+        if votering_id is None:
+            continue
+        
+        votering_termer = termer_for_votering(votering, dimensjoner)
+        termsum = _termsum(votering_termer)
+        nummer = nummer_for.get(votering_id)
+        
+        if nummer is None:
+            nummer = nummer_for[votering_id] = len(rader)
+            rader.append([votering_id, votering.get("sak_id"), termsum])
+            for term in votering_termer:
+                termer.setdefault(term, []).append(nummer)
+            nye += 1
+        elif rader[nummer][2:] != [termsum]:
+            # Eldre indekser har ingen termsum; de radene byttes ut én gang
+            rader[nummer] = [votering_id, votering.get("sak_id"), termsum]
+            endrede[nummer] = votering_termer
+    
+    if endrede:
+        # Fjern de gamle ordene til de endrede voteringene, og sett inn de nye
+        for term in list(termer):
+            beholdt = [n for n in termer[term] if n not in endrede]
+            if beholdt:
+                termer[term] = beholdt
+            else:
+                del termer[term]
+        for nummer, votering_termer in endrede.items():
+            for term in votering_termer:
+                bisect.insort(termer.setdefault(term, []), nummer)
+    
+    return nye + len(endrede)
+
+
+def les_indeksdata(data_mappe="../data"):
+    """Leser den lagrede indeksen, eller lager en tom (også hvis filen er ødelagt)."""
+    try:
+        with open(os.path.join(data_mappe, INDEKS_FIL), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return ny_indeksdata()
+    
+    if data.get("versjon") != INDEKS_VERSJON:
+        return ny_indeksdata()
+    
+    return data
+
+
+def lagre_indeksdata(data, data_mappe="../data"):
+    """Lagrer indeksen kompakt (uten innrykk), via en midlertidig fil."""
+    filsti = os.path.join(data_mappe, INDEKS_FIL)
+    midlertidig = filsti + ".tmp"
+    with open(midlertidig, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(midlertidig, filsti)
+    return filsti
+
+
+# ============================================================
+# SØK
+# ============================================================
+
+def tolk_sporring(sporring):
+    """
+    Gjør en søkestreng om til grupper som bindes sammen med ELLER.
+    
+    Hver gruppe er en liste med (ikke, term, prefiks): alle termene
+    uten ikke må være med, ingen av de med ikke. Et ord i søket kan
+    gi flere termer ("strøm-avgift" gir strøm og avgift).
+    """
+    grupper = [[]]
+    ikke = False
+    
+    for ledd in sporring.split():
+        if ledd in ELLER:
+            grupper.append([])
+            continue
+        if ledd in IKKE:
+            ikke = True
+            continue
+        if ledd.startswith("-") and len(ledd) > 1:
+            ikke, ledd = True, ledd[1:]
+        
+        prefiks = ledd.endswith("*")
+        ledd = ledd.rstrip("*")
+        felt, _, verdi = ledd.partition(":")
+        
+        if verdi and felt.lower() in FELT:
+            termer = [f"{felt.lower()}:{verdi.lower()}"]
+        elif prefiks:
+            # Stammen er alltid starten av ordet, så den fanger også bøyde former
+            termer = [stam(o) for o in ORD.findall(ledd.lower().translate(TEGN))]
+        else:
+            termer = ord_i_tekst(ledd)
+        
+        for term in termer:
+            grupper[-1].append((ikke, term, prefiks))
+        ikke = False
+    
+    return [gruppe for gruppe in grupper if gruppe]
+
+
+class Sokeindeks:
+    """
+    Søkeindeksen i minnet. Ordlistene gjøres om til sett første gang
+    de trengs, og de sorterte termene brukes til prefikssøk.
+    """
+    
+    def __init__(self, data):
+        self.sesjoner = data["sesjoner"]
+        self.termer = sorted({t for sesjon in self.sesjoner.values() for t in sesjon["termer"]})
+        self._sett = {}
+    
+    def __len__(self):
+        return sum(len(sesjon["voteringer"]) for sesjon in self.sesjoner.values())
+    
+    def _prefikstermer(self, prefiks):
+        """Alle termer som begynner med prefikset (binærsøk i de sorterte termene)."""
+        start = bisect.bisect_left(self.termer, prefiks)
+        slutt = start
+        while slutt < len(self.termer) and self.termer[slutt].startswith(prefiks):
+            slutt += 1
+        return self.termer[start:slutt]
+    
+    def _treff(self, sesjon_id, term):
+        """Løpenumrene i sesjonen som har termen, som sett."""
+        nokkel = (sesjon_id, term)
+        treff = self._sett.get(nokkel)
+        if treff is None:
+            treff = self._sett[nokkel] = set(self.sesjoner[sesjon_id]["termer"].get(term, ()))
+        return treff
+    
+    def _gruppe(self, sesjon_id, gruppe, prefikser):
+        """Løpenumrene som oppfyller én OG-gruppe."""
+        med = []
+        uten = set()
+        
+        for ikke, term, prefiks in gruppe:
+            if prefiks:
+                treff = set()
+                for t in prefikser[term]:
+                    treff |= self._treff(sesjon_id, t)
+            else:
+                treff = self._treff(sesjon_id, term)
+            
+            if ikke:
+                uten |= treff
+            else:
+                med.append(treff)
+        
+        if med:
+            med.sort(key=len)
+            resultat = set(med[0])
+            for treff in med[1:]:
+                resultat &= treff
+                if not resultat:
+                    break
+        else:
+            resultat = set(range(len(self.sesjoner[sesjon_id]["voteringer"])))
+        
+        return resultat - uten
+    
+    def sok(self, sporring, sesjoner=None):
+        """
+        Finner voteringene som passer søket.
+        
+        Parametre:
+            sporring: Søkestreng (se toppen av filen)
+            sesjoner: Søk bare i disse sesjonene (standard: alle)
+        
+        Returnerer dict: {sesjon_id: [votering_id, ...]} med voteringene
+        i samme rekkefølge som i voteringsfilen. Sesjoner uten treff er
+        ikke med.
+        """
+        grupper = tolk_sporring(sporring)
+        prefikser = {
+            term: self._prefikstermer(term)
+            for gruppe in grupper for _, term, prefiks in gruppe if prefiks
+        }
+        
+        resultat = {}
+        for sesjon_id in sorted(self.sesjoner):
+            if sesjoner is not None and sesjon_id not in sesjoner:
+                continue
+            
+            numre = set()
+            for gruppe in grupper:
+                numre |= self._gruppe(sesjon_id, gruppe, prefikser)
+            
+            if numre:
+                rader = self.sesjoner[sesjon_id]["voteringer"]
+                resultat[sesjon_id] = [rader[n][0] for n in sorted(numre)]
+        
+        return resultat
+
+
+# ============================================================
+# HOVEDFUNKSJONER
+# ============================================================
+
+def indekser_voteringer(voteringer, sesjon_id, data_mappe="../data"):
+    """
+    Legger nylig lagrede voteringer til i søkeindeksen.
+    
+    Brukes av hent_data_v2.lagre_voteringer, så indeksen holdes
+    oppdatert uten å lese voteringsfilen på nytt.
+    
+    Returnerer antall nye eller endrede voteringer.
+    """
+    data = les_indeksdata(data_mappe)
+    nye = oppdater_indeksdata(data, voteringer, sesjon_id, les_dimensjoner(sesjon_id, data_mappe))
+    if nye:
+        lagre_indeksdata(data, data_mappe)
+    return nye
+
+
+def oppdater_sokeindeks(data_mappe="../data", sesjoner=None, tving=False):
+    """
+    Legger nye voteringer fra voteringsfilene til i søkeindeksen og lagrer den.
+    
+    Parametre:
+        sesjoner: Sesjoner som skal oppdateres (standard: alle)
+        tving: Indekser sesjonene på nytt fra bunnen av (f.eks. etter
+               at sakdetaljene er hentet). Uten sesjoner bygges hele
+               indeksen på nytt.
+    
+    Returnerer indeksen (Sokeindeks).
+    """
+    print("=" * 60)
+    print("🔎 OPPDATERER SØKEINDEKS")
+    print("=" * 60)
+    
+    data = ny_indeksdata() if tving and sesjoner is None else les_indeksdata(data_mappe)
+    
+    if sesjoner is None:
+        sesjoner = finn_sesjoner(data_mappe)
+    
+    start = time.perf_counter()
+    totalt_nye = 0
+    
+    for sesjon_id in sesjoner:
+        if tving:
+            data["sesjoner"].pop(sesjon_id, None)
+        dimensjoner = les_dimensjoner(sesjon_id, data_mappe)
+        nye = oppdater_indeksdata(data, strom_voteringer(sesjon_id, data_mappe), sesjon_id, dimensjoner)
+        totalt_nye += nye
+        print(f"   {sesjon_id}: {nye} nye eller endrede voteringer" + (" (med sakdetaljer)" if dimensjoner else ""))
+    
+    filsti = lagre_indeksdata(data, data_mappe)
+    indeks = Sokeindeks(data)
+    
+    print(f"\n   ✓ {totalt_nye} nye eller endrede voteringer indeksert på {time.perf_counter() - start:.1f} s")
+    print(f"   ✓ {len(indeks)} voteringer, {len(indeks.termer)} ord")
+    print(f"   💾 Lagret til {filsti}")
+    
+    return indeks
+
+
+def last_sokeindeks(data_mappe="../data"):
+    """
+    Leser den lagrede indeksen (bygger den hvis den mangler).
+    
+    Returnerer Sokeindeks.
+    """
+    if not os.path.exists(os.path.join(data_mappe, INDEKS_FIL)):
+        return oppdater_sokeindeks(data_mappe)
+    return Sokeindeks(les_indeksdata(data_mappe))
+
+
+def beregn_enighet_for_sok(sporring, sesjon_id, data_mappe="../data", indeks=None):
+    """
+    Enighetsmatrisen for bare de voteringene i en sesjon som passer søket.
+    
+    Parametre:
+        indeks: Ferdig lastet Sokeindeks (standard: les den lagrede)
+    
+    Returnerer dict med antall_voteringer, votering_ider og
+    enighetsmatrise (som i analyse_{sesjon}.json).
+    """
+    if indeks is None:
+        indeks = last_sokeindeks(data_mappe)
+    
+    votering_ider = indeks.sok(sporring, sesjoner=[sesjon_id]).get(sesjon_id, [])
+    valgte = set(votering_ider)
+    voteringer = [
+        v for v in strom_voteringer(sesjon_id, data_mappe)
+        if v.get("votering_id") in valgte and v.get("stemmer")
+    ]
+    
+    matrise, _ = beregn_enighetsmatrise(voteringer, tell_alle_voteringer(voteringer))
+    
+    return {
+        "sesjon_id": sesjon_id,
+        "sporring": sporring,
+        "antall_voteringer": len(voteringer),
+        "votering_ider": votering_ider,
+        "enighetsmatrise": matrise
+    }
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    oppdater_sokeindeks()
@@ -0,0 +1,420 @@
+# ============================================================
+# STORTINGSVOTERING - KOMMANDOLINJE
+# ============================================================
+# Ett felles inngangspunkt for alle stegene, for bruk fra cron
+# og andre planleggere:
+#
+#   python3 stortingsvotering.py fetch 2023-2024
+#   python3 stortingsvotering.py sync 2024-2025
+#   python3 stortingsvotering.py preview 2025-2026 --budsjett 300
+#   python3 stortingsvotering.py queue add 2011-2012 2012-2013
+#   python3 stortingsvotering.py queue work
+#   python3 stortingsvotering.py analyze 2023-2024
+#   python3 stortingsvotering.py timeseries
+#   python3 stortingsvotering.py enrich 2023-2024
+#   python3 stortingsvotering.py compact 2023-2024
+#   python3 stortingsvotering.py similar 12345 -k 10
+#   python3 stortingsvotering.py search "strøm OR energi" --enighet 2023-2024
+#   python3 stortingsvotering.py verify 2023-2024 --stikkprove 200
+#   python3 stortingsvotering.py export
+#   python3 stortingsvotering.py build --hent 2024-2025 --jobber 2
+#   python3 stortingsvotering.py serve --port 8080
+#   python3 stortingsvotering.py watch 2025-2026 --intervall 120
+#   python3 stortingsvotering.py benchmark --storrelser liten
+#   python3 stortingsvotering.py --profil minne --profil cprofile analyze 2023-2024
+#
+# Modulene for hvert steg importeres først når kommandoen
+# trengs, så oppstarten tar bare noen titalls millisekunder.
+# Avslutter med kode 1 hvis steget feilet eller fant avvik.
+# ============================================================
+
+import argparse
+import os
+import sys
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+# data/ ved siden av backend/, uansett hvor scriptet kjøres fra
+DATA_MAPPE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+# ============================================================
+# KOMMANDOER
+# ============================================================
+
+def kommando_fetch(args):
+    """Henter hele sesjoner fra API-et."""
+    from hent_data_v2 import samle_voteringsdata
+    
+    ok = True
+    for sesjon_id in args.sesjoner:
+        resultat = samle_voteringsdata(sesjon_id, maks_saker=args.maks_saker, data_mappe=args.data_mappe)
+        ok = ok and resultat is not None
+    return ok
+
+
+def kommando_sync(args):
+    """Henter bare nye saker og voteringer."""
+    from hent_data_v2 import synkroniser_sesjon
+    
+    ok = True
+    for sesjon_id in args.sesjoner:
+        ok = synkroniser_sesjon(sesjon_id, args.data_mappe) is not None and ok
+    return ok
+
+
+def kommando_preview(args):
+    """Anslår enighetsmatrisen fra et stratifisert utvalg av saker."""
+    from forhandsvisning import forhandsvis_sesjon
+    
+    ok = True
+    for sesjon_id in args.sesjoner:
+        resultat = forhandsvis_sesjon(sesjon_id, args.data_mappe, budsjett=args.budsjett, frø=args.frø)
+        ok = ok and resultat is not None
+    return ok
+
+
+def kommando_queue(args):
+    """Arbeidskøen for henting med flere prosesser (se arbeidsko.py)."""
+    import arbeidsko
+    
+    if args.handling == "add":
+        arbeidsko.legg_til_sesjoner(args.sesjoner, args.data_mappe, args.ko_fil)
+        return True
+    if args.handling == "work":
+        telling = arbeidsko.kjor_arbeider(
+            args.data_mappe, args.ko_fil, arbeider=args.arbeider,
+            maks_oppgaver=args.maks_oppgaver, vent=not args.ikke_vent
+        )
+        return telling["feilet"] == 0
+    if args.handling == "retry":
+        ko = arbeidsko.Arbeidsko(args.ko_fil or arbeidsko.ko_fil(args.data_mappe))
+        antall = sum(ko.prov_feilede_igjen(s) for s in args.sesjoner) if args.sesjoner else ko.prov_feilede_igjen()
+        ko.lukk()
+        print(f"✓ {antall} feilede oppgaver lagt tilbake i køen")
+        return True
+    if args.handling == "collect":
+        ok = True
+        for sesjon_id in args.sesjoner:
+            antall = arbeidsko.samle_sesjon(
+                sesjon_id, args.data_mappe, args.ko_fil, tillat_ufullstendig=args.ufullstendig
+            )
+            ok = antall is not None and ok
+        return ok
+    
+    arbeidsko.vis_status(args.data_mappe, args.ko_fil)
+    return True
+
+
+def kommando_analyze(args):
+    """Analyserer sesjoner (enighet, partistatistikk og deltakelse)."""
+    from analyser_data_v2 import analyser_sesjon
+    from analyser_deltakelse import analyser_deltakelse
+    
+    ok = True
+    for sesjon_id in args.sesjoner:
+        ok = analyser_sesjon(sesjon_id, args.data_mappe) is not None and ok
+        if not args.uten_deltakelse:
+            ok = analyser_deltakelse(sesjon_id, args.data_mappe) is not None and ok
+    return ok
+
+
+def kommando_timeseries(args):
+    """Oppdaterer tidsserien over alle sesjoner (og frontend-filene)."""
+    from analyser_tidsserie import oppdater_tidsserie
+    
+    return oppdater_tidsserie(args.data_mappe, tving=args.tving) is not None
+
+
+def kommando_enrich(args):
+    """Henter komité, emner og forslagsstillere og regner enighet per tema."""
+    from berik_saker import berik_sesjon
+    
+    ok = True
+    for sesjon_id in args.sesjoner:
+        ok = berik_sesjon(sesjon_id, args.data_mappe, oppdater=args.oppdater) is not None and ok
+    return ok
+
+
+def kommando_compact(args):
+    """Lagrer representantene én gang per sesjon (eller gjør om tilbake)."""
+    from hent_data_v2 import konverter_sesjon
+    
+    ok = True
+    for sesjon_id in args.sesjoner:
+        ok = konverter_sesjon(sesjon_id, args.data_mappe, kompakt=not args.utvid) is not None and ok
+    return ok
+
+
+def kommando_similar(args):
+    """Finner voteringene som delte partiene mest likt en gitt votering."""
+    from likhetsindeks import last_likhetsindeks, oppdater_likhetsindeks
+    
+    if args.oppdater:
+        indeks = oppdater_likhetsindeks(args.data_mappe)
+    else:
+        indeks = last_likhetsindeks(args.data_mappe)
+    
+    treff = indeks.finn_lignende(
+        args.votering_id, k=args.k, etter=args.etter,
+        sesjon_id=args.sesjon, sesjoner=args.i_sesjon
+    )
+    if treff is None:
+        print(f"❌ Fant ikke votering {args.votering_id} i likhetsindeksen")
+        return False
+    
+    print(f"\n🧭 Voteringer som ligner på {args.votering_id}:")
+    for t in treff:
+        ulike = ", ".join(t["ulike_partier"]) or "-"
+        print(f"   {t['votering_id']:>8}  {t['sesjon_id']}  parti {t['parti_avstand']:>2}  "
+              f"rep {t['representant_avstand']:>3}  ulike: {ulike:<20} {t['tema'][:40]}")
+    return True
+
+
+def kommando_search(args):
+    """Fritekstsøk i sakstitler, temaer og sakdetaljer."""
+    from sokeindeks import beregn_enighet_for_sok, last_sokeindeks, oppdater_sokeindeks
+    
+    if args.oppdater:
+        indeks = oppdater_sokeindeks(args.data_mappe)
+    else:
+        indeks = last_sokeindeks(args.data_mappe)
+    
+    treff = indeks.sok(args.sporring, sesjoner=args.i_sesjon)
+    print(f"\n🔎 {sum(len(ider) for ider in treff.values())} voteringer passer \"{args.sporring}\":")
+    for sesjon_id, votering_ider in treff.items():
+        vist = " ".join(str(v) for v in votering_ider[:args.vis])
+        print(f"   {sesjon_id}: {len(votering_ider):>5}  {vist}{' ...' if len(votering_ider) > args.vis else ''}")
+    
+    if args.enighet:
+        resultat = beregn_enighet_for_sok(args.sporring, args.enighet, args.data_mappe, indeks)
+        print(f"\n🤝 Enighet i {resultat['antall_voteringer']} voteringer ({args.enighet}):")
+        for parti_a, rad in resultat["enighetsmatrise"].items():
+            verdier = " ".join(f"{rad[b]:>5.1f}" if b in rad else "    -" for b in resultat["enighetsmatrise"])
+            print(f"   {parti_a:>5} {verdier}")
+    return True
+
+
+def kommando_verify(args):
+    """Verifiserer analysene mot rådata, sjekksummer eller API-et."""
+    from verifiser_data import stikkprove_analyse, verifiser_hele_sesjon
+    
+    ok = True
+    if args.likhet:
+        from verifiser_data import verifiser_likhetsindeks
+        rapport = verifiser_likhetsindeks(args.data_mappe)
+        ok = rapport is not None and rapport["ok"]
+    
+    for sesjon_id in args.sesjoner:
+        if args.sjekksummer:
+            from sjekksummer import kontroller_sjekksummer
+            forskjell = kontroller_sjekksummer(sesjon_id, args.data_mappe)
+            ok = ok and forskjell is not None and forskjell["lik"]
+        
+        rapport = verifiser_hele_sesjon(sesjon_id, args.data_mappe)
+        ok = ok and rapport is not None and rapport["ok"]
+        
+        if args.stikkprove:
+            analyse_fil = os.path.join(args.data_mappe, f"analyse_{sesjon_id}.json")
+            rapport = stikkprove_analyse(analyse_fil, antall=args.stikkprove)
+            ok = (ok and rapport is not None and rapport["antall_med_avvik"] == 0
+                  and not rapport["endret_siden_innhenting_med_avvik"])
+    return ok
+
+
+def kommando_export(args):
+    """Lager de oppdelte datafilene for nettsiden."""
+    from eksporter_frontend import eksporter_frontend
+    
+    return eksporter_frontend(args.data_mappe) is not None
+
+
+def kommando_build(args):
+    """Bygger bare analysefilene som er utdatert (se orkestrering.py)."""
+    from orkestrering import bygg
+    
+    status = bygg(
+        args.data_mappe, args.maal, args.hent, args.jobber,
+        tving=args.tving, bare_vis=args.vis, vis_logg=args.logg
+    )
+    return not any(s in ("feilet", "hoppet_over") for s in status.values())
+
+
+def kommando_serve(args):
+    """Starter analyse-API-et (eller en lokal kopi av Stortingets API)."""
+    if args.standin:
+        import time
+        from api_standin import start_standin
+        
+        server, base_url = start_standin(args.data_mappe, port=args.port)
+        print(f"🧪 Stand-in for Stortingets API kjører på {base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return True
+    
+    from api_tjeneste import start_tjeneste
+    
+    start_tjeneste(args.data_mappe, port=args.port)
+    return True
+
+
+def kommando_watch(args):
+    """Holder analysen av en pågående sesjon oppdatert."""
+    from overvaking import start_overvaking
+    
+    start_overvaking(args.sesjon, args.data_mappe, intervall=args.intervall, port=args.port)
+    return True
+
+
+def kommando_benchmark(args):
+    """Måler ytelsen til alle stegene og sammenligner med baseline."""
+    from ytelsestest import kjor_ytelsestest
+    
+    _, regresjoner = kjor_ytelsestest(
+        args.data_mappe, args.storrelser, not args.uten_minne, args.lagre_baseline, args.terskel
+    )
+    return not regresjoner
+
+
+# ============================================================
+# ARGUMENTER
+# ============================================================
+
+def lag_parser():
+    """Bygger argumentparseren med alle underkommandoene."""
+    parser = argparse.ArgumentParser(
+        prog="stortingsvotering",
+        description="Henter, analyserer og publiserer voteringer fra Stortinget."
+    )
+    parser.add_argument("--data-mappe", default=DATA_MAPPE, help="mappen med datafilene (standard: ../data)")
+    parser.add_argument("--api-url", help="alternativ adresse til Stortingets API (f.eks. en stand-in)")
+    parser.add_argument(
+        "--profil", action="append", choices=["tid", "minne", "cprofile"],
+        help="skriv ut tid per steg, og mål eventuelt minne eller kjør cProfile (kan gjentas)"
+    )
+    
+    under = parser.add_subparsers(dest="kommando", metavar="kommando", required=True)
+    
+    p = under.add_parser("fetch", aliases=["hent"], help="hent hele sesjoner fra API-et")
+    p.add_argument("sesjoner", nargs="+", metavar="sesjon")
+    p.add_argument("--maks-saker", type=int, help="hent bare et stratifisert utvalg av saker (for testing)")
+    p.set_defaults(funksjon=kommando_fetch)
+    
+    p = under.add_parser("sync", aliases=["synk"], help="hent bare nye saker og voteringer")
+    p.add_argument("sesjoner", nargs="+", metavar="sesjon")
+    p.set_defaults(funksjon=kommando_sync)
+    
+    p = under.add_parser("preview", aliases=["forhandsvis"], help="anslå enigheten fra et utvalg av saker")
+    p.add_argument("sesjoner", nargs="+", metavar="sesjon")
+    p.add_argument("--budsjett", type=int, default=300, help="største antall API-kall per sesjon")
+    p.add_argument("--frø", type=int, help="frø for trekningen (samme frø gir samme utvalg)")
+    p.set_defaults(funksjon=kommando_preview)
+    
+    p = under.add_parser("queue", aliases=["ko"], help="hent sesjoner via en arbeidskø med flere prosesser")
+    p.add_argument("handling", choices=["add", "work", "status", "retry", "collect"])
+    p.add_argument("sesjoner", nargs="*", metavar="sesjon")
+    p.add_argument("--ko-fil", help="SQLite-filen med køen (standard: arbeidsko.sqlite i datamappen)")
+    p.add_argument("--arbeider", help="navn på arbeideren (standard: maskinnavn:prosess-ID)")
+    p.add_argument("--maks-oppgaver", type=int, help="stopp etter så mange oppgaver")
+    p.add_argument("--ikke-vent", action="store_true", help="avslutt når ingen oppgaver er klare")
+    p.add_argument("--ufullstendig", action="store_true", help="collect: skriv det som er ferdig")
+    p.set_defaults(funksjon=kommando_queue)
+    
+    p = under.add_parser("analyze", aliases=["analyser"], help="analyser sesjoner")
+    p.add_argument("sesjoner", nargs="+", metavar="sesjon")
+    p.add_argument("--uten-deltakelse", action="store_true", help="hopp over deltakelsesanalysen")
+    p.set_defaults(funksjon=kommando_analyze)
+    
+    p = under.add_parser("timeseries", aliases=["tidsserie"], help="oppdater tidsserien over alle sesjoner")
+    p.add_argument("--tving", action="store_true", help="regn ut alle sesjoner på nytt")
+    p.set_defaults(funksjon=kommando_timeseries)
+    
+    p = under.add_parser("enrich", aliases=["berik"], help="hent sakdetaljer og regn enighet per komité og emne")
+    p.add_argument("sesjoner", nargs="+", metavar="sesjon")
+    p.add_argument("--oppdater", action="store_true", help="hent detaljene på nytt selv om de er i cachen")
+    p.set_defaults(funksjon=kommando_enrich)
+    
+    p = under.add_parser("compact", aliases=["komprimer"], help="lagre voteringsfilene i kompakt format")
+    p.add_argument("sesjoner", nargs="+", metavar="sesjon")
+    p.add_argument("--utvid", action="store_true", help="gjør om tilbake til vanlig format")
+    p.set_defaults(funksjon=kommando_compact)
+    
+    p = under.add_parser("similar", aliases=["lignende"], help="finn voteringer som delte partiene likt")
+    p.add_argument("votering_id", type=int)
+    p.add_argument("-k", type=int, default=10, help="antall treff")
+    p.add_argument("--etter", choices=["parti", "representant"], default="parti")
+    p.add_argument("--sesjon", help="sesjonen voteringen er i (standard: den nyeste)")
+    p.add_argument("--i-sesjon", nargs="+", metavar="SESJON", help="søk bare i disse sesjonene")
+    p.add_argument("--oppdater", action="store_true", help="legg nye voteringer til i indeksen først")
+    p.set_defaults(funksjon=kommando_similar)
+    
+    p = under.add_parser("search", aliases=["sok"], help="søk i sakstitler, temaer og sakdetaljer")
+    p.add_argument("sporring", metavar="søk", help='f.eks. "strøm OR energi", "budsj* -revidert", "type:lovsak"')
+    p.add_argument("--i-sesjon", nargs="+", metavar="SESJON", help="søk bare i disse sesjonene")
+    p.add_argument("--enighet", metavar="SESJON", help="regn enighetsmatrisen for treffene i sesjonen")
+    p.add_argument("--vis", type=int, default=10, help="antall votering-ID-er som vises per sesjon")
+    p.add_argument("--oppdater", action="store_true", help="legg nye voteringer til i indeksen først")
+    p.set_defaults(funksjon=kommando_search)
+    
+    p = under.add_parser("verify", aliases=["verifiser"], help="verifiser analysene")
+    p.add_argument("sesjoner", nargs="*", metavar="sesjon")
+    p.add_argument("--stikkprove", type=int, metavar="N", help="hent N voteringer på nytt og sammenlign")
+    p.add_argument("--sjekksummer", action="store_true", help="sjekk voteringsfilen mot sjekksummene")
+    p.add_argument("--likhet", action="store_true", help="sjekk likhetsindeksen og søkene i den")
+    p.set_defaults(funksjon=kommando_verify)
+    
+    p = under.add_parser("export", aliases=["eksporter"], help="lag datafilene for nettsiden")
+    p.set_defaults(funksjon=kommando_export)
+    
+    p = under.add_parser("build", aliases=["bygg"], help="bygg bare det som er utdatert")
+    p.add_argument("maal", nargs="*", metavar="mål", help="regler eller sesjoner (standard: alt)")
+    p.add_argument("--hent", nargs="+", default=[], metavar="SESJON", help="synkroniser sesjonene fra API-et først")
+    p.add_argument("--jobber", type=int, default=1, help="antall regler i parallell")
+    p.add_argument("--tving", action="store_true", help="bygg alt på nytt")
+    p.add_argument("--vis", action="store_true", help="bare vis hva som ville blitt bygget")
+    p.add_argument("--logg", action="store_true", help="vis utskriften fra hver regel")
+    p.set_defaults(funksjon=kommando_build)
+    
+    p = under.add_parser("serve", aliases=["server"], help="start analyse-API-et")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--standin", action="store_true", help="start en lokal kopi av Stortingets API i stedet")
+    p.set_defaults(funksjon=kommando_serve)
+    
+    p = under.add_parser("watch", aliases=["overvak"], help="hold en pågående sesjon oppdatert")
+    p.add_argument("sesjon")
+    p.add_argument("--intervall", type=float, default=120, help="sekunder mellom hver sjekk")
+    p.add_argument("--port", type=int, default=8090, help="port for /helse og /metrikker")
+    p.set_defaults(funksjon=kommando_watch)
+    
+    p = under.add_parser("benchmark", aliases=["ytelsestest"], help="mål ytelsen og sammenlign med baseline")
+    p.add_argument("--storrelser", nargs="+", choices=["liten", "middels", "stor"])
+    p.add_argument("--uten-minne", action="store_true", help="hopp over minnemålingen")
+    p.add_argument("--lagre-baseline", action="store_true")
+    p.add_argument("--terskel", type=float, default=0.25, help="tillatt forverring (0.25 = 25 %%)")
+    p.set_defaults(funksjon=kommando_benchmark)
+    
+    return parser
+
+
+def main(argv=None):
+    args = lag_parser().parse_args(argv)
+    
+    # Må settes før hent_data_v2/verifiser_data importeres
+    if args.api_url:
+        os.environ["STORTINGET_API_URL"] = args.api_url
+    if args.profil:
+        os.environ["STORTINGSVOTERING_PROFIL"] = ",".join(args.profil)
+    
+    return 0 if args.funksjon(args) else 1
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,10 +10,39 @@
 
 import requests
 import json
+import math
+import os
 import random
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-API_BASE_URL = "https://data.stortinget.no/eksport"
+from hent_data_v2 import vent_paa_tur
+from lagringsformat import les_voteringsfil
+from likhetsindeks import last_likhetsindeks
+from sjekksummer import endringer_siden_innhenting
+
+# Kan overstyres (f.eks. til en lokal stand-in, se api_standin.py)
+API_BASE_URL = os.environ.get("STORTINGET_API_URL", "https://data.stortinget.no/eksport")
+
+# Antall samtidige forespørsler i stikkprøvekontrollen. Den felles
+# hastighetsbegrensningen i hent_data_v2 gjelder fortsatt.
+SAMTIDIGE_KALL = 8
+
+# API-et bruker tallkoder for stemmer, eldre filer bruker tekst.
+# Holdes bevisst adskilt fra analysekoden, så verifiseringen er uavhengig.
+STEMMEKODER = {1: "for", 2: "mot", 3: "ikke_tilstede", 4: "avstar", 5: "ikke_avgitt"}
+
+# ============================================================
+# HJELPEFUNKSJONER
+# ============================================================
+
+def stemme_som_tekst(verdi):
+    """Gjør om en stemme (tall eller tekst) til tekst, f.eks. 1 → "for"."""
+    if isinstance(verdi, int):
+        return STEMMEKODER.get(verdi, "ukjent")
+    return verdi
 
 # ============================================================
 # VERIFISERINGSFUNKSJONER
@@ -81,7 +110,7 @@ def verifiser_enkelt_votering(votering_id):
     for stemme in stemmer:
         rep = stemme.get("representant", {})
         parti_id = rep.get("parti", {}).get("id", "Ukjent")
-        resultat = stemme.get("votering", "ikke_tilstede")
+        resultat = stemme_som_tekst(stemme.get("votering", "ikke_tilstede"))
         
         if resultat == "for":
             partitelling[parti_id]["for"] += 1
@@ -175,8 +204,7 @@ def verifiser_partipar_enighet(parti_a, parti_b, voteringer_fil):
     
     # Les lagrede voteringer
     try:
-        with open(voteringer_fil, "r", encoding="utf-8") as f:
-            voteringer = json.load(f)
+        voteringer = les_voteringsfil(voteringer_fil)
     except FileNotFoundError:
         print(f"❌ Fant ikke filen {voteringer_fil}")
         print("   Kjør hent_data.py først for å laste ned data.")
@@ -196,7 +224,7 @@ def verifiser_partipar_enighet(parti_a, parti_b, voteringer_fil):
         for stemme in votering.get("stemmer", []):
             rep = stemme.get("representant", {})
             parti_id = rep.get("parti", {}).get("id")
-            resultat = stemme.get("votering")
+            resultat = stemme_som_tekst(stemme.get("votering"))
             
             if parti_id in [parti_a, parti_b] and resultat in ["for", "mot"]:
                 partitelling[parti_id][resultat] += 1
@@ -273,28 +301,748 @@ def verifiser_partipar_enighet(parti_a, parti_b, voteringer_fil):
     }
 
 
-def stikkprove_analyse(analyse_fil, antall=5):
+def _referanse_standpunkt(stemmer):
+    """
+    Referanseberegning av partistandpunkt for én votering.
+    
+    Skrevet direkte fra METODIKK.md, uavhengig av analyser_data_v2.py.
+    """
+    telling = {}
+    
+    for stemme in stemmer:
+        parti_id = stemme.get("representant", {}).get("parti", {}).get("id")
+        resultat = stemme_som_tekst(stemme.get("votering"))
+        if not parti_id or resultat not in ("for", "mot"):
+            continue
+        
+        if parti_id not in telling:
+            telling[parti_id] = {"for": 0, "mot": 0}
+        telling[parti_id][resultat] += 1
+    
+    standpunkt = {}
+    for parti_id, t in telling.items():
+        if t["for"] != t["mot"]:
+            standpunkt[parti_id] = "for" if t["for"] > t["mot"] else "mot"
+    
+    return standpunkt
+
+
+def _referanse_sesjon(voteringer):
+    """
+    Regner ut alle partipar og all partistatistikk i ett pass.
+    
+    Returnerer (antall_voteringer, partipar, partier), der
+        partipar: {(a, b): {"enige": n, "uenige": n}} med a < b
+        partier: {parti: {"antall_voteringer", "antall_for", "antall_mot", "pa_vinnersiden"}}
+    """
+    partipar = {}
+    partier = {}
+    antall = 0
+    
+    for votering in voteringer:
+        stemmer = votering.get("stemmer") or []
+        if not stemmer:
+            continue
+        antall += 1
+        
+        standpunkt = _referanse_standpunkt(stemmer)
+        flertall = "for" if votering.get("antall_for", 0) > votering.get("antall_mot", 0) else "mot"
+        
+        for parti_id, sp in standpunkt.items():
+            stat = partier.setdefault(parti_id, {
+                "antall_voteringer": 0, "antall_for": 0, "antall_mot": 0, "pa_vinnersiden": 0
+            })
+            stat["antall_voteringer"] += 1
+            stat["antall_for" if sp == "for" else "antall_mot"] += 1
+            if sp == flertall:
+                stat["pa_vinnersiden"] += 1
+        
+        for parti_a in standpunkt:
+            for parti_b in standpunkt:
+                if parti_a < parti_b:
+                    par = partipar.setdefault((parti_a, parti_b), {"enige": 0, "uenige": 0})
+                    par["enige" if standpunkt[parti_a] == standpunkt[parti_b] else "uenige"] += 1
+    
+    return antall, partipar, partier
+
+
+def _referanse_samhold(voteringer):
+    """
+    Referanseberegning av partisamhold (Rice-indeks) og avvikere.
+    
+    Rice = |for - mot| / (for + mot) per parti og votering. En avviker
+    stemte motsatt av partiets standpunkt (se _referanse_standpunkt).
+    
+    Returnerer {parti: {"rice_sum", "antall_voteringer", "antall_stemmer", "antall_avvik"}}
+    """
+    partier = {}
+    
+    for votering in voteringer:
+        stemmer = votering.get("stemmer") or []
+        if not stemmer:
+            continue
+        
+        standpunkt = _referanse_standpunkt(stemmer)
+        per_parti = {}
+        for stemme in stemmer:
+            parti_id = stemme.get("representant", {}).get("parti", {}).get("id")
+            resultat = stemme_som_tekst(stemme.get("votering"))
+            if parti_id and resultat in ("for", "mot"):
+                per_parti.setdefault(parti_id, []).append(resultat)
+        
+        for parti_id, resultater in per_parti.items():
+            antall_for = resultater.count("for")
+            antall_mot = len(resultater) - antall_for
+            stat = partier.setdefault(parti_id, {
+                "rice_sum": 0.0, "antall_voteringer": 0, "antall_stemmer": 0, "antall_avvik": 0
+            })
+            stat["rice_sum"] += abs(antall_for - antall_mot) / len(resultater)
+            stat["antall_voteringer"] += 1
+            stat["antall_stemmer"] += len(resultater)
+            if parti_id in standpunkt:
+                stat["antall_avvik"] += sum(1 for r in resultater if r != standpunkt[parti_id])
+    
+    return partier
+
+
+def _prosent(teller, nevner):
+    return round((teller / nevner) * 100, 1) if nevner > 0 else 0
+
+
+def verifiser_hele_sesjon(sesjon_id, data_mappe="../data"):
+    """
+    Verifiserer HELE analysefilen for en sesjon i ett pass.
+    
+    Regner ut alle partipar og all partistatistikk på nytt med en
+    uavhengig referanseberegning, sammenligner med den publiserte
+    analyse_{sesjon_id}.json og skriver alle avvik til
+    verifisering_{sesjon_id}.json.
+    
+    Returnerer rapporten (dictionary).
+    """
+    print("=" * 70)
+    print(f"FULL VERIFISERING AV SESJON {sesjon_id}")
+    print("=" * 70)
+    
+    voteringer_fil = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
+    analyse_fil = os.path.join(data_mappe, f"analyse_{sesjon_id}.json")
+    
+    try:
+        voteringer = les_voteringsfil(voteringer_fil)
+        with open(analyse_fil, "r", encoding="utf-8") as f:
+            publisert = json.load(f)
+    except FileNotFoundError as e:
+        print(f"❌ Fant ikke filen {e.filename}")
+        return None
+    
+    if isinstance(voteringer, dict):
+        voteringer = voteringer.get("voteringer", [])
+    
+    antall, partipar, partier = _referanse_sesjon(voteringer)
+    print(f"\n📂 Regnet ut {len(partipar)} partipar og {len(partier)} partier fra {antall} voteringer")
+    
+    avvik = []
+    
+    def sjekk(type_, nokkel, felt, forventet, faktisk):
+        if forventet != faktisk:
+            avvik.append({
+                "type": type_,
+                "nokkel": nokkel,
+                "felt": felt,
+                "forventet": forventet,
+                "publisert": faktisk
+            })
+    
+    sjekk("sesjon", sesjon_id, "antall_voteringer", antall, publisert.get("antall_voteringer"))
+    
+    # Partipar: både listen med tellinger og matrisen
+    publiserte_par = {
+        (p["parti_a"], p["parti_b"]): p for p in publisert.get("alle_partipar", [])
+    }
+    matrise = publisert.get("enighetsmatrise", {})
+    
+    for (parti_a, parti_b) in sorted(set(partipar) | set(publiserte_par)):
+        nokkel = f"{parti_a}-{parti_b}"
+        ref = partipar.get((parti_a, parti_b))
+        pub = publiserte_par.get((parti_a, parti_b))
+        
+        if ref is None or pub is None:
+            sjekk("partipar", nokkel, "finnes", ref is not None, pub is not None)
+            continue
+        
+        totalt = ref["enige"] + ref["uenige"]
+        prosent = _prosent(ref["enige"], totalt)
+        sjekk("partipar", nokkel, "antall_enige", ref["enige"], pub.get("antall_enige"))
+        sjekk("partipar", nokkel, "antall_uenige", ref["uenige"], pub.get("antall_uenige"))
+        sjekk("partipar", nokkel, "enighet_prosent", prosent, pub.get("enighet_prosent"))
+        sjekk("matrise", nokkel, parti_a, prosent, matrise.get(parti_a, {}).get(parti_b))
+        sjekk("matrise", nokkel, parti_b, prosent, matrise.get(parti_b, {}).get(parti_a))
+    
+    # Partistatistikk
+    publisert_stat = publisert.get("partistatistikk", {})
+    
+    for parti_id in sorted(set(partier) | set(publisert_stat)):
+        ref = partier.get(parti_id)
+        pub = publisert_stat.get(parti_id)
+        
+        if ref is None or pub is None:
+            sjekk("parti", parti_id, "finnes", ref is not None, pub is not None)
+            continue
+        
+        totalt = ref["antall_voteringer"]
+        sjekk("parti", parti_id, "antall_voteringer", totalt, pub.get("antall_voteringer"))
+        sjekk("parti", parti_id, "antall_for", ref["antall_for"], pub.get("antall_for"))
+        sjekk("parti", parti_id, "antall_mot", ref["antall_mot"], pub.get("antall_mot"))
+        sjekk("parti", parti_id, "for_prosent", _prosent(ref["antall_for"], totalt), pub.get("for_prosent"))
+        sjekk("parti", parti_id, "vinnersiden_prosent", _prosent(ref["pa_vinnersiden"], totalt), pub.get("vinnersiden_prosent"))
+    
+    # Partisamhold
+    samhold = _referanse_samhold(voteringer)
+    publisert_samhold = publisert.get("partisamhold", {}).get("partier", {})
+    
+    for parti_id in sorted(set(samhold) | set(publisert_samhold)):
+        ref = samhold.get(parti_id)
+        pub = publisert_samhold.get(parti_id)
+        
+        if ref is None or pub is None:
+            sjekk("samhold", parti_id, "finnes", ref is not None, pub is not None)
+            continue
+        
+        sjekk("samhold", parti_id, "antall_voteringer", ref["antall_voteringer"], pub.get("antall_voteringer"))
+        sjekk("samhold", parti_id, "antall_stemmer", ref["antall_stemmer"], pub.get("antall_stemmer"))
+        sjekk("samhold", parti_id, "antall_avvik", ref["antall_avvik"], pub.get("antall_avvik"))
+        sjekk("samhold", parti_id, "rice_snitt", round(ref["rice_sum"] / ref["antall_voteringer"], 3), pub.get("rice_snitt"))
+    
+    rapport = {
+        "sesjon_id": sesjon_id,
+        "verifisert_dato": datetime.now().isoformat(),
+        "voteringer_fil": voteringer_fil,
+        "analyse_fil": analyse_fil,
+        "antall_voteringer": antall,
+        "antall_partipar": len(partipar),
+        "antall_partier": len(partier),
+        "antall_avvik": len(avvik),
+        "ok": not avvik,
+        "avvik": avvik
+    }
+    
+    rapport_fil = os.path.join(data_mappe, f"verifisering_{sesjon_id}.json")
+    with open(rapport_fil, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n📊 RESULTAT")
+    print("-" * 50)
+    if avvik:
+        print(f"   ❌ {len(avvik)} avvik funnet. Eksempler:")
+        for a in avvik[:10]:
+            print(f"   • {a['type']} {a['nokkel']} {a['felt']}: forventet {a['forventet']}, publisert {a['publisert']}")
+    else:
+        print("   ✅ Analysefilen stemmer med referanseberegningen")
+    print(f"\n   💾 Rapport lagret til {rapport_fil}")
+    print("\n" + "=" * 70)
+    
+    return rapport
+
+
+def _fordel_utvalg(storrelser, antall):
+    """
+    Fordeler en stikkprøve proporsjonalt på strata (største rest).
+    
+    Hvert stratum får minst én votering så lenge det er plass.
+    
+    Parametre:
+        storrelser: {stratum: antall voteringer}
+        antall: ønsket størrelse på hele stikkprøven
+    
+    Returnerer dict: {stratum: antall som skal trekkes}
+    """
+    totalt = sum(storrelser.values())
+    antall = min(antall, totalt)
+    if antall == 0:
+        return {stratum: 0 for stratum in storrelser}
+    
+    andeler = {s: antall * n / totalt for s, n in storrelser.items()}
+    fordeling = {s: int(andel) for s, andel in andeler.items()}
+    
+    if antall >= len(storrelser):
+        for s in fordeling:
+            fordeling[s] = max(fordeling[s], 1)
+    
+    # Fordel resten til strataene med størst rest, og trekk fra
+    # der minimumskravet ga for mange
+    rest = sorted(storrelser, key=lambda s: (fordeling[s] - andeler[s], s))
+    while sum(fordeling.values()) < antall:
+        for s in rest:
+            if sum(fordeling.values()) < antall and fordeling[s] < storrelser[s]:
+                fordeling[s] += 1
+    while sum(fordeling.values()) > antall:
+        for s in reversed(rest):
+            if sum(fordeling.values()) > antall and fordeling[s] > 1:
+                fordeling[s] -= 1
+    
+    return fordeling
+
+
+def trekk_stikkprove(voteringer, antall, frø=None):
+    """
+    Trekker en stratifisert tilfeldig stikkprøve av voteringer.
+    
+    Strataene er sakstypene, så sjeldne sakstyper (f.eks. grunnlovssaker)
+    også blir kontrollert. Med proporsjonal fordeling veier hver
+    votering i stikkprøven omtrent like mye.
+    
+    Returnerer (utvalg, fordeling), der fordeling er
+    {sakstype: {"populasjon": n, "utvalg": n}}.
+    """
+    tilfeldig = random.Random(frø)
+    strata = defaultdict(list)
+    
+    for votering in voteringer:
+        if votering.get("votering_id") and votering.get("stemmer"):
+            strata[votering.get("sakstype") or "ukjent"].append(votering)
+    
+    fordeling = _fordel_utvalg({s: len(v) for s, v in strata.items()}, antall)
+    utvalg = []
+    
+    for stratum in sorted(strata):
+        utvalg.extend(tilfeldig.sample(strata[stratum], fordeling[stratum]))
+    
+    return utvalg, {
+        s: {"populasjon": len(strata[s]), "utvalg": fordeling[s]} for s in sorted(strata)
+    }
+
+
+def _hent_json(endpoint, parametre, api_url):
+    """Henter ett endepunkt under den felles hastighetsbegrensningen."""
+    vent_paa_tur()
+    respons = requests.get(
+        f"{api_url}/{endpoint}",
+        params=dict(parametre, format="json"),
+        timeout=30
+    )
+    respons.raise_for_status()
+    return respons.json()
+
+
+def wilson_intervall(feil, n, z=1.96):
+    """
+    Wilson-konfidensintervall for en andel (standard: 95 %).
+    
+    Gir fornuftige grenser også når ingen feil er funnet, der det
+    vanlige normalintervallet ville gitt [0, 0].
+    
+    Returnerer (nedre, øvre) som andeler mellom 0 og 1.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    
+    p = feil / n
+    nevner = 1 + z * z / n
+    midt = (p + z * z / (2 * n)) / nevner
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / nevner
+    return max(0.0, midt - margin), min(1.0, midt + margin)
+
+
+def _partitelling(stemmer):
+    """Teller for/mot per parti (referanseberegning)."""
+    telling = {}
+    for stemme in stemmer:
+        parti_id = stemme.get("representant", {}).get("parti", {}).get("id")
+        resultat = stemme_som_tekst(stemme.get("votering"))
+        if parti_id and resultat in ("for", "mot"):
+            telling.setdefault(parti_id, {"for": 0, "mot": 0})[resultat] += 1
+    return telling
+
+
+def sammenlign_votering(lagret, hentede_stemmer, hentet_votering):
+    """
+    Sammenligner én lagret votering felt for felt med en ny henting.
+    
+    Parametre:
+        lagret: voteringen slik den ligger i voteringer_{sesjon}.json
+        hentede_stemmer: svaret fra voteringsresultat-endepunktet
+        hentet_votering: voteringen fra voteringer-endepunktet (eller None)
+    
+    Returnerer liste med avvik: {"felt", "nokkel", "lagret", "hentet"}
     """
-    Tar tilfeldige stikkprøver fra en analyse og verifiserer dem.
+    avvik = []
+    
+    def sjekk(felt, nokkel, lagret_verdi, hentet_verdi):
+        if lagret_verdi != hentet_verdi:
+            avvik.append({"felt": felt, "nokkel": nokkel, "lagret": lagret_verdi, "hentet": hentet_verdi})
+    
+    # Tellingene fra voteringslisten
+    if hentet_votering is None:
+        sjekk("votering", "finnes", True, False)
+    else:
+        for felt in ("antall_for", "antall_mot", "vedtatt"):
+            sjekk(felt, felt, lagret.get(felt), hentet_votering.get(felt))
+    
+    # Hver representants stemme og parti
+    def per_representant(stemmer):
+        return {
+            s.get("representant", {}).get("id"): (
+                stemme_som_tekst(s.get("votering")),
+                s.get("representant", {}).get("parti", {}).get("id")
+            )
+            for s in stemmer
+        }
+    
+    lagrede = per_representant(lagret.get("stemmer") or [])
+    hentede = per_representant(hentede_stemmer)
+    
+    for rep_id in sorted(set(lagrede) | set(hentede), key=str):
+        a = lagrede.get(rep_id)
+        b = hentede.get(rep_id)
+        if a is None or b is None:
+            sjekk("stemme", rep_id, a and a[0], b and b[0])
+            continue
+        sjekk("stemme", rep_id, a[0], b[0])
+        sjekk("parti", rep_id, a[1], b[1])
+    
+    # Partitellinger og partistandpunkt
+    lagret_telling = _partitelling(lagret.get("stemmer") or [])
+    hentet_telling = _partitelling(hentede_stemmer)
+    
+    for parti_id in sorted(set(lagret_telling) | set(hentet_telling)):
+        sjekk("partitelling", parti_id, lagret_telling.get(parti_id), hentet_telling.get(parti_id))
+    
+    lagret_standpunkt = _referanse_standpunkt(lagret.get("stemmer") or [])
+    hentet_standpunkt = _referanse_standpunkt(hentede_stemmer)
     
-    Dette er nyttig for å sjekke at analysefilen er korrekt
-    uten å måtte gå gjennom alt manuelt.
+    for parti_id in sorted(set(lagret_standpunkt) | set(hentet_standpunkt)):
+        sjekk("standpunkt", parti_id, lagret_standpunkt.get(parti_id), hentet_standpunkt.get(parti_id))
+    
+    return avvik
+
+
+def stikkprove_analyse(analyse_fil, antall=200, api_url=None, samtidige=SAMTIDIGE_KALL, frø=None):
+    """
+    Tar en stratifisert stikkprøve av voteringene bak en analyse og
+    henter dem på nytt fra API-et.
+    
+    Hver votering i stikkprøven sammenlignes felt for felt med den
+    lagrede kopien (stemmer, partier, tellinger og partistandpunkt).
+    Henting skjer i parallell, men under den felles
+    hastighetsbegrensningen, så flere hundre voteringer tar omtrent
+    antall kall × PAUSE_MELLOM_KALL i stedet for å vente på hvert svar.
+    
+    Voteringer som ikke stemmer med sjekksummene fra innhentingen
+    (se sjekksummer.py) hentes og kontrolleres i tillegg, men holdes
+    utenfor feilraten siden de ikke er trukket tilfeldig.
+    
+    Parametre:
+        analyse_fil: Sti til analyse_{sesjon}.json (voteringsfilen
+                     leses fra samme mappe)
+        antall: Størrelsen på stikkprøven
+        api_url: Alternativ API-adresse (f.eks. en lokal stand-in)
+        samtidige: Antall samtidige forespørsler
+        frø: Frø for trekningen (samme frø gir samme stikkprøve)
+    
+    Returnerer rapporten (dictionary), som også lagres til
+    stikkprove_{sesjon}.json.
     """
     print("=" * 70)
     print("STIKKPRØVEKONTROLL")
     print("=" * 70)
-    print(f"\nTar {antall} tilfeldige stikkprøver fra analysen...")
-    print("Hver stikkprøve hentes på nytt fra API-et og sammenlignes.\n")
     
-    # Dette krever at vi har lagret votering_id-er i analysen
-    # I en fullstendig implementasjon ville vi:
-    # 1. Plukke tilfeldige voteringer
-    # 2. Hente dem på nytt fra API
-    # 3. Sammenligne med lagret data
+    api_url = api_url or API_BASE_URL
+    data_mappe = os.path.dirname(analyse_fil) or "."
+    
+    try:
+        with open(analyse_fil, "r", encoding="utf-8") as f:
+            sesjon_id = json.load(f)["sesjon_id"]
+        voteringer_fil = os.path.join(data_mappe, f"voteringer_{sesjon_id}.json")
+        voteringer = les_voteringsfil(voteringer_fil)
+    except FileNotFoundError as e:
+        print(f"❌ Fant ikke filen {e.filename}")
+        return None
+    
+    if isinstance(voteringer, dict):
+        voteringer = voteringer.get("voteringer", [])
+    
+    utvalg, fordeling = trekk_stikkprove(voteringer, antall, frø)
+    
+    # Voteringer som er endret eller lagt til siden innhentingen
+    forskjell = endringer_siden_innhenting(sesjon_id, data_mappe, voteringer)
+    endret = set(forskjell["endrede"] + forskjell["nye"]) if forskjell else set()
+    endret -= {str(v.get("votering_id")) for v in utvalg}
+    ekstra = [v for v in voteringer if str(v.get("votering_id")) in endret]
+    
+    saker = sorted({v.get("sak_id") for v in utvalg + ekstra}, key=str)
+    
+    print(f"\n🎲 Trakk {len(utvalg)} av {len(voteringer)} voteringer fra {len(fordeling)} sakstyper")
+    if forskjell is None:
+        print("   ⚠️  Fant ingen sjekksummer fra innhentingen")
+    elif ekstra:
+        print(f"   🔐 {len(ekstra)} voteringer stemmer ikke med sjekksummene og kontrolleres i tillegg")
+    print(f"   Henter {len(utvalg) + len(ekstra)} voteringsresultater og {len(saker)} saker fra {api_url}")
     
-    print("⚠️  For full stikkprøvekontroll, kjør:")
-    print("    verifiser_enkelt_votering(votering_id)")
-    print("    med en votering-ID fra dine lagrede data.")
+    # Steg 1: Hent alt på nytt, i parallell
+    def hent_sak(sak_id):
+        data = _hent_json("voteringer", {"sakid": sak_id}, api_url)
+        return {str(v.get("votering_id")): v for v in data.get("votering_liste", [])}
+    
+    def hent_stemmer(votering_id):
+        data = _hent_json("voteringsresultat", {"voteringid": votering_id}, api_url)
+        return data.get("voteringsresultat_liste", [])
+    
+    def trygt(funksjon, argument):
+        try:
+            return funksjon(argument), None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return None, str(e)
+    
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=samtidige) as utforer:
+        sak_svar = dict(zip(saker, utforer.map(lambda s: trygt(hent_sak, s), saker)))
+        stemme_svar = list(utforer.map(lambda v: trygt(hent_stemmer, v["votering_id"]), utvalg + ekstra))
+    
+    tid = time.perf_counter() - start
+    print(f"   ✓ Ferdig etter {tid:.1f} sekunder")
+    
+    # Steg 2: Sammenlign felt for felt
+    resultater = []
+    feilet = []
+    per_stratum = defaultdict(lambda: {"kontrollert": 0, "med_avvik": 0})
+    
+    endret_avvik = []
+    
+    for votering, (stemmer, feil) in zip(utvalg + ekstra, stemme_svar):
+        sak_voteringer, sak_feil = sak_svar[votering.get("sak_id")]
+        if feil or sak_feil:
+            feilet.append({"votering_id": votering["votering_id"], "feil": feil or sak_feil})
+            continue
+        
+        avvik = sammenlign_votering(votering, stemmer, sak_voteringer.get(str(votering["votering_id"])))
+        
+        if str(votering.get("votering_id")) in endret:
+            if avvik:
+                endret_avvik.append({
+                    "votering_id": votering["votering_id"],
+                    "sak_id": votering.get("sak_id"),
+                    "avvik": avvik
+                })
+            continue
+        stratum = per_stratum[votering.get("sakstype") or "ukjent"]
+        stratum["kontrollert"] += 1
+        
+        if avvik:
+            stratum["med_avvik"] += 1
+            resultater.append({
+                "votering_id": votering["votering_id"],
+                "sak_id": votering.get("sak_id"),
+                "avvik": avvik
+            })
+    
+    # Steg 3: Feilrate med konfidensintervall
+    kontrollert = sum(s["kontrollert"] for s in per_stratum.values())
+    med_avvik = len(resultater)
+    nedre, ovre = wilson_intervall(med_avvik, kontrollert)
+    
+    for stratum, tall in per_stratum.items():
+        tall.update(fordeling[stratum])
+    
+    rapport = {
+        "sesjon_id": sesjon_id,
+        "kontrollert_dato": datetime.now().isoformat(),
+        "api_url": api_url,
+        "frø": frø,
+        "antall_voteringer": len(voteringer),
+        "antall_kontrollert": kontrollert,
+        "antall_med_avvik": med_avvik,
+        "antall_henting_feilet": len(feilet),
+        "feilrate_prosent": _prosent(med_avvik, kontrollert),
+        "feilrate_konfidensintervall_95": [round(nedre * 100, 2), round(ovre * 100, 2)],
+        "sakstyper": dict(sorted(per_stratum.items())),
+        "tid_sekunder": round(tid, 2),
+        "voteringer_med_avvik": resultater,
+        "sjekksummer_funnet": forskjell is not None,
+        "antall_endret_siden_innhenting": len(ekstra),
+        "endret_siden_innhenting_med_avvik": endret_avvik,
+        "henting_feilet": feilet
+    }
+    
+    rapport_fil = os.path.join(data_mappe, f"stikkprove_{sesjon_id}.json")
+    with open(rapport_fil, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n📊 RESULTAT")
+    print("-" * 50)
+    print(f"   Kontrollert:  {kontrollert} voteringer")
+    print(f"   Med avvik:    {med_avvik} ({rapport['feilrate_prosent']}%)")
+    print(f"   95 % intervall for feilraten: {nedre * 100:.2f}% – {ovre * 100:.2f}%")
+    if ekstra:
+        print(f"   Endret siden innhenting: {len(endret_avvik)} av {len(ekstra)} med avvik fra API-et")
+    if feilet:
+        print(f"   ⚠️  {len(feilet)} voteringer kunne ikke hentes (ikke med i feilraten)")
+    for r in resultater[:5]:
+        a = r["avvik"][0]
+        print(f"   • Votering {r['votering_id']}: {len(r['avvik'])} avvik, f.eks. "
+              f"{a['felt']} {a['nokkel']}: lagret {a['lagret']}, hentet {a['hentet']}")
+    print(f"\n   💾 Rapport lagret til {rapport_fil}")
+    print("\n" + "=" * 70)
+    
+    return rapport
+
+
+def _referanse_avstand(a, b):
+    """
+    Referanseavstand mellom to {nøkkel: "for"/"mot"}: 2 for motsatt
+    stemme, 1 når bare den ene har stemt for eller mot.
+    """
+    avstand = 0
+    for nokkel in set(a) | set(b):
+        if a.get(nokkel) != b.get(nokkel):
+            avstand += 2 if nokkel in a and nokkel in b else 1
+    return avstand
+
+
+def verifiser_likhetsindeks(data_mappe="../data", antall=20, k=10, frø=None):
+    """
+    Verifiserer likhetsindeksen (likhetsindeks.py) mot rådataene.
+    
+    Sjekker at hver votering i indeksen har riktig partistandpunkt og
+    riktige stemmer, og at søk for et tilfeldig utvalg voteringer gir
+    samme avstander som et fullt søk med en uavhengig referanseberegning.
+    
+    Parametre:
+        antall: Antall voteringer det søkes fra
+        k: Antall treff per søk
+    
+    Returnerer rapporten (dictionary).
+    """
+    print("=" * 70)
+    print("VERIFISERER LIKHETSINDEKSEN")
+    print("=" * 70)
+    
+    indeks = last_likhetsindeks(data_mappe)
+    avvik = []
+    
+    # Referanse: {(sesjon_id, votering_id): (partistandpunkt, representantstemmer)}
+    referanse = {}
+    for sesjon_id in sorted(set(indeks.sesjoner)):
+        try:
+            voteringer = les_voteringsfil(os.path.join(data_mappe, f"voteringer_{sesjon_id}.json"))
+        except FileNotFoundError as e:
+            print(f"❌ Fant ikke filen {e.filename}")
+            return None
+        
+        for votering in voteringer:
+            stemmer = votering.get("stemmer")
+            if not stemmer:
+                continue
+            repstemmer = {}
+            for stemme in stemmer:
+                rep_id = stemme.get("representant", {}).get("id")
+                resultat = stemme_som_tekst(stemme.get("votering"))
+                if rep_id and resultat in ("for", "mot"):
+                    repstemmer[rep_id] = resultat
+            referanse[(sesjon_id, votering.get("votering_id"))] = (_referanse_standpunkt(stemmer), repstemmer)
+    
+    print(f"\n📂 {len(referanse)} voteringer i rådataene, {len(indeks)} i indeksen")
+    
+    # 1. Innholdet i indeksen
+    i_indeksen = {}
+    for posisjon in range(len(indeks)):
+        nokkel = (indeks.sesjoner[posisjon], indeks.rader[posisjon][0])
+        i_indeksen[nokkel] = posisjon
+        
+        if nokkel not in referanse:
+            avvik.append({"type": "ukjent_i_indeks", "votering": list(nokkel)})
+            continue
+        
+        standpunkt, repstemmer = referanse[nokkel]
+        if indeks.standpunkt(indeks.partibit[posisjon]) != standpunkt:
+            avvik.append({"type": "partistandpunkt", "votering": list(nokkel)})
+        
+        lagret = {}
+        for i, rep_id in enumerate(indeks.representanter):
+            if (indeks.forbit[posisjon] >> i) & 1:
+                lagret[rep_id] = "for"
+            elif (indeks.motbit[posisjon] >> i) & 1:
+                lagret[rep_id] = "mot"
+        if lagret != repstemmer:
+            avvik.append({"type": "representantstemmer", "votering": list(nokkel)})
+    
+    for nokkel in sorted(set(referanse) - set(i_indeksen), key=str):
+        avvik.append({"type": "mangler_i_indeks", "votering": list(nokkel)})
+    
+    # 2. Søk: samme avstander som et fullt søk
+    utvalg = random.Random(frø).sample(sorted(i_indeksen, key=str), min(antall, len(i_indeksen)))
+    søketid = 0.0
+    
+    for sesjon_id, votering_id in utvalg:
+        standpunkt, repstemmer = referanse[(sesjon_id, votering_id)]
+        alle = [
+            (_referanse_avstand(standpunkt, ref[0]), _referanse_avstand(repstemmer, ref[1]), nokkel)
+            for nokkel, ref in referanse.items() if nokkel != (sesjon_id, votering_id)
+        ]
+        
+        for etter in ("parti", "representant"):
+            start = time.perf_counter()
+            treff = indeks.finn_lignende(votering_id, k=k, etter=etter, sesjon_id=sesjon_id)
+            søketid += time.perf_counter() - start
+            
+            if etter == "parti":
+                forventet = sorted((p, r) for p, r, _ in alle)[:k]
+                faktisk = [(t["parti_avstand"], t["representant_avstand"]) for t in treff]
+            else:
+                forventet = sorted(r for _, r, _ in alle)[:k]
+                faktisk = [t["representant_avstand"] for t in treff]
+            
+            # Treffene må også ha de avstandene indeksen oppgir
+            feil_avstand = []
+            for t in treff:
+                ref = referanse.get((t["sesjon_id"], t["votering_id"]))
+                if (
+                    ref is None
+                    or _referanse_avstand(standpunkt, ref[0]) != t["parti_avstand"]
+                    or _referanse_avstand(repstemmer, ref[1]) != t["representant_avstand"]
+                ):
+                    feil_avstand.append(t["votering_id"])
+            
+            if faktisk != forventet or feil_avstand:
+                avvik.append({
+                    "type": f"sok_{etter}",
+                    "votering": [sesjon_id, votering_id],
+                    "forventet": forventet,
+                    "indeks": faktisk,
+                    "feil_avstand": feil_avstand
+                })
+    
+    antall_sok = 2 * len(utvalg)
+    rapport = {
+        "verifisert_dato": datetime.now().isoformat(),
+        "antall_voteringer": len(indeks),
+        "antall_botter": len(indeks.botter),
+        "antall_sok": antall_sok,
+        "k": k,
+        "snitt_sok_ms": round(1000 * søketid / antall_sok, 3) if antall_sok else None,
+        "antall_avvik": len(avvik),
+        "ok": not avvik,
+        "avvik": avvik
+    }
+    
+    rapport_fil = os.path.join(data_mappe, "verifisering_likhetsindeks.json")
+    with open(rapport_fil, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n📊 RESULTAT")
+    print("-" * 50)
+    print(f"   {len(indeks)} voteringer i {len(indeks.botter)} bøtter")
+    print(f"   {antall_sok} søk, i snitt {rapport['snitt_sok_ms']} ms")
+    if avvik:
+        print(f"   ❌ {len(avvik)} avvik funnet. Eksempler:")
+        for a in avvik[:10]:
+            print(f"   • {a['type']} {a['votering']}")
+    else:
+        print("   ✅ Indeksen stemmer med referanseberegningen")
+    print(f"\n   💾 Rapport lagret til {rapport_fil}")
+    print("\n" + "=" * 70)
+    
+    return rapport
 
 
 def generer_metodikk_dokument():
@@ -406,7 +1154,18 @@ Tilgjengelige funksjoner:
 2. verifiser_partipar_enighet(parti_a, parti_b, fil)
    → Viser hvordan enighet mellom to partier beregnes
 
-3. generer_metodikk_dokument()
+3. verifiser_hele_sesjon(sesjon_id)
+   → Regner ut alle partipar og partistatistikk på nytt og
+     sammenligner med analyse_{sesjon}.json
+
+4. stikkprove_analyse(analyse_fil, antall=200)
+   → Henter en stratifisert stikkprøve på nytt fra API-et og
+     gir feilraten med 95 % konfidensintervall
+
+5. verifiser_likhetsindeks()
+   → Sjekker likhetsindeksen og søkene i den mot rådataene
+
+6. generer_metodikk_dokument()
    → Lager et dokument som forklarer metodikken
 
 Eksempel:
@@ -0,0 +1,323 @@
+# ============================================================
+# STORTINGSVOTERING - YTELSESTEST
+# ============================================================
+# Dette scriptet måler hvor lang tid hvert steg i løypa tar på
+# syntetiske data i flere størrelser (se generer_testdata.py):
+#
+#   henting       hent_voteringer_for_saker mot lokal stand-in
+#   lesing        les_voteringer (JSON-parsing)
+#   standpunkt    partitelling og partistandpunkt
+#   matrise       beregn_enighetsmatrise
+#   statistikk    beregn_partistatistikk
+#   analyse       analyser_sesjon (hele, med lagring)
+#   tidsserie     analyser_alle_sesjoner + lag_tidsserie_for_frontend
+#   verifisering  verifiser_hele_sesjon
+#   eksport       eksporter_frontend
+#
+# For hvert steg lagres tid, voteringer per sekund og høyeste
+# minnebruk til ytelse_resultater.json. Hvis en baseline finnes
+# (ytelse_baseline.json), sammenlignes hvert steg med den, og
+# scriptet avslutter med kode 1 hvis noe er blitt vesentlig
+# tregere eller bruker mye mer minne.
+# ============================================================
+
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# ============================================================
+# KONFIGURASJON
+# ============================================================
+
+RESULTAT_FIL = "ytelse_resultater.json"
+BASELINE_FIL = "ytelse_baseline.json"
+
+# Voteringer per sesjon for hver størrelse (to sesjoner per størrelse)
+STORRELSER = {"liten": 500, "middels": 2000, "stor": 5000}
+STANDARD_STORRELSER = ["liten", "middels"]
+ANTALL_SESJONER = 2
+
+# Hentesteget bruker et eget, lite utvalg (det måles per votering)
+MAKS_HENTEDE_VOTERINGER = 200
+
+# Et steg regnes som en regresjon hvis det er mer enn TERSKEL
+# tregere enn baseline OG minst MIN_FORSKJELL_SEKUNDER tregere
+# (korte steg varierer mye fra kjøring til kjøring)
+TERSKEL = 0.25
+MIN_FORSKJELL_SEKUNDER = 0.05
+MINNE_TERSKEL = 0.25
+
+# ============================================================
+# STEGENE
+# ============================================================
+
+def _stille(funksjon, *args, **kwargs):
+    """Kjører en funksjon uten utskrift."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funksjon(*args, **kwargs)
+
+
+def lag_steg(data_mappe, hente_mappe, sesjon_id, antall_voteringer):
+    """
+    Lager stegene som funksjoner uten argumenter.
+    
+    Stegene deler mellomresultater (lastede voteringer, tellinger)
+    gjennom en felles dictionary, så hvert steg måler bare sitt eget
+    arbeid. De må kjøres i den rekkefølgen de returneres.
+    
+    Returnerer dict: {steg: funksjon som returnerer antall voteringer}
+    """
+    from analyser_data_v2 import (
+        analyser_sesjon, beregn_enighetsmatrise, beregn_partistatistikk,
+        les_voteringer, standpunkt_fra_telling, tell_alle_voteringer
+    )
+    
+    delt = {}
+    
+    def henting():
+        import hent_data_v2
+        from api_standin import start_standin
+        
+        server, base_url = start_standin(hente_mappe)
+        gammel_url, gammel_pause = hent_data_v2.API_BASE_URL, hent_data_v2.PAUSE_MELLOM_KALL
+        hent_data_v2.API_BASE_URL, hent_data_v2.PAUSE_MELLOM_KALL = base_url, 0.0
+        try:
+            saker = server.svar["saker"][sesjon_id]
+            voteringer = _stille(hent_data_v2.hent_voteringer_for_saker, saker)
+        finally:
+            hent_data_v2.API_BASE_URL, hent_data_v2.PAUSE_MELLOM_KALL = gammel_url, gammel_pause
+            server.shutdown()
+            server.server_close()
+        return len(voteringer)
+    
+    def lesing():
+        delt["voteringer"] = [v for v in les_voteringer(sesjon_id, data_mappe) if v.get("stemmer")]
+        return len(delt["voteringer"])
+    
+    def standpunkt():
+        delt["tellinger"] = tell_alle_voteringer(delt["voteringer"])
+        for telling in delt["tellinger"]:
+            standpunkt_fra_telling(telling)
+        return len(delt["voteringer"])
+    
+    def matrise():
+        beregn_enighetsmatrise(delt["voteringer"], delt["tellinger"])
+        return len(delt["voteringer"])
+    
+    def statistikk():
+        beregn_partistatistikk(delt["voteringer"], delt["tellinger"])
+        return len(delt["voteringer"])
+    
+    def analyse():
+        # Frigjør de lastede dataene; analyser_sesjon leser selv
+        antall = len(delt.pop("voteringer"))
+        delt.pop("tellinger")
+        _stille(analyser_sesjon, sesjon_id, data_mappe)
+        return antall
+    
+    def tidsserie():
+        from analyser_tidsserie import analyser_alle_sesjoner, lag_tidsserie_for_frontend
+        
+        data = _stille(analyser_alle_sesjoner, data_mappe, tving=True)
+        _stille(lag_tidsserie_for_frontend, data_mappe, data)
+        return sum(d["antall_voteringer"] for d in data["sesjonsanalyser"].values())
+    
+    def verifisering():
+        from verifiser_data import verifiser_hele_sesjon
+        
+        rapport = _stille(verifiser_hele_sesjon, sesjon_id, data_mappe)
+        return rapport["antall_voteringer"]
+    
+    def eksport():
+        from eksporter_frontend import eksporter_frontend
+        
+        _stille(eksporter_frontend, data_mappe)
+        return ANTALL_SESJONER * antall_voteringer
+    
+    return {
+        "henting": henting,
+        "lesing": lesing,
+        "standpunkt": standpunkt,
+        "matrise": matrise,
+        "statistikk": statistikk,
+        "analyse": analyse,
+        "tidsserie": tidsserie,
+        "verifisering": verifisering,
+        "eksport": eksport
+    }
+
+
+# ============================================================
+# MÅLING
+# ============================================================
+
+def mal_storrelse(storrelse, antall_voteringer, med_minne=True, frø=1):
+    """
+    Lager testdata for én størrelse og måler alle stegene.
+    
+    Tiden måles uten tracemalloc (som gjør Python flere ganger
+    tregere). Minnet måles i en egen runde med tracemalloc.
+    
+    Returnerer dict: {steg: {"tid_sekunder", "voteringer_per_sekund", "topp_minne_mb"}}
+    """
+    from generer_testdata import generer_datasett
+    
+    mappe = tempfile.mkdtemp(prefix=f"ytelsestest_{storrelse}_")
+    hente_mappe = os.path.join(mappe, "henting")
+    sesjon_id = "2021-2022"
+    
+    try:
+        _stille(generer_datasett, mappe, forste_sesjon=sesjon_id,
+                antall_sesjoner=ANTALL_SESJONER, antall_voteringer=antall_voteringer, frø=frø)
+        _stille(generer_datasett, hente_mappe, forste_sesjon=sesjon_id,
+                antall_sesjoner=1, antall_voteringer=min(antall_voteringer, MAKS_HENTEDE_VOTERINGER), frø=frø)
+        
+        resultater = {}
+        
+        # Runde 1: tid
+        for steg, funksjon in lag_steg(mappe, hente_mappe, sesjon_id, antall_voteringer).items():
+            start = time.perf_counter()
+            antall = funksjon()
+            tid = time.perf_counter() - start
+            resultater[steg] = {
+                "tid_sekunder": round(tid, 4),
+                "voteringer_per_sekund": round(antall / tid, 1) if tid > 0 else None,
+                "topp_minne_mb": None
+            }
+            print(f"   {storrelse:<8} {steg:<13} {tid:>8.3f} s  {resultater[steg]['voteringer_per_sekund']:>10} vot/s")
+        
+        # Runde 2: minne
+        if med_minne:
+            for steg, funksjon in lag_steg(mappe, hente_mappe, sesjon_id, antall_voteringer).items():
+                tracemalloc.start()
+                funksjon()
+                resultater[steg]["topp_minne_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                tracemalloc.stop()
+            print(f"   {storrelse:<8} høyeste minne: " + ", ".join(
+                f"{steg} {r['topp_minne_mb']} MB" for steg, r in resultater.items()))
+        
+        return resultater
+    finally:
+        shutil.rmtree(mappe, ignore_errors=True)
+
+
+def sammenlign_med_baseline(resultater, baseline, terskel=TERSKEL):
+    """
+    Finner steg som er blitt tregere eller bruker mer minne enn i baseline.
+    
+    Returnerer liste med regresjoner: {storrelse, steg, maal, baseline, naa, endring_prosent}
+    """
+    regresjoner = []
+    
+    for storrelse, stegene in resultater.items():
+        for steg, naa in stegene.items():
+            gammel = baseline.get("resultater", {}).get(storrelse, {}).get(steg)
+            if not gammel:
+                continue
+            
+            tid_foer, tid_naa = gammel["tid_sekunder"], naa["tid_sekunder"]
+            if tid_naa > tid_foer * (1 + terskel) and tid_naa - tid_foer > MIN_FORSKJELL_SEKUNDER:
+                regresjoner.append({
+                    "storrelse": storrelse, "steg": steg, "maal": "tid_sekunder",
+                    "baseline": tid_foer, "naa": tid_naa,
+                    "endring_prosent": round((tid_naa / tid_foer - 1) * 100, 1)
+                })
+            
+            minne_foer, minne_naa = gammel.get("topp_minne_mb"), naa.get("topp_minne_mb")
+            if minne_foer and minne_naa and minne_naa > minne_foer * (1 + MINNE_TERSKEL) and minne_naa - minne_foer > 1:
+                regresjoner.append({
+                    "storrelse": storrelse, "steg": steg, "maal": "topp_minne_mb",
+                    "baseline": minne_foer, "naa": minne_naa,
+                    "endring_prosent": round((minne_naa / minne_foer - 1) * 100, 1)
+                })
+    
+    return regresjoner
+
+
+# ============================================================
+# HOVEDFUNKSJON
+# ============================================================
+
+def kjor_ytelsestest(data_mappe="../data", storrelser=None, med_minne=True, lagre_baseline=False, terskel=TERSKEL):
+    """
+    Kjører ytelsestesten og sammenligner med baseline.
+    
+    Parametre:
+        storrelser: Navn fra STORRELSER (standard: liten og middels)
+        med_minne: Mål høyeste minnebruk (tar omtrent dobbelt så lang tid)
+        lagre_baseline: Lagre resultatet som ny baseline
+        terskel: Hvor mye tregere et steg kan bli (0.25 = 25 %)
+    
+    Returnerer (resultat, regresjoner).
+    """
+    print("=" * 60)
+    print("⏱️  YTELSESTEST")
+    print("=" * 60)
+    
+    storrelser = storrelser or STANDARD_STORRELSER
+    resultater = {}
+    
+    for storrelse in storrelser:
+        print(f"\n📏 {storrelse}: {ANTALL_SESJONER} sesjoner × {STORRELSER[storrelse]} voteringer")
+        resultater[storrelse] = mal_storrelse(storrelse, STORRELSER[storrelse], med_minne)
+    
+    resultat = {
+        "kjort_dato": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "storrelser": {s: STORRELSER[s] for s in storrelser},
+        "resultater": resultater
+    }
+    
+    with open(os.path.join(data_mappe, RESULTAT_FIL), "w", encoding="utf-8") as f:
+        json.dump(resultat, f, ensure_ascii=False, indent=2)
+    print(f"\n   💾 Resultater lagret til {os.path.join(data_mappe, RESULTAT_FIL)}")
+    
+    baseline_fil = os.path.join(data_mappe, BASELINE_FIL)
+    regresjoner = []
+    
+    if lagre_baseline:
+        shutil.copyfile(os.path.join(data_mappe, RESULTAT_FIL), baseline_fil)
+        print(f"   💾 Lagret som ny baseline: {baseline_fil}")
+    elif os.path.exists(baseline_fil):
+        with open(baseline_fil, "r", encoding="utf-8") as f:
+            regresjoner = sammenlign_med_baseline(resultater, json.load(f), terskel)
+        
+        if regresjoner:
+            print(f"\n❌ {len(regresjoner)} regresjoner (terskel {terskel * 100:.0f} %):")
+            for r in regresjoner:
+                print(f"   • {r['storrelse']} {r['steg']} {r['maal']}: {r['baseline']} → {r['naa']} (+{r['endring_prosent']}%)")
+        else:
+            print(f"\n✅ Ingen steg er mer enn {terskel * 100:.0f} % dårligere enn baseline")
+    else:
+        print("\n   ℹ️  Ingen baseline å sammenligne med (kjør med --lagre-baseline)")
+    
+    return resultat, regresjoner
+
+
+# ============================================================
+# KJØR
+# ============================================================
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Måler ytelsen til alle stegene.")
+    parser.add_argument("--data-mappe", default="../data")
+    parser.add_argument("--storrelser", nargs="+", choices=sorted(STORRELSER), help="standard: liten middels")
+    parser.add_argument("--uten-minne", action="store_true", help="hopp over minnemålingen")
+    parser.add_argument("--lagre-baseline", action="store_true")
+    parser.add_argument("--terskel", type=float, default=TERSKEL)
+    args = parser.parse_args()
+    
+    _, regresjoner = kjor_ytelsestest(args.data_mappe, args.storrelser, not args.uten_minne,
+                                      args.lagre_baseline, args.terskel)
+    sys.exit(1 if regresjoner else 0)
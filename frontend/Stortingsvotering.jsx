@@ -1,7 +1,8 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 
-// Analysedata basert på realistiske norske stortingsmønstre
-const analyseData = {
+// Eksempeldata basert på realistiske norske stortingsmønstre.
+// Brukes til ekte data er lastet (eller hvis lasting feiler).
+const eksempelData = {
   sesjon: "2023-2024",
   antall_voteringer: 847,
   partienighet: {
@@ -60,6 +61,51 @@ const partier = {
   "FrP": { navn: "Fremskrittspartiet", farge: "#1E40AF", kort: "FrP" }
 };
 
+// Hvor eksporterte datafiler ligger (se backend/eksporter_frontend.py).
+// index.json er liten og lastes først; den peker til resten av filene.
+const DATA_URL = '/data/frontend';
+
+const hentJson = (filnavn) =>
+  fetch(`${DATA_URL}/${filnavn}`).then(r => r.ok ? r.json() : Promise.reject(new Error(`HTTP ${r.status}`)));
+
+// Gjør en kompakt sesjonsfil om til formatet komponenten bruker.
+// Partier uten navn/farge i "partier" (f.eks. Uav) hoppes over.
+const fraSesjonsfil = (fil) => {
+  const kjente = fil.partier.filter(p => partier[p]);
+  const enighet = {};
+  fil.partier.forEach((a, i) => {
+    if (!partier[a]) return;
+    enighet[a] = {};
+    fil.partier.forEach((b, j) => {
+      if (partier[b]) enighet[a][b] = i === j ? 100 : fil.enighet[i][j];
+    });
+  });
+
+  const kolonner = fil.partistatistikk.kolonner;
+  const partistatistikk = {};
+  fil.partier.forEach((p, i) => {
+    const rad = fil.partistatistikk.rader[i];
+    partistatistikk[p] = {
+      vinnerside_prosent: rad[kolonner.indexOf('vinnersiden_prosent')],
+      for_prosent: rad[kolonner.indexOf('for_prosent')]
+    };
+  });
+
+  const tilPar = ([parti_a, parti_b, enighet_prosent]) => ({ parti_a, parti_b, enighet_prosent });
+  const erKjent = (par) => partier[par.parti_a] && partier[par.parti_b];
+
+  return {
+    sesjon: fil.sesjon,
+    antall_voteringer: fil.antall_voteringer,
+    partienighet: { enighet, partier: kjente },
+    partistatistikk,
+    mest_og_minst_enige: {
+      mest_enige: fil.mest_enige.map(tilPar).filter(erKjent).slice(0, 5),
+      minst_enige: fil.minst_enige.map(tilPar).filter(erKjent).slice(0, 5)
+    }
+  };
+};
+
 // Hjelpefunksjon for å få farge basert på enighetsgrad
 const getEnighetFarge = (prosent) => {
   if (prosent >= 75) return 'bg-emerald-500';
@@ -80,6 +126,25 @@ const getEnighetBgClass = (prosent) => {
 export default function Stortingsvotering() {
   const [valgtParti, setValgtParti] = useState(null);
   const [visInfo, setVisInfo] = useState('matrise');
+  const [analyseData, setAnalyseData] = useState(eksempelData);
+
+  // Last indeksen, og deretter bare filen for siste sesjon
+  useEffect(() => {
+    let avbrutt = false;
+    hentJson('index.json')
+      .then(indeks => {
+        const sesjoner = indeks.sesjoner.filter(s => indeks.filer.sesjoner[s]);
+        const siste = sesjoner[sesjoner.length - 1];
+        return hentJson(indeks.filer.sesjoner[siste]);
+      })
+      .then(fil => {
+        if (!avbrutt) setAnalyseData(fraSesjonsfil(fil));
+      })
+      .catch(() => {
+        // Beholder eksempeldataene
+      });
+    return () => { avbrutt = true; };
+  }, []);
 
   const partiOrdre = analyseData.partienighet.partier;
   const enighet = analyseData.partienighet.enighet;
@@ -89,7 +154,7 @@ export default function Stortingsvotering() {
     if (!valgtParti) return null;
     const partiEnighet = enighet[valgtParti];
     return Object.entries(partiEnighet)
-      .filter(([p]) => p !== valgtParti)
+      .filter(([p, prosent]) => p !== valgtParti && prosent != null)
       .sort(([,a], [,b]) => b - a);
   }, [valgtParti, enighet]);
 
@@ -199,16 +264,17 @@ export default function Stortingsvotering() {
                       {partiOrdre.map(partiB => {
                         const verdi = enighet[partiA][partiB];
                         const erSamme = partiA === partiB;
+                        const mangler = !erSamme && verdi == null;
                         return (
                           <td key={partiB} className="p-1.5">
                             <div 
                               className={`w-14 h-14 rounded-xl flex items-center justify-center text-sm font-bold transition-all duration-200 hover:scale-105 cursor-default ${
-                                erSamme ? 'bg-slate-800 text-slate-500' : 'text-white shadow-lg'
+                                erSamme || mangler ? 'bg-slate-800 text-slate-500' : 'text-white shadow-lg'
                               }`}
-                              style={!erSamme ? { backgroundColor: getEnighetBgClass(verdi) } : {}}
+                              style={!erSamme && !mangler ? { backgroundColor: getEnighetBgClass(verdi) } : {}}
                               title={`${partier[partiA].navn} + ${partier[partiB].navn}: ${verdi}% enighet`}
                             >
-                              {erSamme ? '—' : `${verdi}%`}
+                              {erSamme || mangler ? '—' : `${verdi}%`}
                             </div>
                           </td>
                         );